@@ -1,11 +1,391 @@
+import argparse
+import asyncio
 import json
 import io
 import base64
-import matplotlib.pyplot as plt
+import gzip
+import hashlib
+import multiprocessing
+import os
+import signal
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 import matplotlib.patches as patches
 import numpy as np
 from http.server import BaseHTTPRequestHandler
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shop-drawings'))
+import service_log
+
+log = service_log.get_logger('drawings')
+
+# Bump whenever a change alters drawing output, so clients drop images they hold (see drawing_etag)
+RENDERER_VERSION = 1
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type, If-None-Match, Accept-Encoding'),
+    ('Access-Control-Expose-Headers', 'ETag'),
+]
+
+# JSON bodies smaller than this are sent uncompressed even when the client accepts gzip
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+# Accept value for the result as multipart/form-data: a JSON "result" part and the PNGs as raw parts
+MULTIPART_TYPE = 'multipart/form-data'
+
+def generate_elevation(opening_data, binary=False):
+    """Generate elevation drawing (elevation_image as PNG bytes with binary, else base64)"""
+    try:
+        panels = opening_data.get('panels', [])
+        if not panels:
+            return {'success': False, 'error': 'No panels found'}
+
+        # Calculate total width and height
+        total_width = sum(panel.get('width', 0) for panel in panels)
+        height = opening_data.get('height', 96)
+
+        # Create figure
+        # Not registered with pyplot, so nothing is left behind when drawing fails
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.set_xlim(0, total_width + 20)
+        ax.set_ylim(0, height + 20)
+        ax.set_aspect('equal')
+
+        # Draw panels
+        x_offset = 10
+        door_schedule_rows = []
+
+        for i, panel in enumerate(panels):
+            panel_width = panel.get('width', 0)
+            panel_height = panel.get('height', height)
+            panel_type = panel.get('componentInstance', {}).get('product', {}).get('name', 'Unknown')
+            direction = panel.get('direction', '-')
+
+            # Draw panel frame
+            frame_rect = patches.Rectangle(
+                (x_offset, 10), panel_width, panel_height,
+                linewidth=2, edgecolor='black', facecolor='lightgray', alpha=0.3
+            )
+            ax.add_patch(frame_rect)
+
+            # Determine panel type for display
+            display_type = 'Fixed'
+            if 'swing' in panel_type.lower() or 'door' in panel_type.lower():
+                display_type = 'Swing Door'
+                # Draw handle
+                handle_x = x_offset + (panel_width * 0.9 if 'right' in direction.lower() else panel_width * 0.1)
+                handle_y = 10 + panel_height / 2
+                handle = patches.Circle((handle_x, handle_y), 2, facecolor='black')
+                ax.add_patch(handle)
+            elif 'sliding' in panel_type.lower():
+                display_type = 'Sliding Door'
+
+            # Add dimensions
+            ax.annotate(f'{panel_width}"', 
+                       xy=(x_offset + panel_width/2, 5), 
+                       ha='center', va='top', fontsize=10, weight='bold')
+
+            # Add to door schedule
+            door_schedule_rows.append([
+                str(i + 1), 
+                display_type, 
+                f'{panel_width}"', 
+                direction if direction != '-' else '-',
+                'Clear'  # Default glass type
+            ])
+
+            x_offset += panel_width
+
+        # Add overall dimension
+        ax.annotate(f'{total_width}"', 
+                   xy=(10 + total_width/2, height + 15), 
+                   ha='center', va='bottom', fontsize=12, weight='bold')
+
+        # Add height dimension
+        ax.annotate(f'{height}"', 
+                   xy=(5, 10 + height/2), 
+                   ha='right', va='center', fontsize=12, weight='bold', rotation=90)
+
+        # Style the plot
+        ax.set_title('Elevation View', fontsize=16, weight='bold', pad=20)
+        ax.axis('off')
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=150, facecolor='white')
+        image = buffer.getvalue() if binary else base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+        # Create door schedule
+        door_schedule = {
+            'headers': ['Panel #', 'Type', 'Width (in)', 'Direction', 'Glass'],
+            'rows': door_schedule_rows
+        }
+
+        return {
+            'success': True,
+            'elevation_image': image,
+            'door_schedule': door_schedule,
+            'total_width': total_width,
+            'height': height
+        }
+
+    except Exception as e:
+        return {'success': False, 'error': f'Failed to generate elevation: {str(e)}'}
+
+def generate_plan(opening_data, binary=False):
+    """Generate plan view drawing (plan_image as PNG bytes with binary, else base64)"""
+    try:
+        panels = opening_data.get('panels', [])
+        if not panels:
+            return {'success': False, 'error': 'No panels found'}
+
+        # Check if there are any swing doors for plan view
+        has_swing_doors = any(
+            'swing' in panel.get('componentInstance', {}).get('product', {}).get('name', '').lower() or
+            'door' in panel.get('componentInstance', {}).get('product', {}).get('name', '').lower()
+            for panel in panels
+        )
+
+        if not has_swing_doors:
+            return {'success': False, 'error': 'Plan views require at least one swing door'}
+
+        # Calculate dimensions
+        total_width = sum(panel.get('width', 0) for panel in panels)
+        depth = 6  # Standard door depth
+
+        # Create figure
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.set_xlim(0, total_width + 20)
+        ax.set_ylim(0, depth + 20)
+        ax.set_aspect('equal')
+
+        # Draw panels
+        x_offset = 10
+
+        for panel in panels:
+            panel_width = panel.get('width', 0)
+            panel_type = panel.get('componentInstance', {}).get('product', {}).get('name', 'Unknown')
+            direction = panel.get('direction', '-')
+
+            # Draw panel frame (top view)
+            frame_rect = patches.Rectangle(
+                (x_offset, 10), panel_width, depth,
+                linewidth=2, edgecolor='black', facecolor='lightblue', alpha=0.3
+            )
+            ax.add_patch(frame_rect)
+
+            # Draw door swing if it's a swing door
+            if 'swing' in panel_type.lower() or 'door' in panel_type.lower():
+                # Determine swing direction and draw arc
+                if 'left' in direction.lower():
+                    # Left swing
+                    arc_center = (x_offset, 10 + depth)
+                    swing_arc = patches.Arc(arc_center, panel_width * 2, panel_width * 2, 
+                                          angle=0, theta1=270, theta2=360, 
+                                          linewidth=1.5, color='red', linestyle='--')
+                    ax.add_patch(swing_arc)
+
+                    # Draw door in open position
+                    door_line = Line2D([x_offset, x_offset + panel_width], 
+                                         [10 + depth, 10 + depth], 
+                                         linewidth=2, color='red')
+                    ax.add_line(door_line)
+
+                elif 'right' in direction.lower():
+                    # Right swing
+                    arc_center = (x_offset + panel_width, 10 + depth)
+                    swing_arc = patches.Arc(arc_center, panel_width * 2, panel_width * 2, 
+                                          angle=0, theta1=180, theta2=270, 
+                                          linewidth=1.5, color='red', linestyle='--')
+                    ax.add_patch(swing_arc)
+
+                    # Draw door in open position
+                    door_line = Line2D([x_offset + panel_width, x_offset], 
+                                         [10 + depth, 10 + depth], 
+                                         linewidth=2, color='red')
+                    ax.add_line(door_line)
+
+            x_offset += panel_width
+
+        # Add dimensions
+        ax.annotate(f'{total_width}"', 
+                   xy=(10 + total_width/2, 5), 
+                   ha='center', va='top', fontsize=12, weight='bold')
+
+        # Style the plot
+        ax.set_title('Plan View', fontsize=16, weight='bold', pad=20)
+        ax.axis('off')
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=150, facecolor='white')
+        image = buffer.getvalue() if binary else base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+        return {
+            'success': True,
+            'plan_image': image
+        }
+
+    except Exception as e:
+        return {'success': False, 'error': f'Failed to generate plan: {str(e)}'}
+
+RENDERERS = {'elevation': generate_elevation, 'plan': generate_plan}
+
+
+def render_batch_job(job):
+    """Render one {openingId, type, data} batch job and tag the result with its openingId and type"""
+    job_type = job.get('type', 'elevation')
+    if job_type == 'elevation':
+        result = generate_elevation(job.get('data', {}))
+    elif job_type == 'plan':
+        result = generate_plan(job.get('data', {}))
+    else:
+        result = {'success': False, 'error': f'Unsupported batch job type: {job_type}'}
+    return dict(result, openingId=job.get('openingId'), type=job_type)
+
+def run_batch(jobs, workers=None):
+    """
+    Render a list of batch jobs, yielding (job index, result) as each one finishes, like
+    drawing_generator.run_batch: jobs are spread over a process pool of `workers` processes
+    (default: CPU count); with one worker or one job, or where processes cannot be started,
+    they run in this process.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    pool = None
+    if workers > 1:
+        try:
+            pool = ProcessPoolExecutor(workers)
+        except (OSError, NotImplementedError):
+            # No semaphores for the pool's queues (AWS Lambda has no /dev/shm)
+            pool = None
+    if pool is None:
+        for index, job in enumerate(jobs):
+            yield index, render_batch_job(job)
+        return
+
+    with pool:
+        futures = {pool.submit(render_batch_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                job = jobs[index]
+                result = {'success': False, 'error': str(e), 'openingId': job.get('openingId'),
+                          'type': job.get('type', 'elevation')}
+            yield index, result
+
+
+def request_key(drawing_type, opening_data):
+    """Hash of a drawing request and the renderer version; key order and whitespace do not matter"""
+    canonical = json.dumps([RENDERER_VERSION, drawing_type, opening_data], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def drawing_etag(drawing_type, opening_data, multipart=False):
+    """
+    ETag of the drawing a request renders. It only depends on the input, so it is known (and
+    If-None-Match answered) before anything is drawn. The multipart form of a drawing has its own.
+    """
+    tag = request_key(drawing_type, opening_data)[:32]
+    return f'"{tag}-parts"' if multipart else f'"{tag}"'
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value names etag (weak comparison, W/ prefixes ignored)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+def accepted(header_value, names):
+    """Whether an Accept or Accept-Encoding header value lists one of names with q above 0"""
+    for coding in (header_value or '').split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip().lower() in names and quality > 0:
+            return True
+    return False
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header value allows gzip (explicitly or as *, with q above 0)"""
+    return accepted(accept_encoding, ('gzip', '*'))
+
+def accepts_multipart(accept):
+    """Whether an Accept header value asks for multipart/form-data; */* and anything else get JSON"""
+    return accepted(accept, (MULTIPART_TYPE,))
+
+def base64_images(result):
+    """result with PNG bytes (rendered with binary) as the base64 strings of the JSON API"""
+    return {key: base64.b64encode(value).decode('ascii') if isinstance(value, bytes) else value
+            for key, value in result.items()}
+
+def encode_json(result, accept_encoding=None):
+    """(body, headers) for a JSON result, gzipped when the client accepts it and it is worth it"""
+    body = json.dumps(base64_images(result)).encode('utf-8')
+    headers = [('Content-Type', 'application/json'), ('Vary', 'Accept, Accept-Encoding')]
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(accept_encoding):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers.append(('Content-Encoding', 'gzip'))
+    return body, headers
+
+def encode_multipart(result):
+    """
+    (body, headers) for a result as multipart/form-data (what fetch's response.formData() reads):
+    a "result" part with the JSON fields and one image/png part per PNG, sent as is instead of
+    base64. Not gzipped; PNGs do not compress.
+    """
+    boundary = os.urandom(16).hex()
+    fields = {key: value for key, value in result.items() if not isinstance(value, bytes)}
+    parts = [('name="result"', 'application/json', json.dumps(fields).encode('utf-8'))]
+    parts += [(f'name="{key}"; filename="{key}.png"', 'image/png', value)
+              for key, value in result.items() if isinstance(value, bytes)]
+    body = []
+    for disposition, content_type, data in parts:
+        body.append(f'--{boundary}\r\nContent-Disposition: form-data; {disposition}\r\n'
+                    f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1'))
+        body += [data, b'\r\n']
+    body.append(f'--{boundary}--\r\n'.encode('latin-1'))
+    return b''.join(body), [('Content-Type', f'{MULTIPART_TYPE}; boundary={boundary}'), ('Vary', 'Accept, Accept-Encoding')]
+
+def encode_response(result, accept=None, accept_encoding=None):
+    """(body, headers) for a drawing result in the form the request's Accept header asks for"""
+    if accepts_multipart(accept):
+        return encode_multipart(result)
+    return encode_json(result, accept_encoding)
+
+class LineStream:
+    """Encodes newline-delimited JSON replies, as one gzip stream flushed after every line when gzipped"""
+
+    def __init__(self, compress):
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def line(self, result):
+        data = (json.dumps(base64_images(result)) + '\n').encode('utf-8')
+        if self.compressor is None:
+            return data
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def end(self):
+        return self.compressor.flush() if self.compressor is not None else b''
+
+
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
         content_length = int(self.headers['Content-Length'])
@@ -16,21 +396,37 @@ class handler(BaseHTTPRequestHandler):
             drawing_type = data.get('type', 'elevation')
             opening_data = data.get('data', {})
             
-            if drawing_type == 'elevation':
-                result = self.generate_elevation(opening_data)
-            elif drawing_type == 'plan':
-                result = self.generate_plan(opening_data)
+            if drawing_type == 'batch':
+                self.stream_batch(data.get('jobs') or [], data.get('workers'))
+                return
+            
+            etag = None
+            multipart = accepts_multipart(self.headers.get('Accept'))
+            if drawing_type in RENDERERS:
+                # The client already holds this drawing: answer before drawing anything
+                etag = drawing_etag(drawing_type, opening_data, multipart)
+                if etag_matches(self.headers.get('If-None-Match'), etag):
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_cors_headers()
+                    self.end_headers()
+                    return
+                # PNG bytes; encode_response base64-encodes them for JSON
+                result = RENDERERS[drawing_type](opening_data, binary=True)
             else:
                 result = {'success': False, 'error': 'Invalid drawing type'}
             
+            body, headers = encode_response(result, self.headers.get('Accept'), self.headers.get('Accept-Encoding'))
+            if etag and result.get('success'):
+                headers.append(('ETag', etag))
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_cors_headers()
             self.end_headers()
             
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+            self.wfile.write(body)
             
         except Exception as e:
             self.send_response(500)
@@ -42,206 +438,389 @@ class handler(BaseHTTPRequestHandler):
     
     def do_OPTIONS(self):
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_cors_headers()
         self.end_headers()
 
-    def generate_elevation(self, opening_data):
-        """Generate elevation drawing"""
+    def send_cors_headers(self):
+        for name, value in CORS_HEADERS:
+            self.send_header(name, value)
+
+    def stream_batch(self, jobs, workers=None):
+        """
+        Render a list of {openingId, type, miniature, data} jobs on `workers` processes (see
+        run_batch), writing one JSON line per job, with its index, as it finishes
+        """
+        stream = LineStream(accepts_gzip(self.headers.get('Accept-Encoding')))
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        self.send_header('Vary', 'Accept-Encoding')
+        if stream.compressor is not None:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_cors_headers()
+        self.end_headers()
+        
+        failed = 0
+        for index, result in run_batch(jobs, workers):
+            if not result.get('success'):
+                failed += 1
+            self.wfile.write(stream.line(dict(result, index=index)))
+            self.wfile.flush()
+        
+        summary = {'type': 'batch_complete', 'success': failed == 0, 'completed': len(jobs), 'failed': failed}
+        self.wfile.write(stream.line(summary) + stream.end())
+
+
+# Serving mode: python api/drawings.py [--port 8000] [--workers N] [--queue N]
+#
+# handler above renders on the thread that reads the request. The server below parses requests
+# on an asyncio event loop and renders in a fixed pool of worker processes. At most
+# workers + queue renders are admitted at a time; a request that does not fit is answered at
+# once with 503 and Retry-After, so overload costs a short reply instead of a growing backlog.
+# Requests for a drawing that is already being rendered wait for that render and share its
+# result, and requests whose If-None-Match names the drawing's ETag get 304 without a render
+# (GET /metrics counts renders, coalesced requests, 304s and 503s). Workers return PNG bytes,
+# which are base64-encoded for JSON replies and sent as they are in multipart ones.
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Seconds a connection may take to send its next request before it is closed
+IDLE_TIMEOUT = 15
+
+
+class HttpError(Exception):
+    """A request that is answered with an error status before anything is rendered"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader):
+    """(method, path, headers, body, keep_alive) of the next request on a connection, None when the client is done"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(400, 'Incomplete request') from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, 'Request headers too large') from None
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, path, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(400, 'Malformed request line') from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    if 'transfer-encoding' in headers:
+        raise HttpError(411, 'Content-Length required')
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, 'Invalid Content-Length') from None
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise HttpError(413, f'Request body over {MAX_BODY_BYTES} bytes')
+    body = await reader.readexactly(length)
+    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    return method, path, headers, body, keep_alive
+
+
+def response_head(status, headers, keep_alive):
+    lines = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+    lines += [f'{name}: {value}' for name, value in headers + CORS_HEADERS]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def ignore_interrupts():
+    """Worker initializer: Ctrl-C stops the server, which then shuts the pool down"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class DrawingServer:
+    """
+    Serves the same requests as handler. Elevation and plan renders run in a ProcessPoolExecutor of
+    `workers` processes, up to `queue_size` more wait for a free worker, and anything past that is
+    refused with 503 and a Retry-After of `retry_after` seconds. A batch takes one place, which
+    renders one of its jobs at a time; more of its jobs render at once while workers are idle.
+    With `coalesce`, a request (or batch job) for the same
+    input as a render in progress waits for it instead of rendering again, and takes no place.
+    """
+
+    def __init__(self, workers=None, queue_size=None, retry_after=1, coalesce=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.retry_after = retry_after
+        self.coalesce = coalesce
+        self.pending = 0
+        self.pool = None
+        # Task replacing a broken pool; renders wait for it instead of submitting to the broken one
+        self.restarting = None
+        # request_key -> task rendering it
+        self.in_flight = {}
+        self.metrics = {'renders': 0, 'coalesced': 0, 'notModified': 0, 'rejected': 0}
+
+    def start_pool(self, mp_context=None):
+        """
+        Start every worker now, forked from a process that already imported matplotlib. The pool
+        only replaces self.pool once every worker is up; a pool that fails to start is shut down.
+        """
+        pool = ProcessPoolExecutor(self.workers, mp_context=mp_context, initializer=ignore_interrupts)
         try:
-            panels = opening_data.get('panels', [])
-            if not panels:
-                return {'success': False, 'error': 'No panels found'}
-            
-            # Calculate total width and height
-            total_width = sum(panel.get('width', 0) for panel in panels)
-            height = opening_data.get('height', 96)
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=(12, 8))
-            ax.set_xlim(0, total_width + 20)
-            ax.set_ylim(0, height + 20)
-            ax.set_aspect('equal')
-            
-            # Draw panels
-            x_offset = 10
-            door_schedule_rows = []
-            
-            for i, panel in enumerate(panels):
-                panel_width = panel.get('width', 0)
-                panel_height = panel.get('height', height)
-                panel_type = panel.get('componentInstance', {}).get('product', {}).get('name', 'Unknown')
-                direction = panel.get('direction', '-')
-                
-                # Draw panel frame
-                frame_rect = patches.Rectangle(
-                    (x_offset, 10), panel_width, panel_height,
-                    linewidth=2, edgecolor='black', facecolor='lightgray', alpha=0.3
-                )
-                ax.add_patch(frame_rect)
-                
-                # Determine panel type for display
-                display_type = 'Fixed'
-                if 'swing' in panel_type.lower() or 'door' in panel_type.lower():
-                    display_type = 'Swing Door'
-                    # Draw handle
-                    handle_x = x_offset + (panel_width * 0.9 if 'right' in direction.lower() else panel_width * 0.1)
-                    handle_y = 10 + panel_height / 2
-                    handle = patches.Circle((handle_x, handle_y), 2, facecolor='black')
-                    ax.add_patch(handle)
-                elif 'sliding' in panel_type.lower():
-                    display_type = 'Sliding Door'
-                
-                # Add dimensions
-                ax.annotate(f'{panel_width}"', 
-                           xy=(x_offset + panel_width/2, 5), 
-                           ha='center', va='top', fontsize=10, weight='bold')
-                
-                # Add to door schedule
-                door_schedule_rows.append([
-                    str(i + 1), 
-                    display_type, 
-                    f'{panel_width}"', 
-                    direction if direction != '-' else '-',
-                    'Clear'  # Default glass type
-                ])
-                
-                x_offset += panel_width
-            
-            # Add overall dimension
-            ax.annotate(f'{total_width}"', 
-                       xy=(10 + total_width/2, height + 15), 
-                       ha='center', va='bottom', fontsize=12, weight='bold')
-            
-            # Add height dimension
-            ax.annotate(f'{height}"', 
-                       xy=(5, 10 + height/2), 
-                       ha='right', va='center', fontsize=12, weight='bold', rotation=90)
-            
-            # Style the plot
-            ax.set_title('Elevation View', fontsize=16, weight='bold', pad=20)
-            ax.axis('off')
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight', dpi=150, facecolor='white')
-            plt.close()
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            # Create door schedule
-            door_schedule = {
-                'headers': ['Panel #', 'Type', 'Width (in)', 'Direction', 'Glass'],
-                'rows': door_schedule_rows
-            }
-            
-            return {
-                'success': True,
-                'elevation_image': image_base64,
-                'door_schedule': door_schedule,
-                'total_width': total_width,
-                'height': height
-            }
-            
-        except Exception as e:
-            return {'success': False, 'error': f'Failed to generate elevation: {str(e)}'}
+            for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        self.pool = pool
+
+    def replace_pool(self, broken):
+        """
+        Shut a broken pool down and start a new one; runs on a thread (see render). The new workers
+        come from a forkserver that preloads this module, not from a fork of this process, which by
+        now has the event loop's helper threads.
+        """
+        broken.shutdown(wait=False)
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['__main__'])
+        self.start_pool(context)
 
-    def generate_plan(self, opening_data):
-        """Generate plan view drawing"""
+    def admit(self, limit=None):
+        """
+        Take a place for one render (or batch), False when the workers and the queue are full, or
+        when `limit` places are already taken
+        """
+        if self.pending >= (self.workers + self.queue_size if limit is None else limit):
+            return False
+        self.pending += 1
+        return True
+
+    async def render_shared(self, drawing_type, renderer, opening_data, queued=True):
+        """
+        Result of renderer(opening_data), shared with every overlapping request for the same input.
+        A new render takes a place in the queue when `queued`; None when no place is left.
+        """
+        key = request_key(drawing_type, opening_data) if self.coalesce else None
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.metrics['coalesced'] += 1
+        else:
+            if queued and not self.admit():
+                return None
+            self.metrics['renders'] += 1
+            task = asyncio.ensure_future(self.render(renderer, opening_data))
+            task.add_done_callback(lambda _: self.finished(key, queued))
+            if key is not None:
+                self.in_flight[key] = task
+        # A client hanging up must not cancel a render that others are waiting for
+        return await asyncio.shield(task)
+
+    def finished(self, key, queued):
+        self.in_flight.pop(key, None)
+        if queued:
+            self.pending -= 1
+
+    async def render(self, renderer, opening_data):
+        if self.restarting is not None:
+            try:
+                await asyncio.shield(self.restarting)
+            except Exception as e:
+                # self.pool is still the broken pool, so the next render starts another restart
+                return {'success': False, 'error': f'Could not restart the drawing workers: {e}'}
+        pool = self.pool
         try:
-            panels = opening_data.get('panels', [])
-            if not panels:
-                return {'success': False, 'error': 'No panels found'}
-            
-            # Check if there are any swing doors for plan view
-            has_swing_doors = any(
-                'swing' in panel.get('componentInstance', {}).get('product', {}).get('name', '').lower() or
-                'door' in panel.get('componentInstance', {}).get('product', {}).get('name', '').lower()
-                for panel in panels
-            )
-            
-            if not has_swing_doors:
-                return {'success': False, 'error': 'Plan views require at least one swing door'}
-            
-            # Calculate dimensions
-            total_width = sum(panel.get('width', 0) for panel in panels)
-            depth = 6  # Standard door depth
-            
-            # Create figure
-            fig, ax = plt.subplots(figsize=(12, 8))
-            ax.set_xlim(0, total_width + 20)
-            ax.set_ylim(0, depth + 20)
-            ax.set_aspect('equal')
-            
-            # Draw panels
-            x_offset = 10
-            
-            for panel in panels:
-                panel_width = panel.get('width', 0)
-                panel_type = panel.get('componentInstance', {}).get('product', {}).get('name', 'Unknown')
-                direction = panel.get('direction', '-')
-                
-                # Draw panel frame (top view)
-                frame_rect = patches.Rectangle(
-                    (x_offset, 10), panel_width, depth,
-                    linewidth=2, edgecolor='black', facecolor='lightblue', alpha=0.3
-                )
-                ax.add_patch(frame_rect)
-                
-                # Draw door swing if it's a swing door
-                if 'swing' in panel_type.lower() or 'door' in panel_type.lower():
-                    # Determine swing direction and draw arc
-                    if 'left' in direction.lower():
-                        # Left swing
-                        arc_center = (x_offset, 10 + depth)
-                        swing_arc = patches.Arc(arc_center, panel_width * 2, panel_width * 2, 
-                                              angle=0, theta1=270, theta2=360, 
-                                              linewidth=1.5, color='red', linestyle='--')
-                        ax.add_patch(swing_arc)
-                        
-                        # Draw door in open position
-                        door_line = plt.Line2D([x_offset, x_offset + panel_width], 
-                                             [10 + depth, 10 + depth], 
-                                             linewidth=2, color='red')
-                        ax.add_line(door_line)
-                        
-                    elif 'right' in direction.lower():
-                        # Right swing
-                        arc_center = (x_offset + panel_width, 10 + depth)
-                        swing_arc = patches.Arc(arc_center, panel_width * 2, panel_width * 2, 
-                                              angle=0, theta1=180, theta2=270, 
-                                              linewidth=1.5, color='red', linestyle='--')
-                        ax.add_patch(swing_arc)
-                        
-                        # Draw door in open position
-                        door_line = plt.Line2D([x_offset + panel_width, x_offset], 
-                                             [10 + depth, 10 + depth], 
-                                             linewidth=2, color='red')
-                        ax.add_line(door_line)
-                
-                x_offset += panel_width
-            
-            # Add dimensions
-            ax.annotate(f'{total_width}"', 
-                       xy=(10 + total_width/2, 5), 
-                       ha='center', va='top', fontsize=12, weight='bold')
-            
-            # Style the plot
-            ax.set_title('Plan View', fontsize=16, weight='bold', pad=20)
-            ax.axis('off')
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight', dpi=150, facecolor='white')
-            plt.close()
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            return {
-                'success': True,
-                'plan_image': image_base64
-            }
-            
-        except Exception as e:
-            return {'success': False, 'error': f'Failed to generate plan: {str(e)}'}
\ No newline at end of file
+            return await asyncio.get_running_loop().run_in_executor(pool, renderer, opening_data, True)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory): the pool is unusable. Start a new one on a
+            # thread, so the loop keeps answering (and refusing) requests while the workers start
+            if self.pool is pool and self.restarting is None:
+                self.restarting = asyncio.ensure_future(asyncio.to_thread(self.replace_pool, pool))
+                self.restarting.add_done_callback(self.restarted)
+            return {'success': False, 'error': 'Drawing worker exited unexpectedly'}
+
+    def restarted(self, task):
+        self.restarting = None
+        if not task.cancelled() and task.exception() is not None:
+            log.error('Could not restart the drawing workers: %s', task.exception())
+
+    async def send(self, writer, status, result, keep_alive, headers=(), accept_encoding=None, accept=None):
+        if accepts_gzip(accept_encoding) and not accepts_multipart(accept):
+            # zlib releases the GIL, so compressing a large image off the loop keeps other requests moving
+            body, encoding = await asyncio.to_thread(encode_json, result, accept_encoding)
+        else:
+            body, encoding = encode_response(result, accept)
+        head = response_head(status, [('Content-Length', len(body)), *encoding, *headers], keep_alive)
+        writer.write(head + body)
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HttpError as e:
+                    await self.send(writer, e.status, {'success': False, 'error': str(e)}, keep_alive=False)
+                    break
+                if request is None or not await self.respond(writer, *request):
+                    break
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def busy(self, writer, keep_alive):
+        self.metrics['rejected'] += 1
+        await self.send(writer, 503, {'success': False, 'error': 'Drawing service busy, retry later'}, keep_alive,
+                        [('Retry-After', self.retry_after)])
+        return keep_alive
+
+    async def respond(self, writer, method, path, headers, body, keep_alive):
+        """Answer one request; returns whether the connection stays open"""
+        if method == 'GET' and path == '/metrics':
+            await self.send(writer, 200, dict(self.metrics, success=True, inFlight=len(self.in_flight),
+                                              queued=self.pending, workers=self.workers, queueSize=self.queue_size),
+                            keep_alive)
+            return keep_alive
+        if method == 'OPTIONS':
+            writer.write(response_head(200, [('Content-Length', 0)], keep_alive))
+            await writer.drain()
+            return keep_alive
+        if method != 'POST':
+            await self.send(writer, 405, {'success': False, 'error': f'{method} not allowed'}, keep_alive,
+                            [('Allow', 'POST, OPTIONS')])
+            return keep_alive
+        try:
+            data = json.loads(body.decode('utf-8'))
+            if not isinstance(data, dict):
+                raise ValueError('request must be a JSON object')
+        except ValueError as e:
+            await self.send(writer, 400, {'success': False, 'error': f'Invalid JSON: {e}'}, keep_alive)
+            return keep_alive
+
+        drawing_type = data.get('type', 'elevation')
+        renderer = RENDERERS.get(drawing_type)
+        if renderer is None and drawing_type != 'batch':
+            await self.send(writer, 200, {'success': False, 'error': 'Invalid drawing type'}, keep_alive)
+            return keep_alive
+        if drawing_type == 'batch':
+            if not self.admit():
+                return await self.busy(writer, keep_alive)
+            try:
+                await self.stream_batch(writer, data.get('jobs') or [], keep_alive, headers.get('accept-encoding'))
+            finally:
+                self.pending -= 1
+            return keep_alive
+        opening_data = data.get('data', {})
+        etag = drawing_etag(drawing_type, opening_data, accepts_multipart(headers.get('accept')))
+        if etag_matches(headers.get('if-none-match'), etag):
+            self.metrics['notModified'] += 1
+            writer.write(response_head(304, [('ETag', etag)], keep_alive))
+            await writer.drain()
+            return keep_alive
+        result = await self.render_shared(drawing_type, renderer, opening_data)
+        if result is None:
+            return await self.busy(writer, keep_alive)
+        await self.send(writer, 200, result, keep_alive, [('ETag', etag)] if result.get('success') else [],
+                        headers.get('accept-encoding'), headers.get('accept'))
+        return keep_alive
+
+    async def render_job(self, index, job, extra_place):
+        """(index, extra_place, tagged result) of one batch job; gives back the extra place it took"""
+        job_type = job.get('type', 'elevation')
+        renderer = RENDERERS.get(job_type)
+        try:
+            if renderer is None:
+                result = {'success': False, 'error': f'Unsupported batch job type: {job_type}'}
+            else:
+                result = await self.render_shared(job_type, renderer, job.get('data', {}), queued=False)
+        finally:
+            if extra_place:
+                self.pending -= 1
+        return index, extra_place, dict(result, openingId=job.get('openingId'), type=job_type)
+
+    async def stream_batch(self, writer, jobs, keep_alive, accept_encoding=None):
+        """handler.stream_batch over chunked transfer encoding, one JSON line per chunk, as jobs finish"""
+        stream = LineStream(accepts_gzip(accept_encoding))
+        head = [('Content-Type', 'application/x-ndjson'), ('Transfer-Encoding', 'chunked'), ('Vary', 'Accept-Encoding')]
+        if stream.compressor is not None:
+            head.append(('Content-Encoding', 'gzip'))
+        writer.write(response_head(200, head, keep_alive))
+
+        def write_chunk(data):
+            if data:
+                writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+        async def write_line(result):
+            write_chunk(stream.line(result))
+            await writer.drain()
+
+        failed = 0
+        waiting = list(enumerate(jobs))[::-1]
+        running = set()
+        own_place_free = True
+        while waiting or running:
+            # The batch's own place renders one job at a time; more start while workers are idle,
+            # so a batch uses a free pool without filling the queue that single requests wait in
+            while waiting:
+                if own_place_free:
+                    own_place_free = extra_place = False
+                elif self.admit(limit=self.workers):
+                    extra_place = True
+                else:
+                    break
+                index, job = waiting.pop()
+                running.add(asyncio.ensure_future(self.render_job(index, job, extra_place)))
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, extra_place, result = task.result()
+                own_place_free = own_place_free or not extra_place
+                if not result.get('success'):
+                    failed += 1
+                await write_line(dict(result, index=index))
+
+        await write_line({'type': 'batch_complete', 'success': failed == 0, 'completed': len(jobs), 'failed': failed})
+        write_chunk(stream.end())
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def serve(self, host, port):
+        """Accept connections until SIGINT or SIGTERM"""
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        port = server.sockets[0].getsockname()[1]
+        print(f'Serving drawings on http://{host}:{port} ({self.workers} workers, queue {self.queue_size})',
+              file=sys.stderr, flush=True)
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        async with server:
+            await stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the drawing API with rendering in a process pool')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help='0 picks a free port (printed on startup)')
+    parser.add_argument('--workers', type=int, default=None, help='Rendering processes (default: CPU count)')
+    parser.add_argument('--queue', type=int, default=None,
+                        help='Renders that may wait for a free worker before requests get 503 (default: 2 per worker)')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 503')
+    parser.add_argument('--no-coalesce', action='store_true',
+                        help='Render every request, even when the same drawing is already being rendered')
+    args = parser.parse_args(argv)
+
+    server = DrawingServer(args.workers, args.queue, args.retry_after, coalesce=not args.no_coalesce)
+    server.start_pool()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    finally:
+        server.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+    main()
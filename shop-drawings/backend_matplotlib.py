@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Matplotlib backend for drawing_ir.Drawing.
+
+render() adds the primitives of a Drawing to an Axes. Consecutive rectangles or lines of one
+z-order that share a line style are batched into a single PolyCollection / LineCollection, so a
+drawing costs a few dozen artists instead of one per stroke; batches never reorder primitives
+within a z-order level, so the paint order (and the image) stays the same as drawing one
+artist per primitive.
+"""
+
+import math
+import matplotlib.lines as mlines
+import matplotlib.patches as patches
+import matplotlib.transforms as mtransforms
+from matplotlib.collections import LineCollection, PolyCollection
+
+
+def _rect_vertices(rect):
+    """Corners in patches.Rectangle order (so dashed outlines start at the same corner), rotated about (x, y)"""
+    corners = [(0, 0), (rect.width, 0), (rect.width, rect.height), (0, rect.height)]
+    if rect.angle:
+        cos_a = math.cos(math.radians(rect.angle))
+        sin_a = math.sin(math.radians(rect.angle))
+        corners = [(cx * cos_a - cy * sin_a, cx * sin_a + cy * cos_a) for cx, cy in corners]
+    return [(rect.x + cx, rect.y + cy) for cx, cy in corners]
+
+def _line_capstyle(linestyle):
+    # Line2D defaults: projecting caps on solid lines, butt caps on dashed ones
+    return 'projecting' if linestyle in ('-', 'solid') else 'butt'
+
+def _batches(primitives):
+    """
+    Group primitives into draw batches, in order of each batch's first primitive.
+    A rectangle or line joins the open batch of its z-order when that batch has the same kind and
+    line style; anything else in the same z-order closes the batch, so nothing drawn in between
+    ends up painted in a different order.
+    """
+    batches = []
+    open_batch = {}  # zorder -> (key, batch)
+    for primitive in primitives:
+        zorder = primitive.zorder
+        key = None
+        if primitive.kind in ('rect', 'line'):
+            key = (primitive.kind, primitive.linestyle)
+        current = open_batch.get(zorder)
+        if key is not None and current is not None and current[0] == key:
+            current[1].append(primitive)
+            continue
+        batch = [primitive]
+        batches.append(batch)
+        open_batch[zorder] = (key, batch)
+    return batches
+
+def _add_rect(ax, rect):
+    patch = patches.Rectangle((0, 0) if rect.angle else (rect.x, rect.y), rect.width, rect.height,
+                              edgecolor=rect.edgecolor, facecolor=rect.facecolor, linewidth=rect.linewidth,
+                              linestyle=rect.linestyle, zorder=rect.zorder)
+    if rect.angle:
+        # Rotate about the anchor corner like the original door leaf transform
+        transform = mtransforms.Affine2D().rotate_deg_around(0, 0, rect.angle).translate(rect.x, rect.y)
+        patch.set_transform(transform + ax.transData)
+    ax.add_patch(patch)
+    return patch
+
+def _add_line(ax, line):
+    artist = mlines.Line2D([line.x0, line.x1], [line.y0, line.y1], color=line.color, linewidth=line.linewidth,
+                           linestyle=line.linestyle, zorder=line.zorder)
+    ax.add_line(artist)
+    return artist
+
+def _add_rect_collection(ax, rects):
+    first = rects[0]
+    collection = PolyCollection([_rect_vertices(rect) for rect in rects], closed=True,
+                                edgecolors=[rect.edgecolor for rect in rects],
+                                facecolors=[rect.facecolor for rect in rects],
+                                linewidths=[rect.linewidth for rect in rects],
+                                linestyle=first.linestyle, joinstyle='miter', zorder=first.zorder)
+    ax.add_collection(collection, autolim=False)
+    return collection
+
+def _add_line_collection(ax, lines):
+    first = lines[0]
+    collection = LineCollection([((line.x0, line.y0), (line.x1, line.y1)) for line in lines],
+                                colors=[line.color for line in lines],
+                                linewidths=[line.linewidth for line in lines],
+                                linestyle=first.linestyle, capstyle=_line_capstyle(first.linestyle),
+                                joinstyle='round', zorder=first.zorder)
+    ax.add_collection(collection, autolim=False)
+    return collection
+
+def _add_primitive(ax, primitive):
+    kind = primitive.kind
+    if kind == 'rect':
+        return _add_rect(ax, primitive)
+    if kind == 'line':
+        return _add_line(ax, primitive)
+    if kind == 'circle':
+        patch = patches.Circle((primitive.x, primitive.y), primitive.radius, edgecolor=primitive.edgecolor,
+                               facecolor=primitive.facecolor, linewidth=primitive.linewidth, zorder=primitive.zorder)
+        return ax.add_patch(patch)
+    if kind == 'arc':
+        diameter = 2 * primitive.radius
+        patch = patches.Arc((primitive.x, primitive.y), diameter, diameter, angle=0, theta1=primitive.theta1,
+                            theta2=primitive.theta2, color=primitive.color, linewidth=primitive.linewidth,
+                            zorder=primitive.zorder)
+        return ax.add_patch(patch)
+    if kind == 'text':
+        return ax.text(primitive.x, primitive.y, primitive.text, ha=primitive.ha, va=primitive.va,
+                       fontsize=primitive.fontsize, fontweight=primitive.fontweight, color=primitive.color,
+                       rotation=primitive.rotation, zorder=primitive.zorder)
+    if kind == 'arrow':
+        arrowprops = dict(arrowstyle=primitive.style, lw=primitive.linewidth)
+        if primitive.color is not None:
+            arrowprops['color'] = primitive.color
+        extra = {} if primitive.clip else {'annotation_clip': False}
+        return ax.annotate('', xy=(primitive.x1, primitive.y1), xytext=(primitive.x0, primitive.y0),
+                           arrowprops=arrowprops, zorder=primitive.zorder, **extra)
+    raise ValueError(f"Unknown primitive kind: {kind}")
+
+def render(drawing, ax, batch=True):
+    """
+    Add the primitives of drawing to ax and return the added artists.
+    batch=False draws one artist per primitive (the pre-IR behavior, kept for benchmarks).
+    View limits and aspect are left to the caller, see drawing_generator.draw_layout.
+    """
+    if not batch:
+        return [_add_primitive(ax, primitive) for primitive in drawing]
+    artists = []
+    for group in _batches(drawing.primitives):
+        if len(group) == 1:
+            artists.append(_add_primitive(ax, group[0]))
+        elif group[0].kind == 'rect':
+            artists.append(_add_rect_collection(ax, group))
+        else:
+            artists.append(_add_line_collection(ax, group))
+    return artists
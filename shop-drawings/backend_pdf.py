@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+PDF backend for drawing_ir.Drawing.
+
+render() paints the primitives of a Drawing into a box of a pdf_writer.PdfPage as PDF path
+and text operators, without matplotlib. The drawing's extent is fitted and centered in the
+box, and line widths and font sizes shrink with the geometry relative to the drawing's native
+figure, as scale_artists() does for drawings placed into a page Axes. Primitives are
+painted in z-order, keeping their order within a level; consecutive lines, rectangles or
+arrows of one style are joined into a single path, as in the SVG backend.
+"""
+
+import math
+from backend_svg import ARROW_HEAD_HALF_WIDTH, ARROW_HEAD_LENGTH, ARROW_SHRINK, DASH_PATTERNS
+from pdf_writer import num
+
+
+class _Canvas:
+    """Maps drawing units into the box on the page and joins same-style strokes into one path"""
+
+    def __init__(self, drawing, page, x, y, width, height):
+        x0, y0, x1, y1 = drawing.extent()
+        self.page = page
+        self.scale = min(width / ((x1 - x0) or 1), height / ((y1 - y0) or 1))
+        # The standalone figure's tight layout fits the whole extent into its figsize, so text and
+        # lines are scaled relative to that fit
+        native_width, native_height = [size * 72 for size in (drawing.figsize or (8, 6))]
+        self.artist_scale = self.scale / min(native_width / ((x1 - x0) or 1), native_height / ((y1 - y0) or 1))
+        # Center the extent in the box
+        self.dx = x + (width - (x1 - x0) * self.scale) / 2 - x0 * self.scale
+        self.dy = y + (height - (y1 - y0) * self.scale) / 2 - y0 * self.scale
+        self.open_path = None  # (style, [path operators]) of the shapes being joined
+
+    def point(self, x, y):
+        return x * self.scale + self.dx, y * self.scale + self.dy
+
+    def style(self, fill=None, stroke=None, linewidth=1.0, linestyle='-', cap='butt', join='miter'):
+        linewidth = linewidth * self.artist_scale
+        pattern = DASH_PATTERNS.get(linestyle)
+        dash = tuple(d * linewidth for d in pattern) if pattern else None
+        return (fill, stroke, linewidth, dash, cap, join)
+
+    def add(self, style, commands):
+        self.close_path()
+        self.paint(style, commands)
+
+    def add_segment(self, style, commands):
+        if self.open_path is not None and self.open_path[0] != style:
+            self.close_path()
+        if self.open_path is None:
+            self.open_path = (style, [])
+        self.open_path[1].append(commands)
+
+    def close_path(self):
+        if self.open_path is not None:
+            style, commands = self.open_path
+            self.paint(style, ' '.join(commands))
+            self.open_path = None
+
+    def paint(self, style, commands):
+        fill, stroke, linewidth, dash, cap, join = style
+        self.page.path(commands, fill=fill, stroke=stroke, linewidth=linewidth, dash=dash, cap=cap, join=join)
+
+
+def _polygon(canvas, corners):
+    points = [canvas.point(x, y) for x, y in corners]
+    commands = [f'{num(points[0][0])} {num(points[0][1])} m']
+    commands += [f'{num(px)} {num(py)} l' for px, py in points[1:]]
+    return ' '.join(commands) + ' h'
+
+def _rect(canvas, rect):
+    # Corners in patches.Rectangle order, so dashed outlines start at the same corner
+    corners = [(0, 0), (rect.width, 0), (rect.width, rect.height), (0, rect.height)]
+    if rect.angle:
+        cos_a = math.cos(math.radians(rect.angle))
+        sin_a = math.sin(math.radians(rect.angle))
+        corners = [(cx * cos_a - cy * sin_a, cx * sin_a + cy * cos_a) for cx, cy in corners]
+    corners = [(rect.x + cx, rect.y + cy) for cx, cy in corners]
+    style = canvas.style(rect.facecolor, rect.edgecolor, rect.linewidth, rect.linestyle, join='miter')
+    canvas.add_segment(style, _polygon(canvas, corners))
+
+def _line(canvas, line):
+    x0, y0 = canvas.point(line.x0, line.y0)
+    x1, y1 = canvas.point(line.x1, line.y1)
+    # Line2D look: square caps on solid lines, butt caps on dashed ones
+    cap = 'butt' if line.linestyle in DASH_PATTERNS else 'projecting'
+    style = canvas.style(None, line.color, line.linewidth, line.linestyle, cap=cap, join='round')
+    canvas.add_segment(style, f'{num(x0)} {num(y0)} m {num(x1)} {num(y1)} l')
+
+def _arc_commands(canvas, x, y, radius, theta1, theta2):
+    """Bézier curves along the arc, one per quarter circle at most (counter-clockwise)"""
+    if theta2 <= theta1:
+        theta2 += 360
+    steps = max(1, math.ceil((theta2 - theta1) / 90))
+    step = math.radians(theta2 - theta1) / steps
+    kappa = 4 / 3 * math.tan(step / 4)
+    angle = math.radians(theta1)
+    start_x, start_y = canvas.point(x + radius * math.cos(angle), y + radius * math.sin(angle))
+    commands = [f'{num(start_x)} {num(start_y)} m']
+    for _ in range(steps):
+        end = angle + step
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        cos_b, sin_b = math.cos(end), math.sin(end)
+        control = [
+            (x + radius * (cos_a - kappa * sin_a), y + radius * (sin_a + kappa * cos_a)),
+            (x + radius * (cos_b + kappa * sin_b), y + radius * (sin_b - kappa * cos_b)),
+            (x + radius * cos_b, y + radius * sin_b),
+        ]
+        commands.append(' '.join(f'{num(px)} {num(py)}' for px, py in (canvas.point(*p) for p in control)) + ' c')
+        angle = end
+    return ' '.join(commands)
+
+def _circle(canvas, circle):
+    commands = _arc_commands(canvas, circle.x, circle.y, circle.radius, 0, 360) + ' h'
+    canvas.add(canvas.style(circle.facecolor, circle.edgecolor, circle.linewidth), commands)
+
+def _arc(canvas, arc):
+    commands = _arc_commands(canvas, arc.x, arc.y, arc.radius, arc.theta1, arc.theta2)
+    canvas.add(canvas.style(None, arc.color, arc.linewidth), commands)
+
+def _arrow_head(tip_x, tip_y, ux, uy):
+    """Open V head at tip for a shaft running along unit vector (ux, uy) into the tip"""
+    back_x = tip_x - ux * ARROW_HEAD_LENGTH
+    back_y = tip_y - uy * ARROW_HEAD_LENGTH
+    nx, ny = -uy * ARROW_HEAD_HALF_WIDTH, ux * ARROW_HEAD_HALF_WIDTH
+    return (f' {num(back_x + nx)} {num(back_y + ny)} m {num(tip_x)} {num(tip_y)} l'
+            f' {num(back_x - nx)} {num(back_y - ny)} l')
+
+def _arrow(canvas, arrow):
+    # Heads and the shrink at both ends are in points, as in matplotlib, and do not scale
+    x0, y0 = canvas.point(arrow.x0, arrow.y0)
+    x1, y1 = canvas.point(arrow.x1, arrow.y1)
+    length = math.hypot(x1 - x0, y1 - y0)
+    if length <= 2 * ARROW_SHRINK:
+        return
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+    x0, y0 = x0 + ux * ARROW_SHRINK, y0 + uy * ARROW_SHRINK
+    x1, y1 = x1 - ux * ARROW_SHRINK, y1 - uy * ARROW_SHRINK
+    commands = f'{num(x0)} {num(y0)} m {num(x1)} {num(y1)} l' + _arrow_head(x1, y1, ux, uy)
+    if arrow.style.startswith('<'):
+        commands += _arrow_head(x0, y0, -ux, -uy)
+    style = canvas.style(None, arrow.color or 'black', arrow.linewidth, join='round')
+    canvas.add_segment(style, commands)
+
+def _text(canvas, text):
+    canvas.close_path()
+    x, y = canvas.point(text.x, text.y)
+    canvas.page.text(x, y, text.text, size=text.fontsize * canvas.artist_scale,
+                     bold=text.fontweight not in ('normal', 400), color=text.color,
+                     ha=text.ha, va=text.va, rotation=text.rotation)
+
+EMITTERS = {
+    'rect': _rect,
+    'line': _line,
+    'circle': _circle,
+    'arc': _arc,
+    'text': _text,
+    'arrow': _arrow,
+}
+
+def render(drawing, page, x, y, width, height):
+    """Paint drawing into the box (x, y, width, height) of page, clipped to the box"""
+    canvas = _Canvas(drawing, page, x, y, width, height)
+    page.save()
+    page.clip(x, y, width, height)
+    # Same paint order as matplotlib: by z-order, stable within a level
+    for primitive in sorted(drawing.primitives, key=lambda primitive: primitive.zorder):
+        EMITTERS[primitive.kind](canvas, primitive)
+    canvas.close_path()
+    page.restore()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+SVG backend for drawing_ir.Drawing.
+
+Writes SVG markup straight from the primitives, without matplotlib: one user unit is one
+point, so line widths and font sizes carry over unchanged. Drawing units (inches) are scaled
+so the drawing's view fills its native figure size, as in the matplotlib figure, and the
+canvas covers the drawing's bounds so labels outside the view are kept. Primitives are
+painted in z-order, keeping their order within a level; consecutive lines, rectangles or
+arrows of one style are joined into a single <path> to keep the output small.
+"""
+
+import math
+from html import escape
+
+# Dash patterns of matplotlib's line styles, in multiples of the line width
+DASH_PATTERNS = {
+    '--': (3.7, 1.6),
+    'dashed': (3.7, 1.6),
+    ':': (1, 1.65),
+    'dotted': (1, 1.65),
+    '-.': (6.4, 1.6, 1, 1.6),
+    'dashdot': (6.4, 1.6, 1, 1.6),
+}
+
+# Arrow heads of matplotlib's '->' style at the default annotation size (points)
+ARROW_HEAD_LENGTH = 4
+ARROW_HEAD_HALF_WIDTH = 2
+ARROW_SHRINK = 2  # annotate() stops arrows 2 points short of both end points
+
+TEXT_ANCHORS = {'left': 'start', 'center': 'middle', 'right': 'end'}
+TEXT_BASELINES = {'top': 'text-before-edge', 'center': 'central', 'center_baseline': 'central',
+                  'bottom': 'text-after-edge', 'baseline': 'alphabetic'}
+FONT_FAMILY = 'DejaVu Sans, Arial, Helvetica, sans-serif'
+
+
+def _num(value):
+    """Compact number formatting: 2 decimals, no trailing zeros"""
+    text = f'{value:.2f}'.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+def _color(color):
+    return 'none' if color in (None, 'none') else color
+
+def _stroke(color, linewidth, linestyle='-', linecap=None, linejoin=None):
+    """Stroke attributes; nothing is stroked for color 'none' or a zero width"""
+    if _color(color) == 'none' or not linewidth:
+        return ' stroke="none"'
+    attrs = f' stroke="{color}" stroke-width="{_num(linewidth)}"'
+    pattern = DASH_PATTERNS.get(linestyle)
+    if pattern:
+        attrs += ' stroke-dasharray="' + ','.join(_num(d * linewidth) for d in pattern) + '"'
+    if linecap:
+        attrs += f' stroke-linecap="{linecap}"'
+    if linejoin:
+        attrs += f' stroke-linejoin="{linejoin}"'
+    return attrs
+
+
+class _Canvas:
+    """Maps drawing units to SVG points (y pointing down) and collects elements"""
+
+    def __init__(self, drawing):
+        x0, y0, x1, y1 = drawing.extent()
+        xlim = drawing.xlim or (x0, x1)
+        ylim = drawing.ylim or (y0, y1)
+        width_pt, height_pt = [size * 72 for size in (drawing.figsize or (8, 6))]
+        self.scale = min(width_pt / ((xlim[1] - xlim[0]) or 1), height_pt / ((ylim[1] - ylim[0]) or 1))
+        self.x0 = x0
+        self.y1 = y1
+        self.width = (x1 - x0) * self.scale
+        self.height = (y1 - y0) * self.scale
+        self.elements = []
+        self.open_path = None  # (style attributes, [path commands]) of the shapes being joined
+
+    def point(self, x, y):
+        return (x - self.x0) * self.scale, (self.y1 - y) * self.scale
+
+    def add(self, element):
+        self.close_path()
+        self.elements.append(element)
+
+    def add_segment(self, style, commands):
+        if self.open_path is not None and self.open_path[0] != style:
+            self.close_path()
+        if self.open_path is None:
+            self.open_path = (style, [])
+        self.open_path[1].append(commands)
+
+    def close_path(self):
+        if self.open_path is not None:
+            style, commands = self.open_path
+            self.elements.append(f'<path d="{"".join(commands)}"{style}/>')
+            self.open_path = None
+
+
+def _rect(canvas, rect):
+    # Anchor corner in SVG coordinates; the rectangle extends right and up from it in the drawing
+    ax, ay = canvas.point(rect.x, rect.y)
+    width = rect.width * canvas.scale
+    height = rect.height * canvas.scale
+    style = f' fill="{_color(rect.facecolor)}"' + _stroke(rect.edgecolor, rect.linewidth, rect.linestyle, linejoin='miter')
+    if rect.angle:
+        # Counter-clockwise in the drawing is a negative rotation once y points down
+        canvas.add(f'<rect x="{_num(ax)}" y="{_num(ay - height)}" width="{_num(width)}" height="{_num(height)}"{style}'
+                   f' transform="rotate({_num(-rect.angle)} {_num(ax)} {_num(ay)})"/>')
+        return
+    # Outline in patches.Rectangle order, so dashes start at the same corner
+    canvas.add_segment(style, f'M{_num(ax)} {_num(ay)}h{_num(width)}v{_num(-height)}h{_num(-width)}z')
+
+def _line(canvas, line):
+    x0, y0 = canvas.point(line.x0, line.y0)
+    x1, y1 = canvas.point(line.x1, line.y1)
+    # Line2D look: square caps on solid lines, butt caps on dashed ones
+    linecap = 'butt' if line.linestyle in DASH_PATTERNS else 'square'
+    style = _stroke(line.color, line.linewidth, line.linestyle, linecap=linecap, linejoin='round')
+    canvas.add_segment(' fill="none"' + style, f'M{_num(x0)} {_num(y0)}L{_num(x1)} {_num(y1)}')
+
+def _circle(canvas, circle):
+    cx, cy = canvas.point(circle.x, circle.y)
+    canvas.add(f'<circle cx="{_num(cx)}" cy="{_num(cy)}" r="{_num(circle.radius * canvas.scale)}"'
+               f' fill="{_color(circle.facecolor)}"' + _stroke(circle.edgecolor, circle.linewidth) + '/>')
+
+def _arc(canvas, arc):
+    radius = arc.radius * canvas.scale
+    start = math.radians(arc.theta1)
+    end = math.radians(arc.theta2)
+    x0, y0 = canvas.point(arc.x + arc.radius * math.cos(start), arc.y + arc.radius * math.sin(start))
+    x1, y1 = canvas.point(arc.x + arc.radius * math.cos(end), arc.y + arc.radius * math.sin(end))
+    large_arc = 1 if (arc.theta2 - arc.theta1) % 360 > 180 else 0
+    # Counter-clockwise in the drawing is sweep-flag 0 once y points down
+    canvas.add(f'<path d="M{_num(x0)} {_num(y0)}A{_num(radius)} {_num(radius)} 0 {large_arc} 0 {_num(x1)} {_num(y1)}"'
+               f' fill="none"' + _stroke(arc.color, arc.linewidth) + '/>')
+
+def _arrow_head(tip_x, tip_y, ux, uy):
+    """Open V head at tip for a shaft running along unit vector (ux, uy) into the tip"""
+    back_x = tip_x - ux * ARROW_HEAD_LENGTH
+    back_y = tip_y - uy * ARROW_HEAD_LENGTH
+    nx, ny = -uy * ARROW_HEAD_HALF_WIDTH, ux * ARROW_HEAD_HALF_WIDTH
+    return (f'M{_num(back_x + nx)} {_num(back_y + ny)}L{_num(tip_x)} {_num(tip_y)}'
+            f'L{_num(back_x - nx)} {_num(back_y - ny)}')
+
+def _arrow(canvas, arrow):
+    x0, y0 = canvas.point(arrow.x0, arrow.y0)
+    x1, y1 = canvas.point(arrow.x1, arrow.y1)
+    length = math.hypot(x1 - x0, y1 - y0)
+    if length <= 2 * ARROW_SHRINK:
+        return
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+    x0, y0 = x0 + ux * ARROW_SHRINK, y0 + uy * ARROW_SHRINK
+    x1, y1 = x1 - ux * ARROW_SHRINK, y1 - uy * ARROW_SHRINK
+    commands = f'M{_num(x0)} {_num(y0)}L{_num(x1)} {_num(y1)}' + _arrow_head(x1, y1, ux, uy)
+    if arrow.style.startswith('<'):
+        commands += _arrow_head(x0, y0, -ux, -uy)
+    style = ' fill="none"' + _stroke(arrow.color or 'black', arrow.linewidth, linecap='butt', linejoin='round')
+    canvas.add_segment(style, commands)
+
+def _text(canvas, text):
+    x, y = canvas.point(text.x, text.y)
+    anchor = TEXT_ANCHORS.get(text.ha, 'start')
+    baseline = TEXT_BASELINES.get(text.va, 'alphabetic')
+    if text.rotation == 90:
+        # matplotlib aligns the rotated box: ha picks the text's top or bottom edge, va its start or end
+        anchor = {'bottom': 'start', 'baseline': 'start', 'top': 'end'}.get(text.va, 'middle')
+        baseline = {'left': 'text-before-edge', 'right': 'text-after-edge'}.get(text.ha, 'central')
+    attrs = (f' x="{_num(x)}" y="{_num(y)}" font-size="{_num(text.fontsize)}"'
+             f' text-anchor="{anchor}" dominant-baseline="{baseline}"')
+    if text.fontweight not in ('normal', 400):
+        attrs += f' font-weight="{text.fontweight}"'
+    if _color(text.color) != 'black':
+        attrs += f' fill="{text.color}"'
+    if text.rotation:
+        attrs += f' transform="rotate({_num(-text.rotation)} {_num(x)} {_num(y)})"'
+    canvas.add(f'<text{attrs}>{escape(str(text.text), quote=False)}</text>')
+
+EMITTERS = {
+    'rect': _rect,
+    'line': _line,
+    'circle': _circle,
+    'arc': _arc,
+    'text': _text,
+    'arrow': _arrow,
+}
+
+def render(drawing):
+    """Return the SVG document (str) for drawing"""
+    canvas = _Canvas(drawing)
+    # Same paint order as matplotlib: by z-order, stable within a level
+    for primitive in sorted(drawing.primitives, key=lambda primitive: primitive.zorder):
+        EMITTERS[primitive.kind](canvas, primitive)
+    canvas.close_path()
+    width = _num(canvas.width)
+    height = _num(canvas.height)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}pt" height="{height}pt"'
+            f' viewBox="0 0 {width} {height}" font-family="{FONT_FAMILY}">'
+            f'<rect width="100%" height="100%" fill="white"/>'
+            + ''.join(canvas.elements) + '</svg>')
@@ -0,0 +1,788 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the shop drawing service
+
+Usage:
+    python benchmark.py --list
+    python benchmark.py <name> [--openings N] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from fixtures import (
+    BOM_FORMULAS, HERE, STARTUP_BUDGET_SECONDS, make_bom_heavy_project, make_option_heavy_project,
+    make_sample_opening, make_sample_project, post_requests, server_metrics, start_api_server, startup_time,
+)
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under a command line name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_call(func, repeat=1):
+    """Return the best wall-clock time in seconds over `repeat` calls"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@benchmark('package-drawing-mode')
+def bench_package_drawing_mode(args):
+    """Complete package with in-process drawings vs one python3 subprocess per drawing"""
+    from package_generator import generate_complete_package
+
+    project = make_sample_project(args.openings)
+    in_process = time_call(lambda: generate_complete_package(project), args.repeat)
+    isolated = time_call(lambda: generate_complete_package(project, isolate_drawings=True), args.repeat)
+
+    print(f"Openings: {args.openings}")
+    print(f"  in-process drawings: {in_process:8.2f}s")
+    print(f"  subprocess drawings: {isolated:8.2f}s")
+    print(f"  speedup:             {isolated / in_process:8.2f}x")
+
+
+@benchmark('worker-latency')
+def bench_worker_latency(args):
+    """Single elevation drawing: fresh python3 per request vs warm --serve worker"""
+    import statistics
+    import subprocess
+
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'drawing_generator.py')
+    request = {'type': 'elevation', 'data': make_sample_opening(0)}
+    requests = max(args.repeat, 5)
+
+    cold_times = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        subprocess.run(['python3', script_path], input=json.dumps(request), capture_output=True, text=True)
+        cold_times.append(time.perf_counter() - start)
+
+    worker = subprocess.Popen(['python3', script_path, '--serve'], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    warm_times = []
+    for i in range(requests):
+        start = time.perf_counter()
+        worker.stdin.write(json.dumps(dict(request, id=i)) + '\n')
+        worker.stdin.flush()
+        worker.stdout.readline()
+        warm_times.append(time.perf_counter() - start)
+    worker.stdin.close()
+    worker.wait()
+
+    print(f"Requests: {requests}")
+    print(f"  cold subprocess p50: {statistics.median(cold_times) * 1000:8.1f}ms")
+    print(f"  warm worker p50:     {statistics.median(warm_times) * 1000:8.1f}ms")
+
+
+@benchmark('package-parallel')
+def bench_package_parallel(args):
+    """Complete package rendered serially vs opening pages in a process pool"""
+    from package_generator import generate_complete_package
+
+    workers = args.workers or os.cpu_count()
+    project = make_sample_project(args.openings)
+    serial = time_call(lambda: generate_complete_package(project), args.repeat)
+    parallel = time_call(lambda: generate_complete_package(project, parallel=True, workers=workers), args.repeat)
+
+    print(f"Openings: {args.openings}, workers: {workers}")
+    print(f"  serial:   {serial:8.2f}s")
+    print(f"  parallel: {parallel:8.2f}s")
+    print(f"  speedup:  {serial / parallel:8.2f}x")
+
+
+@benchmark('page-composition')
+def bench_page_composition(args):
+    """Shop drawing pages drawn as vectors into the page vs embedded 300-dpi PNGs: time per page and PDF size"""
+    import base64
+    from package_generator import generate_complete_package
+
+    project = make_sample_project(args.openings)
+    results = {}
+    for label, vector in (('vector', True), ('raster', False)):
+        output = {}
+        elapsed = time_call(lambda: output.update(generate_complete_package(project, vector=vector)), args.repeat)
+        results[label] = (elapsed, len(base64.b64decode(output['pdf_data'])))
+
+    print(f"Openings: {args.openings} (plus BOM and quote pages)")
+    for label, (elapsed, size) in results.items():
+        print(f"  {label}: {elapsed / args.openings * 1000:8.1f}ms/page  {size / 1024:10.1f}KB")
+
+
+@benchmark('render-cache')
+def bench_render_cache(args):
+    """Elevation + plan for every opening: cold render vs render cache hit"""
+    import tempfile
+    import drawing_generator
+    from render_cache import RenderCache
+
+    openings = make_sample_project(args.openings)['openings']
+
+    def render_all():
+        for opening in openings:
+            drawing_generator.generate_elevation_drawing(opening)
+            drawing_generator.generate_plan_drawing(opening)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        drawing_generator.RENDER_CACHE = RenderCache(cache_dir)
+        miss = time_call(render_all)
+        hit = time_call(render_all, args.repeat)
+        drawing_generator.RENDER_CACHE = None
+
+    # Writes into a cache that already holds 2000 entries
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = RenderCache(cache_dir)
+        image = b'x' * 50_000
+        for index in range(2000):
+            cache.put(f'{index:064x}', image)
+        # Mean over many puts, so the occasional eviction scan is counted
+        puts = 500
+        put = time_call(lambda: [cache.put(f'{index:064x}', image) for index in range(2000, 2000 + puts)]) / puts
+
+    print(f"Openings: {args.openings}")
+    print(f"  cache miss: {miss / args.openings * 1000:8.1f}ms/opening")
+    print(f"  cache hit:  {hit / args.openings * 1000:8.1f}ms/opening")
+    print(f"  put (mean), 2000 entries cached: {put * 1000:8.2f}ms")
+
+
+@benchmark('batch')
+def bench_batch(args):
+    """Elevation + plan for every opening: one request per drawing vs one streamed batch request"""
+    import io
+    import drawing_generator
+
+    openings = make_sample_project(args.openings)['openings']
+    jobs = [{'openingId': o['id'], 'type': t, 'data': o} for o in openings for t in ('elevation', 'plan')]
+    workers = args.workers or os.cpu_count()
+
+    per_request = time_call(lambda: [drawing_generator.handle_request(job) for job in jobs], args.repeat)
+    batch = time_call(lambda: drawing_generator.stream_batch({'jobs': jobs, 'workers': workers}, io.StringIO()),
+                      args.repeat)
+
+    print(f"Openings: {args.openings} ({len(jobs)} drawings), workers: {workers}")
+    print(f"  per request: {per_request:8.2f}s")
+    print(f"  batch:       {batch:8.2f}s")
+    print(f"  speedup:     {per_request / batch:8.2f}x")
+
+
+@benchmark('package-stream')
+def bench_package_stream(args):
+    """Complete package as one base64 JSON result vs streamed NDJSON events: time to first byte and peak memory"""
+    import tracemalloc
+    from package_generator import generate_complete_package, stream_complete_package
+
+    class Sink:
+        """Discards output, remembering when the first PDF bytes arrived"""
+        def __init__(self):
+            self.first_byte = None
+        def write(self, text):
+            if self.first_byte is None and ('"pdf_data"' in text or '"event": "data"' in text):
+                self.first_byte = time.perf_counter()
+        def flush(self):
+            pass
+
+    project = make_sample_project(args.openings)
+    modes = {
+        'buffered': lambda sink: sink.write(json.dumps(generate_complete_package(project))),
+        'streamed': lambda sink: stream_complete_package(project, sink),
+    }
+
+    print(f"Openings: {args.openings}")
+    for label, run in modes.items():
+        sink = Sink()
+        tracemalloc.start()
+        start = time.perf_counter()
+        run(sink)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {label}: total {elapsed:6.2f}s  first PDF bytes {sink.first_byte - start:6.2f}s  "
+              f"peak traced memory {peak / 1024 / 1024:7.1f}MB")
+
+
+@benchmark('plan-batching')
+def bench_plan_batching(args):
+    """Plan views drawn with one matplotlib artist per IR primitive vs batched LineCollections/PolyCollections"""
+    from io import BytesIO
+    import backend_matplotlib
+    import drawing_generator
+
+    openings = make_sample_project(args.openings)['openings']
+    panel_sets = [drawing_generator.convert_quoting_tool_data(opening) for opening in openings]
+
+    def render_all(counts):
+        for panels in panel_sets:
+            fig = drawing_generator.draw_plan_view(panels)
+            counts.append(sum(len(ax.get_children()) for ax in fig.axes))
+            fig.savefig(BytesIO(), format='png', dpi=300)
+
+    batched_render = backend_matplotlib.render
+    results = {}
+    for label, batch in (('per-primitive', False), ('batched', True)):
+        backend_matplotlib.render = lambda drawing, ax, batch=batch: batched_render(drawing, ax, batch=batch)
+        counts = []
+        elapsed = time_call(lambda: render_all(counts), args.repeat)
+        results[label] = (elapsed, counts[0])
+    backend_matplotlib.render = batched_render
+
+    print(f"Plan views: {args.openings} at 300 dpi")
+    for label, (elapsed, artists) in results.items():
+        print(f"  {label:13s}: {elapsed / args.openings * 1000:8.1f}ms/view  {artists:4d} artists/view")
+
+
+@benchmark('layout')
+def bench_layout(args):
+    """Pure-Python layout pass (panels -> drawing IR) vs the full matplotlib render of the same views"""
+    from io import BytesIO
+    import drawing_generator
+    import drawing_layout
+
+    openings = make_sample_project(args.openings)['openings']
+    panel_sets = [drawing_generator.convert_quoting_tool_data(opening) for opening in openings]
+
+    def layout_all(counts):
+        for panels in panel_sets:
+            elevation = drawing_layout.layout_architectural_elevation(panels, 96)
+            plan = drawing_layout.layout_plan_view(panels)
+            counts.append(len(elevation) + len(plan))
+
+    def render_all():
+        for panels in panel_sets:
+            fig, _ = drawing_generator.draw_architectural_elevation(panels, 96)
+            fig.savefig(BytesIO(), format='png', dpi=300)
+            fig = drawing_generator.draw_plan_view(panels)
+            fig.savefig(BytesIO(), format='png', dpi=300)
+
+    counts = []
+    layout_time = time_call(lambda: layout_all(counts), args.repeat)
+    render_time = time_call(render_all, args.repeat)
+    print(f"Elevation + plan of {args.openings} openings ({counts[0]} primitives per opening)")
+    print(f"  layout only      : {layout_time / args.openings * 1000:8.3f}ms/opening")
+    print(f"  layout + 300 dpi : {render_time / args.openings * 1000:8.1f}ms/opening")
+
+
+@benchmark('svg')
+def bench_svg(args):
+    """Elevation + plan responses as format "svg" (written from the layout) vs the default 300-dpi PNG"""
+    import drawing_generator
+
+    openings = make_sample_project(args.openings)['openings']
+    sizes = {}
+
+    def respond_all(image_format):
+        total = 0
+        for opening in openings:
+            for drawing_type in ('elevation', 'plan'):
+                result = drawing_generator.handle_request({'type': drawing_type, 'format': image_format, 'data': opening})
+                total += len(result.get(f'{drawing_type}_svg') or result.get(f'{drawing_type}_image') or '')
+        sizes[image_format] = total
+
+    print(f"Elevation + plan of {args.openings} openings")
+    for image_format in ('png', 'svg'):
+        elapsed = time_call(lambda: respond_all(image_format), args.repeat)
+        print(f"  {image_format}: {elapsed / args.openings * 1000:8.2f}ms/opening  "
+              f"{sizes[image_format] / args.openings / 1024:7.1f}KB/opening in the JSON response")
+
+
+@benchmark('pdf-backend')
+def bench_pdf_backend(args):
+    """Package pages through matplotlib's PdfPages vs the native pdf_writer backend: time per section and PDF size"""
+    from io import BytesIO
+    from matplotlib.backends.backend_pdf import PdfPages
+    import package_generator
+    from pdf_writer import PdfWriter
+
+    project = make_sample_project(args.openings)
+    # One BOM row per part and opening, so the BOM table grows with the project (3 rows per opening)
+    for opening in project['openings']:
+        for panel in opening['panels']:
+            for bom_item in panel['componentInstance']['product']['productBOMs']:
+                bom_item['partName'] = f"{bom_item['partName']} {opening['name']}"
+
+    native_pages = package_generator.native_package_pages(project)
+    sections = {
+        'openings': (lambda pdf_pages: [package_generator.create_shop_drawing_page(opening, pdf_pages)
+                                        for opening in project['openings']], 'Opening'),
+        'bom': (lambda pdf_pages: package_generator.create_bom_page(project, pdf_pages), 'Bill of Materials'),
+        'quote': (lambda pdf_pages: package_generator.create_quote_page(project, pdf_pages), 'Quote'),
+    }
+
+    def write_matplotlib(create, sizes):
+        buffer = BytesIO()
+        with PdfPages(buffer) as pdf_pages:
+            create(pdf_pages)
+        sizes.append(len(buffer.getvalue()))
+
+    def write_native(prefix, sizes, pages):
+        buffer = BytesIO()
+        with PdfWriter(buffer) as writer:
+            for label, draw in native_pages:
+                if label.startswith(prefix):
+                    with writer.page() as page:
+                        draw(page)
+            pages.append(writer.page_count)
+        sizes.append(len(buffer.getvalue()))
+
+    print(f"Openings: {args.openings}, BOM rows: {len(package_generator.collect_bom_rows(project)) - 1}")
+    for name, (create, prefix) in sections.items():
+        matplotlib_sizes, native_sizes, native_page_counts = [], [], []
+        matplotlib_time = time_call(lambda: write_matplotlib(create, matplotlib_sizes), args.repeat)
+        native_time = time_call(lambda: write_native(prefix, native_sizes, native_page_counts), args.repeat)
+        print(f"  {name:8s} matplotlib: {matplotlib_time * 1000:9.1f}ms {matplotlib_sizes[0] / 1024:8.1f}KB   "
+              f"native: {native_time * 1000:7.1f}ms {native_sizes[0] / 1024:7.1f}KB ({native_page_counts[0]} pages)")
+
+
+@benchmark('startup')
+def bench_startup(args):
+    """One-shot CLI requests: wall time until the reply, for requests that never draw vs a cold PNG render"""
+    import tempfile
+
+    opening = json.dumps(make_sample_opening(0))
+    repeat = max(args.repeat, 3)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cached = {'SHOP_DRAWINGS_CACHE': '1', 'SHOP_DRAWINGS_CACHE_DIR': cache_dir}
+        startup_time('drawing_generator.py', f'{{"type": "elevation", "data": {opening}}}', cached, repeat=1)
+        cases = [
+            ('bad JSON', 'drawing_generator.py', '{bad', None),
+            ('unknown type', 'drawing_generator.py', '{"type": "section"}', None),
+            ('elevation svg', 'drawing_generator.py', f'{{"type": "elevation", "format": "svg", "data": {opening}}}', None),
+            ('elevation png cached', 'drawing_generator.py', f'{{"type": "elevation", "data": {opening}}}', cached),
+            ('elevation png', 'drawing_generator.py', f'{{"type": "elevation", "data": {opening}}}', None),
+            ('package bad JSON', 'package_generator.py', '{bad', None),
+        ]
+        baseline = min(time_call(lambda: subprocess.run([sys.executable, '-c', 'pass']), 1) for _ in range(repeat))
+        pyplot = min(time_call(lambda: subprocess.run([sys.executable, '-c', 'import matplotlib.pyplot']), 1)
+                     for _ in range(repeat))
+        print(f"  {'python3 -c pass':22s} {baseline * 1000:7.1f}ms")
+        print(f"  {'import pyplot':22s} {pyplot * 1000:7.1f}ms")
+        for label, script, request, env in cases:
+            elapsed, _ = startup_time(script, request, env, repeat=repeat)
+            print(f"  {label:22s} {elapsed * 1000:7.1f}ms")
+    print(f"Budget for requests that do not draw: {STARTUP_BUDGET_SECONDS * 1000:.0f}ms")
+
+
+@benchmark('font-cache')
+def bench_font_cache(args):
+    """Cold PNG elevation in a fresh process: no font cache vs the service font cache, empty and pre-built"""
+    import tempfile
+
+    request = json.dumps({'type': 'elevation', 'data': make_sample_opening(0)})
+    repeat = max(args.repeat, 3)
+
+    def fresh(env_for_dir):
+        # A new, empty cache directory per run, as in a container that was just started
+        times = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as directory:
+                times.append(startup_time('drawing_generator.py', request, env_for_dir(directory), repeat=1)[0])
+        return min(times)
+
+    no_cache = fresh(lambda directory: {'SHOP_DRAWINGS_CACHE': '0', 'SHOP_DRAWINGS_FONT_CACHE': '0',
+                                        'MPLCONFIGDIR': directory})
+    empty = fresh(lambda directory: {'SHOP_DRAWINGS_CACHE': '0', 'SHOP_DRAWINGS_FONT_CACHE_DIR': directory})
+    with tempfile.TemporaryDirectory() as directory:
+        env = {'SHOP_DRAWINGS_CACHE': '0', 'SHOP_DRAWINGS_FONT_CACHE_DIR': directory}
+        build = time_call(lambda: subprocess.run([sys.executable, os.path.join(HERE, 'drawing_generator.py'),
+                                                  '--warm-cache'], capture_output=True, env=dict(os.environ, **env)))
+        built, _ = startup_time('drawing_generator.py', request, env, repeat=repeat)
+    print(f"  {'no font cache':22s} {no_cache * 1000:7.1f}ms")
+    print(f"  {'font cache, empty':22s} {empty * 1000:7.1f}ms")
+    print(f"  {'font cache, pre-built':22s} {built * 1000:7.1f}ms  (--warm-cache: {build * 1000:.0f}ms once)")
+
+
+@benchmark('logging')
+def bench_logging(args):
+    """Converting every opening of a project (the per-panel debug logging path): default level vs DEBUG"""
+    import contextlib
+    import io
+    import drawing_generator
+    import service_log
+
+    openings = make_sample_project(args.openings)['openings']
+
+    def convert_all():
+        for opening in openings:
+            drawing_generator.convert_quoting_tool_data(opening)
+            drawing_generator.draw_door_schedule(drawing_generator.convert_quoting_tool_data(opening))
+
+    print(f"Convert + door schedule of {args.openings} openings")
+    for level in ('WARNING', 'DEBUG'):
+        stderr = io.StringIO()
+        service_log.set_level(level)
+        with contextlib.redirect_stderr(stderr):
+            elapsed = time_call(convert_all, args.repeat)
+        print(f"  {level:8s}: {elapsed * 1000:8.2f}ms, {len(stderr.getvalue()) // args.repeat:9d} bytes of stderr per run")
+    service_log.set_level('WARNING')
+
+
+@benchmark('option-resolution')
+def bench_option_resolution(args):
+    """subOptionSelections of a 500-panel project: nested category/option scans vs the shared option index"""
+    import drawing_generator
+    import option_resolver
+    from package_generator import get_actual_quote_data
+
+    project = make_option_heavy_project()
+    panels = [(panel['componentInstance']['product'], json.loads(panel['componentInstance']['subOptionSelections']))
+              for opening in project['openings'] for panel in opening['panels']]
+
+    def scan_all():
+        # The nested scans convert_quoting_tool_data and get_actual_quote_data used to run per panel
+        for product, selections in panels:
+            for category_id, option_id in selections.items():
+                for sub_option in product['productSubOptions']:
+                    if str(sub_option['category']['id']) == str(category_id):
+                        for option in sub_option['category']['individualOptions']:
+                            if option['id'] == option_id:
+                                break
+                        break
+
+    def resolve_all():
+        resolver = option_resolver.OptionResolver()
+        for product, selections in panels:
+            resolver.resolve(product, selections)
+
+    def convert_project():
+        for opening in project['openings']:
+            drawing_generator.convert_quoting_tool_data(opening)
+        get_actual_quote_data(project)
+
+    def convert_project_scoped():
+        with option_resolver.scope():
+            convert_project()
+
+    print(f"{len(panels)} panels, 5 products x 40 categories x 30 options, 8 selections per panel")
+    print(f"  resolve, nested scans          : {time_call(scan_all, args.repeat) * 1000:8.2f}ms")
+    print(f"  resolve, option index          : {time_call(resolve_all, args.repeat) * 1000:8.2f}ms")
+    print(f"  convert + quote, per opening   : {time_call(convert_project, args.repeat) * 1000:8.2f}ms")
+    print(f"  convert + quote, request scope : {time_call(convert_project_scoped, args.repeat) * 1000:8.2f}ms")
+
+@benchmark('project-model')
+def bench_project_model(args):
+    """Page data of a 500-panel package: each page builder walking the raw dict vs one shared project_model"""
+    import drawing_generator
+    import project_model
+    from package_generator import collect_bom_rows, quote_page_content
+
+    project = make_option_heavy_project()
+    parses = [0]
+    parse_selections = project_model.parse_selections
+
+    def counting_parse(raw_selections):
+        parses[0] += 1
+        return parse_selections(raw_selections)
+
+    def page_data(project):
+        for opening in project['openings'] if isinstance(project, dict) else project.openings:
+            drawing_generator.convert_quoting_tool_data(opening)
+        collect_bom_rows(project)
+        quote_page_content(project)
+
+    def per_page():
+        page_data(project)
+
+    def shared():
+        page_data(project_model.normalize_project(project))
+
+    for name, build in (('raw dict per page builder', per_page), ('shared project model', shared)):
+        parses[0] = 0
+        project_model.parse_selections = counting_parse
+        try:
+            build()
+        finally:
+            project_model.parse_selections = parse_selections
+        print(f"  {name:26s}: {time_call(build, args.repeat) * 1000:8.2f}ms  {parses[0]} selection parses")
+
+@benchmark('bom-formula')
+def bench_bom_formula(args):
+    """BOM formulas of 2000 panels x 5 BOM lines: parse per row vs cached per-row evaluation vs grouped NumPy evaluation"""
+    import bom_formula
+
+    rows = 10000
+    formulas = [BOM_FORMULAS[row % len(BOM_FORMULAS)] for row in range(rows)]
+    variables = {'width': [24 + row % 48 for row in range(rows)], 'height': [80 + row % 40 for row in range(rows)],
+                 'quantity': [1 + row % 3 for row in range(rows)]}
+
+    def parse_per_row():
+        for row, text in enumerate(formulas):
+            bom_formula.Formula(text).evaluate({name: column[row] for name, column in variables.items()})
+
+    def cached_per_row():
+        for row, text in enumerate(formulas):
+            bom_formula.evaluate(text, {name: column[row] for name, column in variables.items()})
+
+    def grouped():
+        bom_formula.evaluate_grouped(formulas, variables)
+
+    print(f"{rows} panel x BOM rows, {len(BOM_FORMULAS)} formulas")
+    print(f"  parse every row      : {time_call(parse_per_row, args.repeat) * 1000:8.2f}ms")
+    print(f"  cached, row by row   : {time_call(cached_per_row, args.repeat) * 1000:8.2f}ms")
+    print(f"  cached, NumPy groups : {time_call(grouped, args.repeat) * 1000:8.2f}ms")
+
+@benchmark('bom-aggregation')
+def bench_bom_aggregation(args):
+    """BOM totals of a 100k-line project: one dict merge per line vs columnar NumPy group-by"""
+    import bom_aggregation
+    import bom_formula
+    import project_model
+
+    project = project_model.normalize_project(make_bom_heavy_project())
+
+    def dict_merge():
+        # The per-line merge collect_bom_rows used to do
+        totals = {}
+        for opening in project.openings:
+            for panel in opening.panels:
+                for bom_item in panel.bom_items:
+                    part_key = f"{bom_item.get('partName', 'Unknown')} ({bom_item.get('unit', 'ea')})"
+                    if part_key not in totals:
+                        totals[part_key] = {'quantity': 0, 'cost': bom_item.get('cost', 0)}
+                    pieces = 1 if bom_item.get('quantity') is None else bom_item['quantity']
+                    quantity = pieces
+                    if bom_aggregation.formula_sets_quantity(bom_item.get('formula')):
+                        quantity = bom_formula.evaluate(bom_item['formula'], {
+                            'width': panel.width or 0, 'height': panel.height or 0,
+                            'quantity': pieces}) / bom_aggregation.INCHES_PER_FOOT
+                    totals[part_key]['quantity'] += quantity
+        return sum(item['quantity'] * item['cost'] for item in totals.values())
+
+    lines = bom_aggregation.collect_lines(project)
+    print(f"{len(lines.codes)} BOM lines, {len(lines.parts)} parts")
+    print(f"  dict merge per line        : {time_call(dict_merge, args.repeat) * 1000:8.2f}ms")
+    print(f"  columns (flatten + formula): {time_call(lambda: bom_aggregation.collect_lines(project), args.repeat) * 1000:8.2f}ms")
+    print(f"  group-by (bincount)        : {time_call(lambda: bom_aggregation.aggregate(lines), args.repeat) * 1000:8.2f}ms")
+
+@benchmark('threaded-render')
+def bench_threaded_render(args):
+    """Elevation + plan PNGs rendered one after another vs on a thread pool, and the figures left alive afterwards"""
+    import gc
+    from concurrent.futures import ThreadPoolExecutor
+    import drawing_generator
+    from matplotlib.figure import Figure
+
+    drawing_generator.RENDER_CACHE = None
+    openings = make_sample_project(args.openings)['openings']
+    jobs = [(generate, opening) for opening in openings
+            for generate in (drawing_generator.generate_elevation_drawing, drawing_generator.generate_plan_drawing)]
+    threads = args.workers or 4
+
+    def render_threaded():
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda job: job[0](job[1]), jobs))
+
+    serial = time_call(lambda: [generate(opening) for generate, opening in jobs], args.repeat)
+    threaded = time_call(render_threaded, args.repeat)
+    gc.collect()
+    alive = sum(1 for obj in gc.get_objects() if isinstance(obj, Figure))
+    print(f"Elevation + plan of {args.openings} openings ({os.cpu_count()} CPUs)")
+    print(f"  serial    : {serial / len(jobs) * 1000:8.1f}ms/drawing")
+    print(f"  {threads} threads : {threaded / len(jobs) * 1000:8.1f}ms/drawing")
+    print(f"  figures alive after {len(jobs) * args.repeat * 2} renders: {alive}")
+
+
+@benchmark('server-load')
+def bench_server_load(args):
+    """api/drawings.py under concurrent clients: throughput per worker count, then 503s past the queue"""
+    openings = make_sample_project(args.openings)['openings']
+    bodies = [json.dumps({'type': drawing_type, 'data': opening})
+              for opening in openings for drawing_type in ('elevation', 'plan')]
+    max_workers = args.workers or os.cpu_count() or 1
+    worker_counts = sorted({1, *(count for count in (2, 4, 8) if count < max_workers), max_workers})
+    clients = max(4, 2 * max_workers)
+
+    print(f"{len(bodies)} requests from {clients} clients ({os.cpu_count()} CPUs)")
+    for workers in worker_counts:
+        process, port = start_api_server(workers, queue_size=clients)
+        try:
+            post_requests(port, bodies[:workers], workers)
+            elapsed, replies = post_requests(port, bodies, clients)
+        finally:
+            process.terminate()
+            process.wait()
+        latencies = sorted(seconds for _, seconds, _ in replies)
+        print(f"  {workers:2d} workers: {len(bodies) / elapsed:7.1f} req/s  "
+              f"p50 {latencies[len(latencies) // 2] * 1000:7.1f}ms  p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f}ms")
+
+    # Overload: one worker, one queued render, everyone else is turned away
+    process, port = start_api_server(1, queue_size=1)
+    try:
+        elapsed, replies = post_requests(port, bodies, clients)
+    finally:
+        process.terminate()
+        process.wait()
+    rejected = [(seconds, headers) for status, seconds, headers in replies if status == 503]
+    slowest = max((seconds for seconds, _ in rejected), default=0)
+    print(f"  overload (1 worker, queue 1): {len(bodies) - len(rejected)} rendered, {len(rejected)} got 503 "
+          f"(Retry-After {rejected[0][1].get('Retry-After') if rejected else '-'}, slowest 503 {slowest * 1000:.1f}ms)")
+
+
+@benchmark('coalescing')
+def bench_coalescing(args):
+    """Identical drawing requests arriving together: rendered once and shared vs rendered per request"""
+    clients = 8
+    opening = make_sample_opening(0)
+    bodies = [json.dumps({'type': 'elevation', 'data': opening})] * clients
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{clients} identical elevation requests at once, {workers} workers")
+    for label, coalesce in (('every request', False), ('coalesced', True)):
+        process, port = start_api_server(workers, queue_size=clients, coalesce=coalesce)
+        try:
+            elapsed = min(post_requests(port, bodies, clients)[0] for _ in range(args.repeat))
+            metrics = server_metrics(port)
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"  api/drawings.py, {label:13s}: {elapsed * 1000:8.1f}ms  "
+              f"{metrics['renders']} renders, {metrics['coalesced']} coalesced")
+
+
+@benchmark('conditional')
+def bench_conditional(args):
+    """Repeat views of an unchanged opening: full render vs gzip vs If-None-Match 304, time and bytes per request"""
+    import http.client
+
+    body = json.dumps({'type': 'elevation', 'data': make_sample_opening(0)})
+    process, port = start_api_server(1, queue_size=4)
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+
+        def post(headers):
+            connection.request('POST', '/', body, dict({'Content-Type': 'application/json'}, **headers))
+            response = connection.getresponse()
+            sizes.append(len(response.read()))
+            return response
+
+        sizes = []
+        etag = post({}).getheader('ETag')
+        cases = [('full JSON', {}), ('gzip', {'Accept-Encoding': 'gzip'}), ('304', {'If-None-Match': etag})]
+        print(f"Elevation of one opening, {args.repeat * 20} requests each over one keep-alive connection")
+        for label, headers in cases:
+            sizes = []
+            elapsed = time_call(lambda: [post(headers) for _ in range(20)], args.repeat)
+            print(f"  {label:9s}: {elapsed / 20 * 1000:8.2f}ms/request  {sizes[0]:7d} body bytes")
+        connection.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@benchmark('transport')
+def bench_transport(args):
+    """Drawing and package replies as base64 JSON vs binary frames, and HTTP JSON vs multipart: bytes and time"""
+    import base64
+    import http.client
+    from io import BytesIO
+    import frames
+    import drawing_generator
+    import package_generator
+
+    def json_round_trip(reply):
+        encoded = json.dumps({key: base64.b64encode(value).decode('ascii') if isinstance(value, bytes) else value
+                              for key, value in reply.items()})
+        decoded = json.loads(encoded)
+        for key, value in reply.items():
+            if isinstance(value, bytes):
+                decoded[key] = base64.b64decode(decoded[key])
+        return len(encoded)
+
+    def frame_round_trip(reply):
+        encoded = b''.join(frames.encode(reply))
+        frames.read(BytesIO(encoded))
+        return len(encoded)
+
+    opening = make_sample_opening(0)
+    replies = [
+        ('elevation', drawing_generator.generate_elevation_drawing(opening, binary=True)),
+        ('package', package_generator.generate_complete_package(make_sample_project(args.openings), pdf_backend='native', binary=True)),
+    ]
+    print(f"Encode + decode one reply, {args.repeat * 100} times each")
+    for label, reply in replies:
+        results = []
+        for round_trip in (json_round_trip, frame_round_trip):
+            elapsed = time_call(lambda: [round_trip(reply) for _ in range(100)], args.repeat)
+            results.append(f"{round_trip(reply):9d} bytes {elapsed / 100 * 1000:7.3f}ms")
+        print(f"  {label:9s}: JSON {results[0]}   frame {results[1]}")
+
+    body = json.dumps({'type': 'elevation', 'data': opening})
+    process, port = start_api_server(1, queue_size=4)
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+        print(f"HTTP elevation, {args.repeat * 10} requests each over one keep-alive connection")
+        for label, headers in (('JSON', {}), ('multipart', {'Accept': 'multipart/form-data'})):
+            sizes = []
+
+            def post():
+                connection.request('POST', '/', body, dict({'Content-Type': 'application/json'}, **headers))
+                sizes.append(len(connection.getresponse().read()))
+
+            elapsed = time_call(lambda: [post() for _ in range(10)], args.repeat)
+            print(f"  {label:9s}: {elapsed / 10 * 1000:8.2f}ms/request  {sizes[0]:7d} body bytes")
+        connection.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@benchmark('elevation-scaling')
+def bench_elevation_scaling(args):
+    """Architectural elevation of storefronts with more and more panels: artist count and 300-dpi render time"""
+    from io import BytesIO
+    import drawing_generator
+
+    panel_types = ['Fixed', 'Sliding Door', 'Swing Door']
+    for count in (4, 12, 24, 48):
+        panels = [{
+            'type': panel_types[i % 3],
+            'width': 36,
+            'height': 96,
+            'swing_direction': 'Left In',
+            'sliding_direction': 'Left' if i % 2 else 'Right',
+        } for i in range(count)]
+
+        artists = []
+
+        def render():
+            fig, _ = drawing_generator.draw_architectural_elevation(panels, 96)
+            artists.append(len(fig.axes[0].get_children()))
+            fig.savefig(BytesIO(), format='png', dpi=300)
+
+        elapsed = time_call(render, args.repeat)
+        print(f"  {count:3d} panels: {artists[0]:4d} artists  {elapsed * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shop drawing service benchmarks')
+    parser.add_argument('name', nargs='?', help='Benchmark to run')
+    parser.add_argument('--list', action='store_true', help='List available benchmarks')
+    parser.add_argument('--openings', type=int, default=10, help='Number of openings in the synthetic project')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeat each measurement and keep the best time')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for parallel benchmarks (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.list or not args.name:
+        for name, func in BENCHMARKS.items():
+            print(f"{name:28s} {func.__doc__}")
+        return
+
+    if args.name not in BENCHMARKS:
+        print(f"Unknown benchmark: {args.name}", file=sys.stderr)
+        sys.exit(1)
+
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == '__main__':
+    main()
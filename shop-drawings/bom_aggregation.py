@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Bill of materials totals for a project, computed over columnar arrays with NumPy.
+
+collect_lines() flattens openings -> panels -> productBOMs into one row per BOM line (each
+product's lines are read once and repeated for the panels that use it): the part's code (parts are numbered in the order they first appear and keyed by "partName (unit)")
+and the line's quantity.
+
+A line's quantity is its "quantity" (1 when missing, an explicit 0 stays 0) or, when its
+"formula" mentions width or height, the formula's value (see bom_formula), a length in inches,
+in feet. The BOM page has always counted those lines as feet of the panel's width or height, so
+plain "width" / "height" formulas give the same quantities as before, while formulas with
+arithmetic now count their value, e.g. "height - 6" on a 96" panel is 7.5. Other formulas leave
+the quantity as it is.
+aggregate() then sums the quantities per part with np.bincount and prices them with each part's
+unit cost (the cost of its first line). The BOM pages and the machine-readable export (the
+"bom" request of package_generator.py) are both built from the same BomTotals.
+"""
+
+import bom_formula
+import project_model
+
+INCHES_PER_FOOT = 12.0
+
+
+def formula_sets_quantity(formula):
+    """Whether a line's formula sets its quantity, i.e. it mentions width or height (see the module docstring)"""
+    text = formula.lower() if isinstance(formula, str) else ''
+    return 'width' in text or 'height' in text
+
+
+class BomLines:
+    """
+    Every BOM line of a project as columns: codes[i] indexes parts, quantities[i] is the
+    line's quantity. parts holds one {'partName', 'partType', 'description', 'unit', 'cost'}
+    dict per part.
+    """
+    __slots__ = ('parts', 'codes', 'quantities')
+
+    def __init__(self, parts, codes, quantities):
+        self.parts = parts
+        self.codes = codes
+        self.quantities = quantities
+
+
+class BomTotals:
+    """Per-part quantity, unit cost and total cost arrays, in the order of parts"""
+    __slots__ = ('parts', 'quantities', 'unit_costs', 'total_costs', 'total_cost')
+
+    def __init__(self, parts, quantities, unit_costs, total_costs):
+        self.parts = parts
+        self.quantities = quantities
+        self.unit_costs = unit_costs
+        self.total_costs = total_costs
+        self.total_cost = float(total_costs.sum())
+
+    def rows(self):
+        """BOM table rows (see package_generator.BOM_COLUMNS) ending with the total row; empty without parts"""
+        if not self.parts:
+            return []
+        rows = [[
+            part['partName'],
+            part['partType'],
+            part['description'][:30] + ('...' if len(part['description']) > 30 else ''),
+            f"{quantity:.2f}",
+            part['unit'],
+            f"${unit_cost:.2f}",
+            f"${total_cost:.2f}"
+        ] for part, quantity, unit_cost, total_cost in zip(
+            self.parts, self.quantities.tolist(), self.unit_costs.tolist(), self.total_costs.tolist())]
+        rows.append(['', '', '', '', '', 'TOTAL:', f"${self.total_cost:.2f}"])
+        return rows
+
+    def export(self):
+        """Machine-readable totals: one entry per part with unrounded numbers, plus the total cost"""
+        return {
+            'parts': [{
+                'partName': part['partName'],
+                'partType': part['partType'],
+                'description': part['description'],
+                'unit': part['unit'],
+                'quantity': quantity,
+                'unitCost': unit_cost,
+                'totalCost': total_cost
+            } for part, quantity, unit_cost, total_cost in zip(
+                self.parts, self.quantities.tolist(), self.unit_costs.tolist(), self.total_costs.tolist())],
+            'totalCost': self.total_cost
+        }
+
+
+class _ProductLines:
+    """The BOM lines of one product and the sizes of the panels that use it"""
+    __slots__ = ('codes', 'fixed_quantities', 'formulas', 'widths', 'heights')
+
+    def __init__(self, bom_items, parts, part_codes):
+        self.codes = []
+        self.fixed_quantities = []
+        # (line index, formula, pieces) for every line whose formula sets its quantity
+        self.formulas = []
+        self.widths = []
+        self.heights = []
+        for line, bom_item in enumerate(bom_items):
+            part_name = bom_item.get('partName', 'Unknown')
+            part_type = bom_item.get('partType', 'Material')
+            unit = bom_item.get('unit', 'ea')
+            part_key = f"{part_name} ({unit})"
+            code = part_codes.get(part_key)
+            if code is None:
+                code = part_codes[part_key] = len(parts)
+                parts.append({
+                    'partName': part_name,
+                    'partType': part_type,
+                    'description': bom_item.get('description', ''),
+                    'unit': unit,
+                    'cost': bom_item.get('cost', 0)
+                })
+            self.codes.append(code)
+            quantity = bom_item.get('quantity')
+            pieces = 1 if quantity is None else quantity
+            self.fixed_quantities.append(pieces)
+            if formula_sets_quantity(bom_item.get('formula')):
+                self.formulas.append((line, bom_item['formula'], pieces))
+
+
+def collect_lines(project_data):
+    """
+    BomLines for a project_model.Project (or a raw project dict). Lines are grouped by product:
+    every panel of a product has the same BOM lines, so each product's lines are read once
+    and repeated for its panels, and each formula is evaluated once for all panels using it.
+    """
+    import numpy as np
+    parts = []
+    part_codes = {}
+    products = {}
+
+    for opening in project_model.as_project(project_data).openings:
+        for panel in opening.panels:
+            if not panel.bom_items:
+                continue
+            # Products without an id are never shared between panels
+            key = panel.product_id if panel.product_id is not None else id(panel.bom_items)
+            product = products.get(key)
+            if product is None:
+                product = products[key] = _ProductLines(panel.bom_items, parts, part_codes)
+            product.widths.append(panel.width or 0)
+            product.heights.append(panel.height or 0)
+
+    code_blocks = []
+    quantity_blocks = []
+    formula_lines = {}
+    for product in products.values():
+        panels = len(product.widths)
+        code_blocks.append(np.tile(np.array(product.codes, dtype=np.intp), panels))
+        # One row per panel, one column per BOM line; formulas fill their columns below
+        block = np.tile(np.array(product.fixed_quantities, dtype=float), (panels, 1))
+        quantity_blocks.append(block)
+        for line, formula, pieces in product.formulas:
+            formula_lines.setdefault(formula, []).append((block, line, product, pieces))
+
+    for formula, lines in formula_lines.items():
+        widths = np.concatenate([np.asarray(product.widths, dtype=float) for _, _, product, _ in lines])
+        heights = np.concatenate([np.asarray(product.heights, dtype=float) for _, _, product, _ in lines])
+        quantities = np.concatenate([np.full(len(product.widths), pieces, dtype=float)
+                                     for _, _, product, pieces in lines])
+        values = bom_formula.evaluate_columns(
+            formula, {'width': widths, 'height': heights, 'quantity': quantities}, len(widths))
+        start = 0
+        for block, line, product, _ in lines:
+            block[:, line] = values[start:start + len(block)] / INCHES_PER_FOOT
+            start += len(block)
+
+    if not code_blocks:
+        return BomLines(parts, np.zeros(0, dtype=np.intp), np.zeros(0))
+    return BomLines(parts, np.concatenate(code_blocks), np.concatenate([block.ravel() for block in quantity_blocks]))
+
+def aggregate(lines):
+    """BomTotals of BomLines: quantities summed per part, priced at the part's unit cost"""
+    import numpy as np
+    quantities = np.bincount(lines.codes, weights=lines.quantities, minlength=len(lines.parts))
+    # A null cost counts as 0, as on the line-by-line BOM page
+    unit_costs = np.array([part['cost'] or 0 for part in lines.parts], dtype=float)
+    return BomTotals(lines.parts, quantities, unit_costs, quantities * unit_costs)
+
+def project_totals(project_data):
+    """BomTotals for a project_model.Project (or a raw project dict)"""
+    return aggregate(collect_lines(project_data))
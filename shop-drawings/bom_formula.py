@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Safe evaluation of productBOMs[].formula expressions.
+
+A formula is an arithmetic expression over panel variables, e.g. "width / 12",
+"2 * (Width + Height)" or "Math.ceil(height / 24) * quantity", and is evaluated the way
+evaluateFormula in src/lib/bom/calculations.ts does:
+    - variable names are case-insensitive (Width and WIDTH are width)
+    - numbers, + - * / % **, parentheses and Math.abs, ceil, floor, max, min, pow, round,
+      sqrt and Math.PI are allowed; anything else is rejected without being run
+    - empty, invalid or failing formulas and NaN results give 0, negative results are clamped to 0
+Unlike the TS evaluator, infinite results (division by zero) also give 0.
+
+Formulas are parsed and checked once and the compiled form is cached by formula text.
+Formula.evaluate() takes one set of variables; Formula.evaluate_many() takes NumPy arrays, so
+all panels that share a BOM line are evaluated in one pass (see evaluate_grouped()).
+"""
+
+import ast
+import functools
+import math
+import service_log
+
+log = service_log.get_logger('bom_formula')
+
+# Groups with fewer rows are evaluated one row at a time, which is faster than setting up arrays
+VECTORIZE_MIN_ROWS = 32
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+MATH_FUNCTIONS = ('abs', 'ceil', 'floor', 'max', 'min', 'pow', 'round', 'sqrt')
+
+
+class FormulaError(ValueError):
+    """A formula that cannot be compiled"""
+
+
+# Everything stays a float, so no formula can build huge integers (9 ** 9 ** 9 overflows instead)
+SCALAR_FUNCTIONS = {
+    '_abs': abs, '_ceil': lambda x: float(math.ceil(x)), '_floor': lambda x: float(math.floor(x)),
+    # Math.max / Math.min take any number of arguments: max() of one is that value, of none -Infinity
+    '_max': lambda *args: max(args) if args else -math.inf,
+    '_min': lambda *args: min(args) if args else math.inf,
+    '_pow': math.pow,
+    # Math.round rounds halves up, not to even
+    '_round': lambda x: float(math.floor(x + 0.5)),
+    '_sqrt': math.sqrt, '_fmod': math.fmod, '_pi': math.pi,
+}
+
+@functools.lru_cache(maxsize=1)
+def vector_functions():
+    """Math functions over NumPy arrays, NumPy is imported on first use"""
+    import numpy as np
+    return {
+        '_abs': np.abs, '_ceil': np.ceil, '_floor': np.floor,
+        '_max': lambda *args: functools.reduce(np.maximum, args, -np.inf),
+        '_min': lambda *args: functools.reduce(np.minimum, args, np.inf),
+        '_pow': np.power, '_round': lambda x: np.floor(np.add(x, 0.5)), '_sqrt': np.sqrt,
+        '_fmod': np.fmod, '_pi': math.pi,
+    }
+
+
+class _Compiler(ast.NodeTransformer):
+    """Rejects anything but arithmetic on variables and rewrites the tree for eval()"""
+
+    def generic_visit(self, node):
+        raise FormulaError(f'{type(node).__name__} is not allowed')
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        if type(node.value) not in (int, float):
+            raise FormulaError(f'{node.value!r} is not a number')
+        return ast.Constant(value=float(node.value))
+
+    def visit_Name(self, node):
+        if node.id.startswith('_'):
+            raise FormulaError(f'{node.id} is not a variable')
+        return ast.Name(id=node.id.lower(), ctx=ast.Load())
+
+    def visit_Attribute(self, node):
+        if not (isinstance(node.value, ast.Name) and node.value.id == 'Math' and node.attr == 'PI'):
+            raise FormulaError(f'{ast.unparse(node)} is not allowed')
+        return ast.Name(id='_pi', ctx=ast.Load())
+
+    def visit_Call(self, node):
+        func = node.func
+        if (node.keywords or not isinstance(func, ast.Attribute) or not isinstance(func.value, ast.Name)
+                or func.value.id != 'Math' or func.attr not in MATH_FUNCTIONS):
+            raise FormulaError(f'{ast.unparse(func)} is not an allowed function')
+        return ast.Call(func=ast.Name(id='_' + func.attr, ctx=ast.Load()),
+                        args=[self.visit(arg) for arg in node.args], keywords=[])
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, BINARY_OPERATORS):
+            raise FormulaError(f'{type(node.op).__name__} is not allowed')
+        left, right = self.visit(node.left), self.visit(node.right)
+        # % takes the sign of the dividend as in JavaScript, ** of a negative number never goes complex
+        function = {ast.Mod: '_fmod', ast.Pow: '_pow'}.get(type(node.op))
+        if function:
+            return ast.Call(func=ast.Name(id=function, ctx=ast.Load()), args=[left, right], keywords=[])
+        return ast.BinOp(left=left, op=node.op, right=right)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, UNARY_OPERATORS):
+            raise FormulaError(f'{type(node.op).__name__} is not allowed')
+        return ast.UnaryOp(op=node.op, operand=self.visit(node.operand))
+
+
+class Formula:
+    """A compiled formula; variables are the (lower-case) names it reads"""
+    __slots__ = ('text', 'code', 'variables')
+
+    def __init__(self, text):
+        self.text = text
+        try:
+            tree = ast.parse(' '.join(text.split()), mode='eval')
+        except SyntaxError as e:
+            raise FormulaError(f'invalid syntax: {e.msg}') from None
+        tree = ast.fix_missing_locations(_Compiler().visit(tree))
+        self.code = compile(tree, '<formula>', 'eval')
+        self.variables = frozenset(name for name in self.code.co_names if not name.startswith('_'))
+
+    def _namespace(self, functions, variables, number=float):
+        namespace = dict(functions, __builtins__={})
+        namespace.update((name.lower(), number(value)) for name, value in variables.items())
+        missing = self.variables - namespace.keys()
+        if missing:
+            raise NameError(f"unknown variable {', '.join(sorted(missing))}")
+        return namespace
+
+    def evaluate(self, variables):
+        """Value for one {name: number} set of variables (names are case-insensitive)"""
+        try:
+            value = float(eval(self.code, self._namespace(SCALAR_FUNCTIONS, variables)))
+        except (ArithmeticError, ValueError):  # division by zero, math domain errors, overflow
+            return 0.0
+        except (NameError, TypeError) as e:
+            _warn_evaluation(self.text, str(e))
+            return 0.0
+        return max(0.0, value) if math.isfinite(value) else 0.0
+
+    def evaluate_many(self, variables, rows):
+        """float64 array of `rows` values for {name: array of `rows` numbers}"""
+        import numpy as np
+        try:
+            with np.errstate(all='ignore'):
+                values = eval(self.code, self._namespace(vector_functions(), variables,
+                                                         lambda value: np.asarray(value, dtype=float)))
+                values = np.broadcast_to(np.asarray(values, dtype=float), (rows,))
+                return np.where(np.isfinite(values), np.maximum(values, 0.0), 0.0)
+        except (NameError, TypeError, ValueError) as e:
+            _warn_evaluation(self.text, str(e))
+            return np.zeros(rows)
+
+
+# Texts of the formulas already reported as failing; bounded like the _compile cache
+_warned_formulas = set()
+
+def _warn_evaluation(text, error):
+    """Warn about a formula that fails to evaluate once, not once per row or per BOM"""
+    if text in _warned_formulas:
+        return
+    if len(_warned_formulas) >= 4096:
+        _warned_formulas.clear()
+    _warned_formulas.add(text)
+    log.warning('Could not evaluate BOM formula %r: %s', text, error)
+
+@functools.lru_cache(maxsize=4096)
+def _compile(text):
+    try:
+        return Formula(text)
+    except (FormulaError, RecursionError, OverflowError) as e:
+        log.warning('Invalid BOM formula %r: %s', text, e)
+        return FormulaError(str(e))
+
+def compile_formula(text):
+    """Compiled Formula for text (cached by text); raises FormulaError if it is not a valid formula"""
+    formula = _compile(text)
+    if isinstance(formula, FormulaError):
+        raise FormulaError(str(formula))
+    return formula
+
+def evaluate(text, variables):
+    """Value of the formula text for {name: number}; 0 for empty or invalid formulas"""
+    if not isinstance(text, str) or not text.strip():
+        return 0.0
+    formula = _compile(text)
+    return 0.0 if isinstance(formula, FormulaError) else formula.evaluate(variables)
+
+def evaluate_columns(text, variables, rows):
+    """
+    float64 array with the formula text's value for each of `rows` rows of variables
+    ({name: array or list of `rows` numbers}); zeros for empty or invalid formulas
+    """
+    import numpy as np
+    if not isinstance(text, str) or not text.strip():
+        return np.zeros(rows)
+    formula = _compile(text)
+    if isinstance(formula, FormulaError):
+        return np.zeros(rows)
+    missing = formula.variables - {name.lower() for name in variables}
+    if missing:
+        _warn_evaluation(text, f"unknown variable {', '.join(sorted(missing))}")
+        return np.zeros(rows)
+    if rows < VECTORIZE_MIN_ROWS:
+        return np.array([formula.evaluate({name: column[row] for name, column in variables.items()})
+                         for row in range(rows)], dtype=float)
+    return formula.evaluate_many(variables, rows)
+
+def evaluate_grouped(texts, variables):
+    """
+    Values of texts[i] for row i of variables ({name: list of numbers, one per text}) as a list
+    of floats. Rows that share a formula are evaluated together, with NumPy for large groups.
+    """
+    groups = {}
+    for row, text in enumerate(texts):
+        groups.setdefault(text if isinstance(text, str) else '', []).append(row)
+    values = [0.0] * len(texts)
+    for text, rows in groups.items():
+        columns = {name: [column[row] for row in rows] for name, column in variables.items()}
+        for row, value in zip(rows, evaluate_columns(text, columns, len(rows)).tolist()):
+            values[row] = value
+    return values
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Backend-agnostic geometry for shop drawings.
+
+The layout pass (drawing_layout.py) turns panels into a Drawing: an ordered list of plain
+primitives in drawing units (inches). Backends (backend_matplotlib.py, ...) only turn those
+primitives into output and never do layout math. Primitive order is paint order within a
+z-order level, the same rule matplotlib uses for artists.
+
+Styles use matplotlib's vocabulary (color names, '-'/':' line styles, linewidths and font
+sizes in points) because that is what the drawings were designed with; other backends
+translate them. This module must stay free of matplotlib and numpy imports.
+"""
+
+
+class Rect:
+    """Rectangle with lower-left corner (x, y), optionally rotated by angle degrees about that corner"""
+    __slots__ = ('x', 'y', 'width', 'height', 'angle', 'edgecolor', 'facecolor', 'linewidth', 'linestyle', 'zorder')
+    kind = 'rect'
+
+    def __init__(self, x, y, width, height, edgecolor='black', facecolor='none', linewidth=1.0,
+                 linestyle='-', zorder=1, angle=0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.angle = angle
+        self.edgecolor = edgecolor
+        self.facecolor = facecolor
+        self.linewidth = linewidth
+        self.linestyle = linestyle
+        self.zorder = zorder
+
+
+class Line:
+    """Straight line segment from (x0, y0) to (x1, y1)"""
+    __slots__ = ('x0', 'y0', 'x1', 'y1', 'color', 'linewidth', 'linestyle', 'zorder')
+    kind = 'line'
+
+    def __init__(self, x0, y0, x1, y1, color='black', linewidth=1.0, linestyle='-', zorder=2):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.color = color
+        self.linewidth = linewidth
+        self.linestyle = linestyle
+        self.zorder = zorder
+
+
+class Circle:
+    """Circle around (x, y)"""
+    __slots__ = ('x', 'y', 'radius', 'edgecolor', 'facecolor', 'linewidth', 'zorder')
+    kind = 'circle'
+
+    def __init__(self, x, y, radius, edgecolor='black', facecolor='none', linewidth=1.0, zorder=1):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.edgecolor = edgecolor
+        self.facecolor = facecolor
+        self.linewidth = linewidth
+        self.zorder = zorder
+
+
+class Arc:
+    """Circular arc around (x, y), counter-clockwise from theta1 to theta2 degrees"""
+    __slots__ = ('x', 'y', 'radius', 'theta1', 'theta2', 'color', 'linewidth', 'zorder')
+    kind = 'arc'
+
+    def __init__(self, x, y, radius, theta1, theta2, color='black', linewidth=1.0, zorder=1):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.theta1 = theta1
+        self.theta2 = theta2
+        self.color = color
+        self.linewidth = linewidth
+        self.zorder = zorder
+
+
+class Text:
+    """Text anchored at (x, y); fontsize in points, rotation in degrees"""
+    __slots__ = ('x', 'y', 'text', 'ha', 'va', 'fontsize', 'fontweight', 'color', 'rotation', 'zorder')
+    kind = 'text'
+
+    def __init__(self, x, y, text, ha='left', va='baseline', fontsize=10, fontweight='normal',
+                 color='black', rotation=0, zorder=3):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.ha = ha
+        self.va = va
+        self.fontsize = fontsize
+        self.fontweight = fontweight
+        self.color = color
+        self.rotation = rotation
+        self.zorder = zorder
+
+
+class Arrow:
+    """
+    Arrow from (x0, y0) to (x1, y1): style '->' has a head at the end, '<->' (dimension lines)
+    at both ends. color None means the backend's default annotation color. clip=False keeps the
+    arrow even when its end point lies outside the view.
+    """
+    __slots__ = ('x0', 'y0', 'x1', 'y1', 'style', 'linewidth', 'color', 'clip', 'zorder')
+    kind = 'arrow'
+
+    def __init__(self, x0, y0, x1, y1, style='->', linewidth=1.0, color=None, clip=True, zorder=3):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.style = style
+        self.linewidth = linewidth
+        self.color = color
+        self.clip = clip
+        self.zorder = zorder
+
+
+class Drawing:
+    """
+    An ordered list of primitives plus how to frame them.
+
+    xlim / ylim: the view of the standalone drawing (None: fit to the content)
+    bounds: (x0, y0, x1, y1) extent including labels that sit outside the view
+    figsize: native size in inches of the standalone drawing
+    aspect_equal: whether one unit must be the same length on both axes
+    """
+    __slots__ = ('primitives', 'xlim', 'ylim', 'bounds', 'figsize', 'aspect_equal')
+
+    def __init__(self, figsize=None):
+        self.primitives = []
+        self.xlim = None
+        self.ylim = None
+        self.bounds = None
+        self.figsize = figsize
+        self.aspect_equal = False
+
+    def __len__(self):
+        return len(self.primitives)
+
+    def __iter__(self):
+        return iter(self.primitives)
+
+    def add(self, primitive):
+        self.primitives.append(primitive)
+        return primitive
+
+    def rect(self, x, y, width, height, **style):
+        return self.add(Rect(x, y, width, height, **style))
+
+    def line(self, x0, y0, x1, y1, **style):
+        return self.add(Line(x0, y0, x1, y1, **style))
+
+    def circle(self, x, y, radius, **style):
+        return self.add(Circle(x, y, radius, **style))
+
+    def arc(self, x, y, radius, theta1, theta2, **style):
+        return self.add(Arc(x, y, radius, theta1, theta2, **style))
+
+    def text(self, x, y, text, **style):
+        return self.add(Text(x, y, text, **style))
+
+    def arrow(self, x0, y0, x1, y1, **style):
+        return self.add(Arrow(x0, y0, x1, y1, **style))
+
+    def set_view(self, xlim, ylim, bounds=None):
+        self.xlim = xlim
+        self.ylim = ylim
+        self.bounds = bounds or (xlim[0], ylim[0], xlim[1], ylim[1])
+
+    def extent(self):
+        """(x0, y0, x1, y1) to show: the bounds, or the extent of the geometry when no view is set"""
+        if self.bounds is not None:
+            return self.bounds
+        xs, ys = [], []
+        for primitive in self.primitives:
+            if primitive.kind in ('line', 'arrow'):
+                xs += [primitive.x0, primitive.x1]
+                ys += [primitive.y0, primitive.y1]
+            elif primitive.kind == 'rect':
+                xs += [primitive.x, primitive.x + primitive.width]
+                ys += [primitive.y, primitive.y + primitive.height]
+            else:
+                radius = getattr(primitive, 'radius', 0)
+                xs += [primitive.x - radius, primitive.x + radius]
+                ys += [primitive.y - radius, primitive.y + radius]
+        if not xs:
+            return (0, 0, 1, 1)
+        return (min(xs), min(ys), max(xs), max(ys))
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+Layout pass for shop drawings: panels in, drawing_ir.Drawing out.
+
+All SHOPGEN geometry (stile and rail sizes, hinge positions, swing arcs, wall hatching,
+dimension lines) lives here as pure Python, so it can be cached, tested and benchmarked
+without matplotlib. Primitives are emitted in the same order the original matplotlib code
+added its artists, which keeps the rendered output identical; batching is left to the backends,
+which only join primitives that paint next to each other.
+"""
+
+import math
+from drawing_ir import Drawing
+
+# Architectural conventions (inches) - EXACT COPY FROM SHOPGEN
+FRAME_THICKNESS = 0.75
+GLASS_STOP = 0.5
+HANDLE_LENGTH = 6
+DIM_LINE_OFFSET = 12
+DIM_FONT_SIZE = 9
+PANEL_LABEL_FONT_SIZE = 8
+
+# Swing Door details
+SWING_HEADER = 5
+SWING_BOTTOM = 10
+SWING_STILE = 4
+# Sliding Door details
+SLIDING_HEADER = 5
+SLIDING_BOTTOM = 5
+SLIDING_LOCK_RAIL = 4
+SLIDING_OUTER_STILE = 2
+# Fixed Panel details
+FIXED_HEADER = 5
+FIXED_BOTTOM = 5
+FIXED_STILE = 1
+FIXED_TERMINATING_STILE = 4
+
+# Native figure sizes (inches) of the standalone plan views
+PLAN_FIGSIZE = (10, 4)
+CORNER_PLAN_FIGSIZE = (12, 8)
+
+# Rectangle styles of the architectural elevation. Rectangles are emitted in panel order, not grouped
+# by style: a sliding door's filled track paints over the rails of the panels before it and under
+# the rails of the panels after it
+ELEVATION_RECTANGLE_STYLES = {
+    'frame': dict(edgecolor='black', facecolor='none', linewidth=0.8),
+    'glass_stop': dict(edgecolor='royalblue', facecolor='none', linewidth=0.7, linestyle=':'),
+    'track': dict(edgecolor='gray', facecolor='gray', linewidth=0),
+}
+
+def elevation_figure_size(panels, height):
+    """Native (width, height) in inches of the standalone architectural elevation figure"""
+    total_width = sum([p["width"] for p in panels])
+    scale = min(12 / total_width, 6 / height)
+    return total_width * scale, height * scale
+
+def plan_figure_size(panels):
+    """Native (width, height) in inches of the standalone plan view figure"""
+    if any(p["type"] == "Corner" for p in panels):
+        return CORNER_PLAN_FIGSIZE
+    return PLAN_FIGSIZE
+
+def arange(start, stop, step):
+    """Values start, start + step, ... below stop (same count and values as numpy.arange)"""
+    count = max(0, math.ceil((stop - start) / step))
+    return [start + i * step for i in range(count)]
+
+def hatch_wall_extension(drawing, lo, hi, base, depth, spacing=2.5, vertical=False):
+    """
+    Emit the 45-degree hatching of one wall extension.
+
+    The extension spans lo..hi along the wall (x for horizontal walls, y for vertical ones);
+    base is the wall face the hatch lines start from and depth the wall thickness. Lines are
+    clipped to lo..hi. Returns the emitted lines.
+    """
+    lines = []
+    for start in arange(lo - depth, hi, spacing):
+        a0 = max(start, lo)
+        a1 = min(start + depth, hi)
+        if a0 < hi and a1 > lo:
+            b1 = base + (a1 - a0)
+            if vertical:
+                lines.append(drawing.line(base, a0, b1, a1, color='black', linewidth=0.8))
+            else:
+                lines.append(drawing.line(a0, base, a1, b1, color='black', linewidth=0.8))
+    return lines
+
+def layout_architectural_elevation(panels, height, frame_color="black", show_mullions=False):
+    """
+    Layout of draw_architectural_elevation (SHOPGEN proportions). The view is the panels
+    themselves; bounds also take in the panel numbers, dimensions and the glass label.
+    """
+    total_width = sum([p["width"] for p in panels])
+    drawing = Drawing(figsize=elevation_figure_size(panels, height))
+    drawing.set_view((0, total_width), (0, height),
+                     bounds=(-14, -20, total_width + 2, height + DIM_LINE_OFFSET + 10))
+
+    # Draw panels
+    x = 0
+    for idx, panel in enumerate(panels):
+        w = panel["width"]
+        # Panel number label
+        drawing.text(x + w/2, height + 6, f"{idx+1}", ha='center', va='bottom', fontsize=PANEL_LABEL_FONT_SIZE)
+        px = x  # No gap
+        py = 0  # No gap
+        pw = w
+        ph = height
+        # Determine stile widths for fixed panel
+        left_stile = FIXED_STILE
+        right_stile = FIXED_STILE
+        if panel["type"] == "Fixed":
+            if idx == 0:
+                left_stile = FIXED_TERMINATING_STILE
+            if idx == len(panels)-1:
+                right_stile = FIXED_TERMINATING_STILE
+        # Draw rails/stiles for each panel type
+        if panel["type"] == "Fixed":
+            # Hide stiles if adjacent to sliding door (single boundary stile approach)
+            hide_left = idx > 0 and panels[idx-1]["type"] == "Sliding Door"
+            hide_right = idx < len(panels)-1 and panels[idx+1]["type"] == "Sliding Door"
+            # Set stile widths to 0 if hidden
+            left_stile_draw = left_stile if not hide_left else 0
+            right_stile_draw = right_stile if not hide_right else 0
+            # Left stile
+            if not hide_left:
+                drawing.rect(px, py, left_stile, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Right stile
+            if not hide_right:
+                drawing.rect(px+pw-right_stile, py, right_stile, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Top rail
+            drawing.rect(px+left_stile_draw, py+ph-FIXED_HEADER, pw-left_stile_draw-right_stile_draw, FIXED_HEADER, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Bottom rail
+            drawing.rect(px+left_stile_draw, py, pw-left_stile_draw-right_stile_draw, FIXED_BOTTOM, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Glass stop (single rectangle inside frame, inset 1.0")
+            gs_x = px + left_stile_draw + 1.0
+            gs_y = py + FIXED_BOTTOM + 1.0
+            gs_w = pw - left_stile_draw - right_stile_draw - 2.0
+            gs_h = ph - FIXED_HEADER - FIXED_BOTTOM - 2.0
+            drawing.rect(gs_x, gs_y, gs_w, gs_h, **ELEVATION_RECTANGLE_STYLES['glass_stop'])
+        elif panel["type"] == "Swing Door":
+            # Left stile
+            drawing.rect(px, py, SWING_STILE, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Right stile
+            drawing.rect(px+pw-SWING_STILE, py, SWING_STILE, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Top rail (5") at the very top
+            drawing.rect(px+SWING_STILE, py+ph-5, pw-2*SWING_STILE, 5, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Bottom rail (10") at the very bottom
+            drawing.rect(px+SWING_STILE, py, pw-2*SWING_STILE, 10, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Glass stop (single rectangle inside frame, inset 1.0")
+            gs_x = px + SWING_STILE + 1.0
+            gs_y = py + 10 + 1.0
+            gs_w = pw - 2*SWING_STILE - 2.0
+            gs_h = ph - 5 - 10 - 2.0
+            drawing.rect(gs_x, gs_y, gs_w, gs_h, **ELEVATION_RECTANGLE_STYLES['glass_stop'])
+            # Handle
+            handle_y = py + ph/2
+            if "Left" in panel["swing_direction"]:
+                handle_x = px + pw - SWING_STILE - HANDLE_LENGTH
+            else:
+                handle_x = px + SWING_STILE
+            drawing.line(handle_x, handle_y, handle_x+HANDLE_LENGTH, handle_y, color='black', linewidth=1.5)
+        elif panel["type"] == "Sliding Door":
+            slide_dir = panel["sliding_direction"]
+            if slide_dir == "Left":
+                # Outer stile (2") on left, lock stile (4") on right
+                outer_x = px
+                lock_x = px + pw - SLIDING_LOCK_RAIL
+                rail_x0 = px + SLIDING_OUTER_STILE
+                rail_x1 = px + pw - SLIDING_LOCK_RAIL
+            else:  # "Right"
+                # Lock stile (4") on left, outer stile (2") on right
+                lock_x = px
+                outer_x = px + pw - SLIDING_OUTER_STILE
+                rail_x0 = px + SLIDING_LOCK_RAIL
+                rail_x1 = px + pw - SLIDING_OUTER_STILE
+            # Always draw both stiles, flush with panel edges
+            drawing.rect(outer_x, py, SLIDING_OUTER_STILE, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            drawing.rect(lock_x, py, SLIDING_LOCK_RAIL, ph, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Top rail (5")
+            drawing.rect(rail_x0, py+ph-5, rail_x1-rail_x0, 5, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Bottom rail (5")
+            drawing.rect(rail_x0, py, rail_x1-rail_x0, 5, **ELEVATION_RECTANGLE_STYLES['frame'])
+            # Glass stop (single rectangle inside frame, inset 1.0")
+            gs_x = rail_x0 + 1.0
+            gs_y = py + 5 + 1.0
+            gs_w = rail_x1 - rail_x0 - 2.0
+            gs_h = ph - 5 - 5 - 2.0
+            drawing.rect(gs_x, gs_y, gs_w, gs_h, **ELEVATION_RECTANGLE_STYLES['glass_stop'])
+            # Handle (vertical bar on lock stile)
+            handle_height = ph * 0.3
+            handle_y0 = py + (ph - handle_height) / 2
+            handle_x = (lock_x + SLIDING_LOCK_RAIL/2 - 0.5)
+            drawing.line(handle_x, handle_y0, handle_x, handle_y0+handle_height, color='black', linewidth=3)
+            # Track
+            drawing.rect(px, py+ph-GLASS_STOP, pw, GLASS_STOP, **ELEVATION_RECTANGLE_STYLES['track'])
+            # Arrow for sliding direction
+            arrow_y = py+ph-GLASS_STOP-2
+            if slide_dir == "Left":
+                drawing.arrow(px+pw-10, arrow_y, px+5, arrow_y, style='->', linewidth=0.8)
+            else:
+                drawing.arrow(px+10, arrow_y, px+pw-5, arrow_y, style='->', linewidth=0.8)
+        # Draw mullion if needed (between panels)
+        if show_mullions and idx > 0:
+            drawing.line(x, 0, x, height, color=frame_color, linewidth=1)
+        x += w  # Panels touch exactly, no gap
+
+    # Label
+    drawing.text(total_width / 2, -18, "CLEAR GLASS", ha='center', fontsize=12)
+
+    # Dimension lines (overall width)
+    drawing.arrow(total_width, height + DIM_LINE_OFFSET, 0, height + DIM_LINE_OFFSET, style='<->', linewidth=0.8, clip=False)
+    drawing.text(total_width/2, height + DIM_LINE_OFFSET + 3, f'{total_width}"', ha='center', va='bottom', fontsize=DIM_FONT_SIZE)
+    # Height dimension
+    drawing.arrow(-7, height, -7, 0, style='<->', linewidth=0.8, clip=False)
+    drawing.text(-10, height/2, f'{height}"', ha='center', va='center', fontsize=DIM_FONT_SIZE, rotation=90)
+
+    return drawing
+
+def layout_miniature_elevation(panels, height):
+    """Layout of the simplified miniature elevation used on quotes"""
+    total_width = sum([p['width'] for p in panels])
+    fig_width = min(4, max(2, total_width / 30))  # Scale based on total width, cap at 4"
+    fig_height = min(3, max(1.5, height / 40))    # Scale based on height, cap at 3"
+    drawing = Drawing(figsize=(fig_width, fig_height))
+
+    # Simplified constants for miniature
+    MINI_STILE = 0.5
+    MINI_RAIL = 1.0
+
+    x = 0
+    for idx, panel in enumerate(panels):
+        w = panel['width']
+        px = x
+        py = 0
+        pw = w
+        ph = height
+
+        # Simplified panel drawing
+        if panel["type"] == "Fixed":
+            # Just draw frame outline and glass indication
+            drawing.rect(px, py, pw, ph, edgecolor='black', facecolor='none', linewidth=0.5)
+            # Glass area (simplified)
+            glass_inset = min(MINI_STILE, w/8)
+            drawing.rect(px+glass_inset, py+MINI_RAIL, pw-2*glass_inset, ph-2*MINI_RAIL,
+                         edgecolor='royalblue', facecolor='none', linewidth=0.3, linestyle=':')
+        elif panel["type"] in ["Swing Door", "Sliding Door"]:
+            # Draw frame
+            drawing.rect(px, py, pw, ph, edgecolor='black', facecolor='none', linewidth=0.5)
+            # Top and bottom rails
+            drawing.rect(px+MINI_STILE, py+ph-MINI_RAIL, pw-2*MINI_STILE, MINI_RAIL,
+                         edgecolor='black', facecolor='none', linewidth=0.3)
+            drawing.rect(px+MINI_STILE, py, pw-2*MINI_STILE, MINI_RAIL,
+                         edgecolor='black', facecolor='none', linewidth=0.3)
+            # Glass area
+            drawing.rect(px+MINI_STILE, py+MINI_RAIL, pw-2*MINI_STILE, ph-2*MINI_RAIL,
+                         edgecolor='royalblue', facecolor='none', linewidth=0.3, linestyle=':')
+
+        x += w
+
+    drawing.set_view((-1, total_width + 1), (-2, height + 2))
+    drawing.aspect_equal = True
+    return drawing
+
+def _fixed_panel_glass(drawing, left, right, wall_y, wall_bot_y, wall_h, fixed_panel_count):
+    """Three blue glass lines, edge marks and the F<n> tag of a fixed panel in a horizontal wall"""
+    gap = 2  # Gap between lines
+    # Top solid line
+    drawing.line(left, wall_y + gap, right, wall_y + gap, color='royalblue', linewidth=1, linestyle='-')
+    # Center dotted line (existing)
+    drawing.line(left, wall_y, right, wall_y, color='royalblue', linewidth=1, linestyle=':')
+    # Bottom solid line
+    drawing.line(left, wall_y - gap, right, wall_y - gap, color='royalblue', linewidth=1, linestyle='-')
+    # Add vertical division lines at edges of fixed panel for better distinction
+    drawing.line(left, wall_bot_y, left, wall_bot_y + wall_h, color='black', linewidth=2, zorder=12)
+    drawing.line(right, wall_bot_y, right, wall_bot_y + wall_h, color='black', linewidth=2, zorder=12)
+    # Add panel number for distinction
+    _panel_tag(drawing, (left + right) / 2, wall_y, fixed_panel_count)
+
+def _fixed_panel_glass_vertical(drawing, bottom, top, wall_x, wall_left_x, wall_w, fixed_panel_count):
+    """Fixed panel glass lines, edge marks and tag in a vertical wall"""
+    gap = 2  # Gap between lines
+    # Left solid line
+    drawing.line(wall_x - gap, bottom, wall_x - gap, top, color='royalblue', linewidth=1, linestyle='-')
+    # Center dotted line (existing)
+    drawing.line(wall_x, bottom, wall_x, top, color='royalblue', linewidth=1, linestyle=':')
+    # Right solid line
+    drawing.line(wall_x + gap, bottom, wall_x + gap, top, color='royalblue', linewidth=1, linestyle='-')
+    # Add horizontal division lines at edges of fixed panel for better distinction
+    drawing.line(wall_left_x, bottom, wall_left_x + wall_w, bottom, color='black', linewidth=2, zorder=12)
+    drawing.line(wall_left_x, top, wall_left_x + wall_w, top, color='black', linewidth=2, zorder=12)
+    # Add panel number for distinction
+    _panel_tag(drawing, wall_x, (bottom + top) / 2, fixed_panel_count)
+
+def _panel_tag(drawing, x, y, fixed_panel_count):
+    drawing.circle(x, y, 3, edgecolor='white', facecolor='white', linewidth=1, zorder=15)
+    drawing.circle(x, y, 3, edgecolor='royalblue', facecolor='none', linewidth=1.5, zorder=16)
+    drawing.text(x, y, f'F{fixed_panel_count}', ha='center', va='center', fontsize=8, color='royalblue', fontweight='bold', zorder=17)
+
+def _door_hinge(drawing, hinge_x, hinge_y, door_length, door_thickness, door_angle, theta1, theta2, tip_angle, arrow_dx, arrow_dy, vertical=False):
+    """
+    Open swing door leaf, hinge and swing arc shared by the horizontal and vertical walls.
+    The leaf rectangle is rotated by door_angle about the hinge; the arc runs theta1..theta2
+    and the arrow (drawn from arrow_dx, arrow_dy away) points at the arc at tip_angle.
+    """
+    if vertical:
+        drawing.rect(hinge_x, hinge_y, door_thickness, door_length, angle=door_angle,
+                     edgecolor='black', facecolor='black', linewidth=2.5, zorder=10)
+    else:
+        drawing.rect(hinge_x, hinge_y, door_length, door_thickness, angle=door_angle,
+                     edgecolor='black', facecolor='black', linewidth=2.5, zorder=10)
+    # Hinge point (dot)
+    drawing.circle(hinge_x, hinge_y, 0.7, edgecolor='black', facecolor='black', zorder=20)
+    # --- Swing arc (quarter-circle, radius = door width, from hinge point) ---
+    drawing.aspect_equal = True
+    arc_radius = door_length
+    drawing.arc(hinge_x, hinge_y, arc_radius, theta1, theta2, color='black', linewidth=1.7, zorder=5)
+    arc_tip_angle = math.radians(tip_angle)
+    # Arc arrow at tip
+    arrow_x = hinge_x + arc_radius * math.cos(arc_tip_angle)
+    arrow_y = hinge_y + arc_radius * math.sin(arc_tip_angle)
+    drawing.arrow(arrow_x + arrow_dx, arrow_y + arrow_dy, arrow_x, arrow_y, style='->', linewidth=1.2)
+    # --- Frame hardware (simple circle at hinge) ---
+    drawing.circle(hinge_x, hinge_y, 0.4, edgecolor='white', facecolor='white', linewidth=1.2, zorder=21)
+    drawing.circle(hinge_x, hinge_y, 0.2, edgecolor='black', facecolor='black', zorder=22)
+
+def layout_horizontal_wall_segment(drawing, widths, panel_types, panels, start_x, start_y, door_idx, door_swing, wall_thickness, frame_depth, door_thickness, draw_left_ext=True, draw_right_ext=True, door_type='Swing Door', door_sliding='Left'):
+    """
+    Horizontal run of wall with its fixed panels and (swing or sliding) door, SHOPGEN style.
+    Wall extensions are left off on a side that meets a corner.
+    """
+    if not widths:
+        return
+
+    # --- Parameters from original ---
+    total_width = sum(widths)
+    wall_y = start_y
+    wall_h = wall_thickness
+    wall_x0 = start_x
+    wall_x1 = start_x + total_width
+    frame_lines = [0, 0.75, 1.5]  # offsets for frame, stop, pocket
+    frame_w = frame_depth
+    wall_bot_y = wall_y - wall_h/2
+    wall_ext = 20  # wall extension length
+    hatch_spacing = 2.5
+
+    # --- Draw wall extensions (left and right) - only if not adjacent to corner ---
+    if draw_left_ext:
+        drawing.rect(wall_x0 - wall_ext, wall_bot_y, wall_ext, wall_h, edgecolor='black', facecolor='none', linewidth=2.5)
+    if draw_right_ext:
+        drawing.rect(wall_x1, wall_bot_y, wall_ext, wall_h, edgecolor='black', facecolor='none', linewidth=2.5)
+
+    # --- Hatching for wall extensions only ---
+    if draw_left_ext:
+        hatch_wall_extension(drawing, wall_x0 - wall_ext, wall_x0, wall_bot_y, wall_h, hatch_spacing)
+    if draw_right_ext:
+        hatch_wall_extension(drawing, wall_x1, wall_x1 + wall_ext, wall_bot_y, wall_h, hatch_spacing)
+
+    # --- Draw panels and frames ---
+    x = wall_x0
+    fixed_panel_count = 0
+    for idx, (w, ptype) in enumerate(zip(widths, panel_types)):
+        left = x
+        right = x + w
+        # Draw panel separation lines ONLY at wall/panel interfaces (start and end of wall)
+        if idx == 0:
+            drawing.line(left, wall_bot_y, left, wall_bot_y + wall_h, color='black', linewidth=2)
+        if idx == len(panel_types) - 1:
+            drawing.line(right, wall_bot_y, right, wall_bot_y + wall_h, color='black', linewidth=2)
+        if ptype == 'Fixed':
+            fixed_panel_count += 1
+            # Fixed panel: opening with three blue glass lines
+            _fixed_panel_glass(drawing, left, right, wall_y, wall_bot_y, wall_h, fixed_panel_count)
+        elif ptype == door_type:
+            # Door opening: clear, detailed frame
+            drawing.rect(left, wall_bot_y, w, wall_h, edgecolor='none', facecolor='white', zorder=2)
+            # Draw 2-3 parallel lines at each jamb for frame depth
+            for offset in frame_lines:
+                # Left jamb of door opening
+                drawing.line(left + offset, wall_bot_y, left + offset, wall_bot_y + wall_h, color='black', linewidth=1.1 if offset==0 else 0.7)
+                # Right jamb of door opening
+                drawing.line(right - offset, wall_bot_y, right - offset, wall_bot_y + wall_h, color='black', linewidth=1.1 if offset==0 else 0.7)
+            door_length = w - 2*frame_w
+            if ptype == 'Swing Door':
+                # --- Door panel (rectangle, perpendicular to wall, open position) ---
+                if 'Left' in door_swing:
+                    hinge_x = left + frame_w
+                    _door_hinge(drawing, hinge_x, wall_y, door_length, door_thickness, 90, 0, 90, 90, -7, -7)
+                else:
+                    hinge_x = right - frame_w
+                    _door_hinge(drawing, hinge_x, wall_y, door_length, door_thickness, 90, 90, 180, 180, -7, -7)
+            else:
+                # --- Sliding door panel (shown in fully open position over neighboring panel) ---
+                # Position panel on hall side (above center line)
+                panel_y = wall_y + wall_h/2 + 2  # Above center line with small gap (hall side)
+                if door_sliding == "Left":
+                    # Panel slides left but stays on hall side, 70% above left neighboring panel
+                    panel_x = left + frame_w - door_length * 0.7  # Move 70% to the left
+                    # Arrow pointing left
+                    arrow_start_x = left + w/2
+                    arrow_end_x = left + w/4
+                else:  # "Right"
+                    # Panel slides right but stays on hall side, 70% above right neighboring panel
+                    panel_x = right - frame_w - door_length * 0.3  # Move 70% to the right
+                    # Arrow pointing right
+                    arrow_start_x = left + w/2
+                    arrow_end_x = left + 3*w/4
+                # Draw sliding panel (rectangular, parallel to wall, overlapping neighboring panel)
+                drawing.rect(panel_x, panel_y, door_length, door_thickness,
+                             edgecolor='black', facecolor='lightgray', linewidth=2.5, zorder=10)
+                # Track indicators (top and bottom of opening)
+                track_y1 = wall_bot_y + wall_h - 0.5
+                track_y2 = wall_bot_y + 0.5
+                drawing.line(left + frame_w, track_y1, right - frame_w, track_y1, color='gray', linewidth=2)
+                drawing.line(left + frame_w, track_y2, right - frame_w, track_y2, color='gray', linewidth=2)
+                # Direction arrow
+                drawing.arrow(arrow_start_x, wall_y, arrow_end_x, wall_y, style='->', linewidth=1.5, color='red')
+        x += w
+
+def layout_vertical_wall_segment(drawing, widths, panel_types, panels, start_x, start_y, door_idx, door_swing, wall_thickness, frame_depth, door_thickness, draw_bottom_ext=True, draw_top_ext=True, door_type='Swing Door', door_sliding='Left'):
+    """Vertical run of wall (the leg after a corner): layout_horizontal_wall_segment rotated 90 degrees"""
+    if not widths:
+        return
+
+    # --- Parameters adapted for vertical orientation ---
+    total_height = sum(widths)  # widths become heights
+    wall_x = start_x
+    wall_w = wall_thickness
+    wall_y0 = start_y
+    wall_y1 = start_y + total_height
+    frame_lines = [0, 0.75, 1.5]  # offsets for frame, stop, pocket
+    frame_w = frame_depth
+    wall_left_x = wall_x - wall_w/2
+    wall_ext = 20  # wall extension length
+    hatch_spacing = 2.5
+
+    # --- Draw wall extensions (top and bottom) - only if not adjacent to corner ---
+    if draw_bottom_ext:
+        drawing.rect(wall_left_x, wall_y0 - wall_ext, wall_w, wall_ext, edgecolor='black', facecolor='none', linewidth=2.5)
+    if draw_top_ext:
+        drawing.rect(wall_left_x, wall_y1, wall_w, wall_ext, edgecolor='black', facecolor='none', linewidth=2.5)
+
+    # --- Hatching for wall extensions only (rotated 90 degrees) ---
+    if draw_bottom_ext:
+        hatch_wall_extension(drawing, wall_y0 - wall_ext, wall_y0, wall_left_x, wall_w, hatch_spacing, vertical=True)
+    if draw_top_ext:
+        hatch_wall_extension(drawing, wall_y1, wall_y1 + wall_ext, wall_left_x, wall_w, hatch_spacing, vertical=True)
+
+    # --- Draw panels and frames vertically ---
+    y = wall_y0
+    fixed_panel_count = 0
+    for idx, (w, ptype) in enumerate(zip(widths, panel_types)):
+        bottom = y
+        top = y + w
+        # Draw panel separation lines ONLY at wall/panel interfaces (start and end of wall)
+        if idx == 0:
+            drawing.line(wall_left_x, bottom, wall_left_x + wall_w, bottom, color='black', linewidth=2)
+        if idx == len(panel_types) - 1:
+            drawing.line(wall_left_x, top, wall_left_x + wall_w, top, color='black', linewidth=2)
+        if ptype == 'Fixed':
+            fixed_panel_count += 1
+            # Fixed panel: opening with three blue glass lines
+            _fixed_panel_glass_vertical(drawing, bottom, top, wall_x, wall_left_x, wall_w, fixed_panel_count)
+        elif ptype == door_type:
+            # Door opening: clear, detailed frame
+            drawing.rect(wall_left_x, bottom, wall_w, w, edgecolor='none', facecolor='white', zorder=2)
+            # Draw 2-3 parallel lines at each jamb for frame depth
+            for offset in frame_lines:
+                # Bottom jamb of door opening
+                drawing.line(wall_left_x, bottom + offset, wall_left_x + wall_w, bottom + offset, color='black', linewidth=1.1 if offset==0 else 0.7)
+                # Top jamb of door opening
+                drawing.line(wall_left_x, top - offset, wall_left_x + wall_w, top - offset, color='black', linewidth=1.1 if offset==0 else 0.7)
+            door_length = w - 2*frame_w
+            if ptype == 'Swing Door':
+                # --- Door panel (rectangle, perpendicular to wall, open position) ---
+                if 'Left' in door_swing:
+                    # open rightward (when wall is vertical)
+                    _door_hinge(drawing, wall_x, bottom + frame_w, door_length, door_thickness, 0, 270, 360, 0, -7, 7, vertical=True)
+                else:
+                    # open leftward
+                    _door_hinge(drawing, wall_x, top - frame_w, door_length, door_thickness, 180, 180, 270, 270, -7, 7, vertical=True)
+            else:
+                # --- Sliding door panel (shown in fully open position, rotated) ---
+                # Position panel on hall side (right of center line for vertical walls)
+                panel_x = wall_x + wall_w/2 + 2  # To right of center line with small gap (hall side)
+                if door_sliding == "Left":
+                    # Panel slides "up" in vertical orientation but stays on hall side
+                    panel_y = bottom + frame_w - door_length * 0.7  # Move 70% up
+                    # Arrow pointing up
+                    arrow_start_y = bottom + w/2
+                    arrow_end_y = bottom + w/4
+                else:  # "Right"
+                    # Panel slides "down" in vertical orientation but stays on hall side
+                    panel_y = top - frame_w - door_length * 0.3  # Move 70% down
+                    # Arrow pointing down
+                    arrow_start_y = bottom + w/2
+                    arrow_end_y = bottom + 3*w/4
+                # Draw sliding panel (rectangular, parallel to wall, overlapping neighboring panel)
+                drawing.rect(panel_x, panel_y, door_thickness, door_length,
+                             edgecolor='black', facecolor='lightgray', linewidth=2.5, zorder=10)
+                # Track indicators (left and right of opening)
+                track_x1 = wall_left_x + wall_w - 0.5
+                track_x2 = wall_left_x + 0.5
+                drawing.line(track_x1, bottom + frame_w, track_x1, top - frame_w, color='gray', linewidth=2)
+                drawing.line(track_x2, bottom + frame_w, track_x2, top - frame_w, color='gray', linewidth=2)
+                # Direction arrow (vertical)
+                drawing.arrow(wall_x, arrow_start_y, wall_x, arrow_end_y, style='->', linewidth=1.5, color='red')
+        y += w
+
+def _panel_dimensions(drawing, widths, x, dim_y):
+    """Dimension line and width label under each panel of a horizontal wall"""
+    for w in widths:
+        drawing.arrow(x + w, dim_y, x, dim_y, style='<->', linewidth=1.5)
+        drawing.text(x + w/2, dim_y-2, f'{w}"', ha='center', va='top', fontsize=16, fontweight='bold')
+        x += w
+
+def layout_topdown_swing_fixed(widths, door_idx, door_swing, panel_types, wall_thickness=8, frame_depth=3, door_thickness=2, opening_height=40):
+    """Plan view of a straight wall with a swing door and fixed panels (SHOPGEN)"""
+    drawing = Drawing(figsize=PLAN_FIGSIZE)
+    layout_horizontal_wall_segment(drawing, widths, panel_types, None, 0, 0, door_idx, door_swing,
+                                   wall_thickness, frame_depth, door_thickness)
+    total_width = sum(widths)
+    wall_bot_y = -wall_thickness/2
+    wall_ext = 20
+    # --- Dimension lines for each panel ---
+    _panel_dimensions(drawing, widths, 0, wall_bot_y - 10)
+    # --- Room labels ---
+    # Place based on swing direction
+    if 'Left' in door_swing:
+        drawing.text(-wall_ext + 10, wall_bot_y - 20, 'HALL', ha='left', va='top', fontsize=20, fontweight='bold')
+        drawing.text(total_width + wall_ext - 10, wall_bot_y + wall_thickness + 30, 'OFFICE', ha='right', va='bottom', fontsize=20, fontweight='bold')
+    else:
+        drawing.text(-wall_ext + 10, wall_bot_y + wall_thickness + 30, 'HALL', ha='left', va='bottom', fontsize=20, fontweight='bold')
+        drawing.text(total_width + wall_ext - 10, wall_bot_y - 20, 'OFFICE', ha='right', va='top', fontsize=20, fontweight='bold')
+    # --- Styling ---
+    drawing.set_view((-wall_ext - 10, total_width + wall_ext + 10), (wall_bot_y - 40, wall_bot_y + wall_thickness + 60))
+    return drawing
+
+def layout_topdown_sliding_fixed(widths, door_idx, door_sliding, panel_types, wall_thickness=8, frame_depth=3, door_thickness=2, opening_height=40):
+    """Plan view of a straight wall with a sliding door (shown open over its neighbor) and fixed panels"""
+    drawing = Drawing(figsize=PLAN_FIGSIZE)
+    layout_horizontal_wall_segment(drawing, widths, panel_types, None, 0, 0, door_idx, 'Right In',
+                                   wall_thickness, frame_depth, door_thickness,
+                                   door_type='Sliding Door', door_sliding=door_sliding)
+    total_width = sum(widths)
+    wall_bot_y = -wall_thickness/2
+    wall_ext = 20
+    # --- Dimension lines for each panel (same as swing door) ---
+    _panel_dimensions(drawing, widths, 0, wall_bot_y - 10)
+    # --- Room labels - Hall always on top (where sliding door panel is) ---
+    drawing.text(-wall_ext + 10, wall_bot_y + wall_thickness + 30, 'HALL', ha='left', va='bottom', fontsize=20, fontweight='bold')
+    # Office is always below the wall
+    drawing.text(total_width + wall_ext - 10, wall_bot_y - 20, 'OFFICE', ha='right', va='top', fontsize=20, fontweight='bold')
+    # --- Styling (same as swing door) ---
+    drawing.set_view((-wall_ext - 10, total_width + wall_ext + 10), (wall_bot_y - 40, wall_bot_y + wall_thickness + 60))
+    drawing.aspect_equal = True
+    return drawing
+
+def _layout_topdown_with_corner(widths, door_idx, panel_types, panels, corner_idx, wall_thickness, frame_depth, door_thickness, door_type, door_swing, door_sliding):
+    """
+    Simple corner implementation: draw normally until the corner, then draw perpendicular.
+    The door is only drawn in the leg that contains it.
+    """
+    drawing = Drawing(figsize=CORNER_PLAN_FIGSIZE)
+    # A sliding door plan draws the leg without the door like a swing door wall
+    other_leg_swing = door_swing if door_type == 'Swing Door' else 'Right In'
+
+    # Draw first segment (before corner) - horizontal
+    if corner_idx > 0:
+        door_here = door_idx < corner_idx
+        layout_horizontal_wall_segment(drawing, widths[:corner_idx], panel_types[:corner_idx], panels[:corner_idx], 0, 0,
+                                       door_idx if door_here else -1, door_swing if door_here else other_leg_swing,
+                                       wall_thickness, frame_depth, door_thickness, draw_left_ext=True, draw_right_ext=False,
+                                       door_type=door_type if door_here else 'Swing Door', door_sliding=door_sliding)
+
+    # Draw second segment (after corner) - vertical
+    if corner_idx < len(panel_types) - 1:
+        start_x = sum(widths[:corner_idx]) if corner_idx > 0 else 0
+        door_here = door_idx > corner_idx
+        layout_vertical_wall_segment(drawing, widths[corner_idx + 1:], panel_types[corner_idx + 1:], panels[corner_idx + 1:], start_x, 0,
+                                     door_idx - corner_idx - 1 if door_here else -1, door_swing if door_here else other_leg_swing,
+                                     wall_thickness, frame_depth, door_thickness, draw_bottom_ext=False, draw_top_ext=True,
+                                     door_type=door_type if door_here else 'Swing Door', door_sliding=door_sliding)
+
+    # --- Add exterior dimension lines for corner openings ---
+    # Horizontal dimensions for first segment (below the wall)
+    if corner_idx > 0:
+        _panel_dimensions(drawing, widths[:corner_idx], 0, -wall_thickness/2 - 10)
+
+    # Vertical dimensions for second segment (to the right of the wall)
+    if corner_idx < len(panel_types) - 1:
+        start_x = sum(widths[:corner_idx]) if corner_idx > 0 else 0
+        dim_x = start_x + 15  # position to the right of vertical wall
+        y = 0
+        for w in widths[corner_idx + 1:]:
+            drawing.arrow(dim_x, y + w, dim_x, y, style='<->', linewidth=1.5)
+            drawing.text(dim_x+2, y + w/2, f'{w}"', ha='left', va='center', fontsize=16, fontweight='bold', rotation=90)
+            y += w
+
+    # Set axis limits to include dimension areas
+    all_x = [0, sum(widths[:corner_idx]) if corner_idx > 0 else 0]
+    all_y = [0]
+    if corner_idx < len(panel_types) - 1:
+        all_y.append(sum(widths[corner_idx + 1:]))
+    drawing.set_view((min(all_x) - 25, max(all_x) + 25), (min(all_y) - 25, max(all_y) + 25))
+    drawing.aspect_equal = True
+    return drawing
+
+def layout_topdown_swing_fixed_with_corners(widths, door_idx, door_swing, panel_types, panels, wall_thickness=8, frame_depth=3, door_thickness=2, opening_height=40):
+    """Swing door plan view that turns 90 degrees at the first corner panel"""
+    if 'Corner' not in panel_types:
+        return layout_topdown_swing_fixed(widths, door_idx, door_swing, panel_types, wall_thickness, frame_depth, door_thickness, opening_height)
+    return _layout_topdown_with_corner(widths, door_idx, panel_types, panels, panel_types.index('Corner'),
+                                       wall_thickness, frame_depth, door_thickness, 'Swing Door', door_swing, 'Left')
+
+def layout_topdown_sliding_fixed_with_corners(widths, door_idx, door_sliding, panel_types, panels, wall_thickness=8, frame_depth=3, door_thickness=2, opening_height=40):
+    """Sliding door plan view that turns 90 degrees at the first corner panel"""
+    if 'Corner' not in panel_types:
+        return layout_topdown_sliding_fixed(widths, door_idx, door_sliding, panel_types, wall_thickness, frame_depth, door_thickness, opening_height)
+    return _layout_topdown_with_corner(widths, door_idx, panel_types, panels, panel_types.index('Corner'),
+                                       wall_thickness, frame_depth, door_thickness, 'Sliding Door', 'Right In', door_sliding)
+
+def layout_plan_view(panels):
+    """
+    Layout of the plan view that matches the opening's door type (swing takes precedence over
+    sliding), or None when the opening has no door to show in plan.
+    """
+    panel_types = [p['type'] for p in panels]
+    widths = [p['width'] for p in panels]
+
+    if 'Swing Door' in panel_types:
+        # Use original SHOPGEN swing door plan view
+        door_idx = panel_types.index('Swing Door')
+        door_swing = panels[door_idx]['swing_direction']
+        return layout_topdown_swing_fixed_with_corners(widths, door_idx, door_swing, panel_types, panels)
+    elif 'Sliding Door' in panel_types:
+        # Use custom sliding door plan view
+        door_idx = panel_types.index('Sliding Door')
+        door_sliding = panels[door_idx]['sliding_direction']
+        return layout_topdown_sliding_fixed_with_corners(widths, door_idx, door_sliding, panel_types, panels)
+    return None
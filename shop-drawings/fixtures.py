@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Sample payloads and helpers shared by the tests and benchmark.py: synthetic projects shaped like
+the Prisma payload, CLI startup timing and an api/drawings.py server on a free port.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Tests and benchmarks measure rendering, not the render cache (unless they set up their own cache)
+os.environ.setdefault('SHOP_DRAWINGS_CACHE', '0')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_sample_opening(index):
+    """Build a synthetic opening shaped like the Prisma payload sent by the Next.js routes"""
+    door_type = 'SWING_DOOR' if index % 2 == 0 else 'SLIDING_DOOR'
+    door_name = 'Swing Door' if door_type == 'SWING_DOOR' else 'Sliding Door'
+    hardware_category = {
+        'id': 1,
+        'name': 'Hardware',
+        'individualOptions': [
+            {'id': 10, 'name': 'Lever Handle', 'price': 120},
+            {'id': 11, 'name': 'Pull Handle', 'price': 95},
+        ]
+    }
+    return {
+        'id': index + 1,
+        'name': f'{index + 1}',
+        'finishColor': 'Black',
+        'price': 4500 + index * 10,
+        'panels': [
+            {
+                'id': index * 3 + 1,
+                'width': 36,
+                'height': 96,
+                'glassType': 'Clear',
+                'swingDirection': 'Right In',
+                'slidingDirection': 'Left',
+                'componentInstance': {
+                    'subOptionSelections': '{}',
+                    'product': {
+                        'id': 1,
+                        'productType': 'FIXED_PANEL',
+                        'name': 'Fixed Panel',
+                        'productSubOptions': [],
+                        'productBOMs': [
+                            {'partName': 'Frame Extrusion', 'partType': 'Extrusion', 'description': 'Perimeter frame',
+                             'unit': 'ft', 'quantity': 1, 'cost': 12.5, 'formula': 'width'},
+                        ]
+                    }
+                }
+            },
+            {
+                'id': index * 3 + 2,
+                'width': 42,
+                'height': 96,
+                'glassType': 'Clear',
+                'swingDirection': 'Left In',
+                'slidingDirection': 'Right',
+                'componentInstance': {
+                    'subOptionSelections': json.dumps({'1': 10}),
+                    'product': {
+                        'id': 2 if door_type == 'SWING_DOOR' else 3,
+                        'productType': door_type,
+                        'name': door_name,
+                        'productSubOptions': [{'category': hardware_category}],
+                        'productBOMs': [
+                            {'partName': 'Door Stile', 'partType': 'Extrusion', 'description': 'Door stile',
+                             'unit': 'ft', 'quantity': 2, 'cost': 18, 'formula': 'height'},
+                            {'partName': 'Hinge', 'partType': 'Hardware', 'description': 'Butt hinge',
+                             'unit': 'ea', 'quantity': 3, 'cost': 14},
+                        ]
+                    }
+                }
+            },
+            {
+                'id': index * 3 + 3,
+                'width': 36,
+                'height': 96,
+                'glassType': 'Clear',
+                'swingDirection': 'Right In',
+                'slidingDirection': 'Left',
+                'componentInstance': {
+                    'subOptionSelections': '{}',
+                    'product': {
+                        'id': 1,
+                        'productType': 'FIXED_PANEL',
+                        'name': 'Fixed Panel',
+                        'productSubOptions': [],
+                        'productBOMs': []
+                    }
+                }
+            }
+        ]
+    }
+
+
+def make_sample_project(openings=10):
+    """Build a synthetic project with the given number of openings"""
+    return {
+        'id': 1,
+        'name': 'Benchmark Project',
+        'status': 'QUOTE_SENT',
+        'createdAt': '2026-01-05T12:00:00.000Z',
+        'updatedAt': '2026-01-05T12:00:00.000Z',
+        'openings': [make_sample_opening(i) for i in range(openings)]
+    }
+
+
+def make_option_heavy_project(panels=500, products=5, categories=40, options=30, selected=8):
+    """Project whose products have many option categories; every panel selects `selected` of them"""
+    catalog = [{
+        'id': product_id,
+        'productType': 'SWING_DOOR' if product_id % 2 else 'FIXED_PANEL',
+        'productSubOptions': [{'category': {
+            'id': category_id,
+            'name': f'Hardware {category_id}' if category_id % 2 else f'Finish {category_id}',
+            'individualOptions': [{'id': category_id * 100 + option_id, 'name': f'Option {option_id}', 'price': option_id}
+                                  for option_id in range(options)]
+        }} for category_id in range(1, categories + 1)]
+    } for product_id in range(1, products + 1)]
+    project = make_sample_project(panels // 5)
+    for opening_index, opening in enumerate(project['openings']):
+        opening['panels'] = []
+        for panel_index in range(5):
+            number = opening_index * 5 + panel_index
+            selections = {str(categories - c): (categories - c) * 100 + number % options for c in range(selected)}
+            opening['panels'].append({'id': number, 'width': 36, 'height': 96, 'glassType': 'Clear',
+                                      'componentInstance': {'subOptionSelections': json.dumps(selections),
+                                                            'product': catalog[number % products]}})
+    return project
+
+
+BOM_FORMULAS = ['width', '2 * (width + height)', 'Math.ceil(height / 24) * quantity',
+                'Math.max(width - 4.5, 0)', '(height - 2) * 2']
+
+
+def make_bom_heavy_project(lines=100000, products=20, lines_per_product=10, parts=200):
+    """Project with `lines` panel x BOM lines: products of `lines_per_product` BOM lines drawn from `parts` parts"""
+    catalog = [{
+        'id': product_id,
+        'productType': 'FIXED_PANEL',
+        'productBOMs': [{
+            'partName': f'Part {(product_id * 7 + line) % parts}',
+            'partType': 'Extrusion',
+            'description': 'Benchmark part',
+            'unit': 'ft' if line % 2 else 'ea',
+            'quantity': 1 + line % 3,
+            'cost': 1.5 + (product_id * 7 + line) % parts,
+            'formula': BOM_FORMULAS[line % len(BOM_FORMULAS)] if line % 4 else None,
+        } for line in range(lines_per_product)]
+    } for product_id in range(products)]
+    project = make_sample_project(lines // lines_per_product // 5)
+    for opening_index, opening in enumerate(project['openings']):
+        opening['panels'] = [{'id': opening_index * 5 + panel_index, 'width': 24 + panel_index * 6, 'height': 96,
+                              'glassType': 'Clear', 'componentInstance': {
+                                  'subOptionSelections': '{}', 'product': catalog[(opening_index + panel_index) % products]}}
+                             for panel_index in range(5)]
+    return project
+
+
+# Budget for a one-shot request that does not draw (bad input, SVG, cache hit), checked by test_startup.py.
+# Importing matplotlib.pyplot alone takes longer than this.
+STARTUP_BUDGET_SECONDS = 0.35
+
+def startup_time(script, request, env=None, repeat=3):
+    """Best wall-clock time of `python3 script` answering one JSON request on stdin, and its stdout"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.join(HERE, script)], input=request, capture_output=True,
+                                text=True, cwd=HERE, env=dict(os.environ, **(env or {})))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result.stdout
+
+
+API_SERVER = os.path.join(HERE, '..', 'api', 'drawings.py')
+
+def start_api_server(workers, queue_size, retry_after=1, coalesce=True):
+    """Start api/drawings.py serving on a free port; returns (process, port) once it accepts connections"""
+    import threading
+    process = subprocess.Popen([sys.executable, API_SERVER, '--port', '0', '--workers', str(workers),
+                                '--queue', str(queue_size), '--retry-after', str(retry_after)]
+                               + ([] if coalesce else ['--no-coalesce']), stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if 'http://' not in line:
+        process.kill()
+        raise RuntimeError(f'api/drawings.py did not start: {line}{process.stderr.read()}')
+    # Keep reading stderr so the server never blocks on a full pipe
+    threading.Thread(target=process.stderr.read, daemon=True).start()
+    return process, int(line.split('http://')[1].split()[0].rsplit(':', 1)[1])
+
+def post_requests(port, bodies, clients):
+    """
+    POST every body to the server, spread over `clients` concurrent keep-alive connections.
+    Returns (wall time, [(status, seconds, response headers)] in the order of bodies).
+    """
+    import http.client
+    from concurrent.futures import ThreadPoolExecutor
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+        replies = []
+        for body in bodies[index::clients]:
+            start = time.perf_counter()
+            connection.request('POST', '/', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            replies.append((response.status, time.perf_counter() - start, dict(response.getheaders())))
+        connection.close()
+        return replies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        per_client = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+    replies = [None] * len(bodies)
+    for index, client_replies in enumerate(per_client):
+        replies[index::clients] = client_replies
+    return elapsed, replies
+
+def server_metrics(port):
+    """GET /metrics of a running api/drawings.py server"""
+    import http.client
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('GET', '/metrics')
+    metrics = json.loads(connection.getresponse().read())
+    connection.close()
+    return metrics
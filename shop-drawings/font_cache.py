@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Pre-built matplotlib font list and text-metrics cache for the drawing service.
+
+On first import matplotlib scans the system fonts and writes fontlist-*.json to its config
+directory; in a fresh container that directory is empty or not writable, so every process pays
+for the scan again. configure() points MPLCONFIGDIR at a directory owned by the service, so the
+font list built once (python drawing_generator.py --warm-cache at image build time, or the first
+drawing) is reused by every later process.
+
+The same directory holds text-metrics.json: width, height and descent of label strings, keyed by
+dpi, font file, size, weight, style and string. canvas_class() returns an Agg canvas whose renderer
+consults it before measuring text, so a label is measured once rather than by every figure in
+every process. Only figures given that canvas (drawing_generator.new_figure) use the cache;
+RendererAgg itself is left alone for any other matplotlib code in the process.
+Figures drawn on several threads share the cache; a lock guards inserts and saves.
+New entries are saved when the process exits and by --warm-cache, not per render. Saves go
+through a temp file + os.replace; concurrent writers may drop each other's new entries, which
+are then simply measured again.
+
+Configuration (environment):
+    SHOP_DRAWINGS_FONT_CACHE       set to 0 to leave matplotlib's own font cache alone and skip text metrics
+    SHOP_DRAWINGS_FONT_CACHE_DIR   cache directory (default: <tmp>/shop-drawings-font-cache)
+An MPLCONFIGDIR set by the caller is kept; only the text metrics then go to the directory above.
+"""
+
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import service_log
+
+METRICS_FILE = 'text-metrics.json'
+# Entries kept per cache file; labels drawn at odd scaled sizes past this are measured every time
+MAX_TEXT_METRICS = 5000
+
+_text_metrics = None
+_canvas_class = None
+
+log = service_log.get_logger('font_cache')
+
+
+def enabled():
+    return os.environ.get('SHOP_DRAWINGS_FONT_CACHE', '1') != '0'
+
+def cache_dir():
+    return (os.environ.get('SHOP_DRAWINGS_FONT_CACHE_DIR')
+            or os.path.join(tempfile.gettempdir(), 'shop-drawings-font-cache'))
+
+def configure():
+    """Point matplotlib's font list cache at cache_dir(); call before matplotlib is imported"""
+    if not enabled() or 'matplotlib' in sys.modules or 'MPLCONFIGDIR' in os.environ:
+        return
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        log.warning('Font cache disabled: %s', e)
+        return
+    os.environ['MPLCONFIGDIR'] = directory
+
+
+class TextMetrics:
+    """(width, height, descent) of text strings, shared by every figure and saved to disk"""
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.metrics = {}
+        self.unsaved = 0
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == version:
+                self.metrics = data['metrics']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def measure(self, key, measure):
+        """Cached extent for key, or measure() it and remember the result"""
+        extent = self.metrics.get(key)
+        if extent is None:
+            extent = measure()
+            with self.lock:
+                if key not in self.metrics and len(self.metrics) < MAX_TEXT_METRICS:
+                    self.metrics[key] = extent
+                    self.unsaved += 1
+        return tuple(extent)
+
+    def save(self):
+        """Write new entries to disk (no-op when nothing was measured since the last save)"""
+        with self.lock:
+            if not self.unsaved:
+                return
+            # Written from a copy, other threads keep measuring meanwhile
+            metrics = dict(self.metrics)
+            unsaved = self.unsaved
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'metrics': metrics}, f, separators=(',', ':'))
+            # Readable by the service user when built by another one at image build time
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+            with self.lock:
+                self.unsaved -= unsaved
+        except OSError as e:
+            log.warning('Text metrics cache write failed: %s', e)
+
+
+def canvas_class():
+    """
+    FigureCanvasAgg subclass whose renderers measure text through the text-metrics cache, saved at
+    exit; FigureCanvasAgg itself when the cache is disabled. Call after configure().
+    """
+    global _text_metrics, _canvas_class
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+    from matplotlib.font_manager import findfont
+
+    if not enabled():
+        return FigureCanvasAgg
+    if _canvas_class is not None:
+        return _canvas_class
+
+    # Measurements change with matplotlib's text layout and hinting
+    version = [matplotlib.__version__, matplotlib.rcParams['text.hinting'],
+               matplotlib.rcParams['text.hinting_factor']]
+    _text_metrics = TextMetrics(os.path.join(cache_dir(), METRICS_FILE), version)
+
+    class CachedRendererAgg(RendererAgg):
+        def get_text_width_height_descent(self, s, prop, ismath):
+            measure = super().get_text_width_height_descent
+            if ismath:
+                return measure(s, prop, ismath)
+            key = '|'.join([repr(float(self.dpi)), findfont(prop), repr(float(prop.get_size_in_points())),
+                            str(prop.get_weight()), prop.get_style(), str(prop.get_stretch()), s])
+            return _text_metrics.measure(key, lambda: measure(s, prop, ismath))
+
+    class CachedFigureCanvasAgg(FigureCanvasAgg):
+        def get_renderer(self):
+            # Same reuse rule as FigureCanvasAgg.get_renderer (a new renderer when the size or dpi
+            # changes), kept under a key of our own rather than matplotlib's private one
+            w, h = self.figure.bbox.size
+            key = w, h, self.figure.dpi
+            if getattr(self, '_cached_renderer_key', None) != key:
+                self.renderer = CachedRendererAgg(w, h, self.figure.dpi)
+                self._cached_renderer_key = key
+            return self.renderer
+
+    _canvas_class = CachedFigureCanvasAgg
+    atexit.register(save)
+    return _canvas_class
+
+def save():
+    """Save text metrics measured since the last save, if the cache is installed"""
+    if _text_metrics is not None:
+        _text_metrics.save()
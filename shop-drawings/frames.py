@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Length-prefixed binary frames: the "transport": "binary" reply format of drawing_generator.py
+and package_generator.py.
+
+A JSON reply carries its PNGs and PDFs as base64 strings, a third larger than the bytes, and
+both sides spend CPU and full-size copies on encoding and decoding them. A frame carries the
+same reply with those bytes raw:
+
+    4-byte big-endian length of the header
+    header: the reply as UTF-8 JSON with its bytes values left out and listed under "binary",
+            [{"key": "elevation_image", "length": 48213, "contentType": "image/png"}, ...]
+    the bytes values, one after another in the order of "binary"
+
+Several frames follow each other on one stream (a --serve worker, a batch, a streamed
+package). read() gives the reply back as a dict with the bytes values in place.
+"""
+
+import json
+import struct
+
+HEADER_LENGTH = struct.Struct('>I')
+
+# Content types of the reply keys that carry bytes; anything else is application/octet-stream
+CONTENT_TYPES = {
+    'elevation_image': 'image/png',
+    'plan_image': 'image/png',
+    'pdf_data': 'application/pdf',
+    'data': 'application/pdf',
+}
+
+
+def encode(result):
+    """The frame for a reply dict as a list of byte strings, so its bytes values are not copied"""
+    header = {}
+    payloads = []
+    binary = []
+    for key, value in result.items():
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            payloads.append(value)
+            binary.append({'key': key, 'length': len(value),
+                           'contentType': CONTENT_TYPES.get(key, 'application/octet-stream')})
+        else:
+            header[key] = value
+    if binary:
+        header['binary'] = binary
+    header_bytes = json.dumps(header).encode('utf-8')
+    return [HEADER_LENGTH.pack(len(header_bytes)), header_bytes] + payloads
+
+def write(stream, result):
+    """Write a reply as one frame to the binary stream and flush it"""
+    for chunk in encode(result):
+        stream.write(chunk)
+    stream.flush()
+
+def _read_exactly(stream, length):
+    data = stream.read(length)
+    while len(data) < length:
+        more = stream.read(length - len(data))
+        if not more:
+            raise EOFError(f'frame cut short: {len(data)} of {length} bytes')
+        data += more
+    return data
+
+def read(stream):
+    """The next reply on a binary stream as a dict with its bytes values in place; None at the end"""
+    prefix = stream.read(HEADER_LENGTH.size)
+    if not prefix:
+        return None
+    if len(prefix) < HEADER_LENGTH.size:
+        prefix += _read_exactly(stream, HEADER_LENGTH.size - len(prefix))
+    header = json.loads(_read_exactly(stream, HEADER_LENGTH.unpack(prefix)[0]))
+    for item in header.pop('binary', []):
+        header[item['key']] = _read_exactly(stream, item['length'])
+    return header
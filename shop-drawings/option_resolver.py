@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Resolves a panel's subOptionSelections ({category_id: option_id}) to the product's option records.
+
+Each product's productSubOptions are indexed once by str(category_id), each category's options
+by option id the first time one of them is looked up, and the index is memoized by product id,
+so every panel of every opening that uses the product shares it instead of scanning every
+category and option again. The memo lives for one
+request (see scope()): products can change between requests to a long-lived worker, so indexes
+are never reused across requests. Outside of scope() each resolver() keeps its own memo.
+
+Matching follows the quote API: categories match on str(id), options on their exact id, and
+the first match wins.
+"""
+
+import contextlib
+import contextvars
+
+_resolver = contextvars.ContextVar('option_resolver', default=None)
+
+
+class OptionResolver:
+    """Option lookups for many panels, indexing each product's options once by product id"""
+
+    def __init__(self):
+        self.indexes = {}
+
+    def index(self, product):
+        """{str(category_id): [category, {option_id: option} or None until first used]} for product"""
+        product_id = product.get('id')
+        index = self.indexes.get(product_id) if product_id is not None else None
+        if index is None:
+            index = {}
+            for sub_option in product.get('productSubOptions', []):
+                category = sub_option['category']
+                index.setdefault(str(category['id']), [category, None])
+            if product_id is not None:
+                self.indexes[product_id] = index
+        return index
+
+    def resolve(self, product, selections):
+        """
+        (category, option) for every selected option of product, in selection order. Empty
+        selections and ids that match no category or option are skipped.
+        """
+        index = self.index(product)
+        resolved = []
+        for category_id, option_id in selections.items():
+            if not option_id:
+                continue
+            entry = index.get(str(category_id))
+            if entry is None:
+                continue
+            category, options = entry
+            if options is None:
+                # Only cached once complete, so a malformed category fails for every panel alike
+                options = {}
+                for option in category['individualOptions']:
+                    options.setdefault(option['id'], option)
+                entry[1] = options
+            try:
+                option = options.get(option_id)
+            except TypeError:  # unhashable selection value never equals an option id
+                option = None
+            if option is not None:
+                resolved.append((category, option))
+        return resolved
+
+
+def resolver():
+    """The current request's resolver, or a new one outside of scope()"""
+    return _resolver.get() or OptionResolver()
+
+@contextlib.contextmanager
+def scope():
+    """Share one resolver for the block; nested scopes keep the outer one"""
+    token = _resolver.set(_resolver.get() or OptionResolver())
+    try:
+        yield _resolver.get()
+    finally:
+        _resolver.reset(token)
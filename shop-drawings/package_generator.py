@@ -7,70 +7,191 @@ import io
 from datetime import datetime, timedelta
 import subprocess
 import os
+from importlib.util import find_spec
+import backend_pdf
+import bom_aggregation
+from drawing_generator import (
+    generate_elevation_drawing, generate_plan_drawing, convert_quoting_tool_data,
+    draw_architectural_elevation, draw_door_schedule, draw_plan_view,
+    elevation_figure_size, plan_figure_size, scale_artists, opening_height, load_matplotlib, new_figure,
+    binary_transport, write_reply
+)
+from drawing_layout import layout_architectural_elevation, layout_plan_view
+import frames
+from pdf_merge import write_merged_pdf
+import pdf_writer
+import project_model
+import service_log
 
-# Try to import matplotlib, fall back to simple PDF if not available
-try:
-    import matplotlib.pyplot as plt
-    import matplotlib.patches as patches
+log = service_log.get_logger('package_generator')
+
+# matplotlib is imported when the first matplotlib page is drawn (see load_matplotlib), so
+# requests that fail validation or use the native PDF backend never load it
+MATPLOTLIB_AVAILABLE = find_spec('matplotlib') is not None
+
+def open_pdf_pages(output):
+    """matplotlib PdfPages writing to the file-like output"""
+    load_matplotlib()
     from matplotlib.backends.backend_pdf import PdfPages
-    import numpy as np
-    MATPLOTLIB_AVAILABLE = True
-except ImportError as e:
-    print(f"Matplotlib not available: {e}", file=sys.stderr)
-    MATPLOTLIB_AVAILABLE = False
+    return PdfPages(output)
 
 def generate_drawing_from_external(drawing_type, opening_data):
-    """Call the external drawing generator and return the result"""
+    """Call the external drawing generator and return the result, with the PNG as raw bytes"""
     try:
         # Get the path to the drawing generator script
         script_path = os.path.join(os.path.dirname(__file__), 'drawing_generator.py')
         
-        # Prepare input data
+        # Prepare input data; the reply comes back as a binary frame instead of base64 JSON
         input_data = {
             'type': drawing_type,
-            'data': opening_data
+            'data': opening_data,
+            'transport': 'binary',
+            'traceId': service_log.trace_id()
         }
         
         # Call the drawing generator
         result = subprocess.run(
             ['python3', script_path],
-            input=json.dumps(input_data),
+            input=json.dumps(input_data).encode('utf-8'),
             capture_output=True,
-            text=True,
             timeout=30
         )
         
         if result.returncode != 0:
-            print(f"Drawing generator error: {result.stderr}", file=sys.stderr)
+            log.error('Drawing generator error: %s', result.stderr.decode('utf-8', 'replace'))
             return None
             
         # Parse the result
-        output_data = json.loads(result.stdout)
+        output_data = frames.read(io.BytesIO(result.stdout))
+        if output_data is None:
+            log.error('Drawing generator returned no reply')
+            return None
         if output_data.get('success'):
             return output_data
         else:
-            print(f"Drawing generator failed: {output_data.get('error', 'Unknown error')}", file=sys.stderr)
+            log.info('Drawing generator failed: %s', output_data.get('error', 'Unknown error'))
             return None
             
     except Exception as e:
-        print(f"Error calling drawing generator: {e}", file=sys.stderr)
+        log.error('Error calling drawing generator: %s', e)
+        return None
+
+def generate_drawing_in_process(drawing_type, opening_data):
+    """Call the drawing generator functions directly in this interpreter and return the result"""
+    try:
+        # The PNG stays raw bytes; nothing here needs it as base64
+        if drawing_type == 'elevation':
+            output_data = generate_elevation_drawing(opening_data, binary=True)
+        elif drawing_type == 'plan':
+            output_data = generate_plan_drawing(opening_data, binary=True)
+        else:
+            log.error('Unknown drawing type: %s', drawing_type)
+            return None
+
+        if output_data.get('success'):
+            return output_data
+        else:
+            log.info('Drawing generator failed: %s', output_data.get('error', 'Unknown error'))
+            return None
+
+    except Exception as e:
+        log.error('Error calling drawing generator: %s', e)
         return None
 
-def create_shop_drawing_page(opening_data, pdf_pages):
-    """Create a single page with door schedule (top left), plan view (top right), and elevation (center/bottom)"""
+def generate_drawing(drawing_type, opening_data, isolate=False):
+    """
+    Generate a drawing for a project_model.Opening (or a raw opening dict) in-process, or in a
+    separate python3 process from the raw opening when isolate is set
+    """
+    if isolate:
+        return generate_drawing_from_external(drawing_type, opening_data if isinstance(opening_data, dict) else opening_data.data)
+    return generate_drawing_in_process(drawing_type, opening_data)
+
+def show_drawing_image(ax, drawing_data, image_key):
+    """Display a PNG drawing (raw bytes or base64) in ax. Returns False when there is no image."""
+    if not drawing_data or not drawing_data.get(image_key):
+        return False
+    img_data = drawing_data[image_key]
+    if isinstance(img_data, str):
+        img_data = base64.b64decode(img_data)
+    load_matplotlib()
+    from matplotlib.image import imread
+    img = imread(io.BytesIO(img_data), format='png')
+    ax.imshow(img)
+    ax.axis('off')
+    return True
+
+def fit_scale(ax, native_inches_per_unit):
+    """
+    Ratio between the drawing scale in ax and in its standalone figure. Text and line widths are
+    multiplied by it so they shrink with the geometry, the same way they do when the PNG is fitted
+    into the page.
+    """
+    ax.apply_aspect()
+    bbox = ax.get_position()
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    inches_per_unit = min(bbox.width * ax.figure.get_figwidth() / (x1 - x0),
+                          bbox.height * ax.figure.get_figheight() / (y1 - y0))
+    return inches_per_unit / native_inches_per_unit
+
+def draw_vector_elevation(ax, panels, height):
+    """Draw the elevation straight into the page Axes. Returns False if it could not be drawn."""
+    try:
+        draw_architectural_elevation(panels, height, ax=ax)
+        # The standalone figure's tight_layout squeezes the panels to make room for the labels
+        # and dimension lines above and below them (about 40" of drawing units)
+        _, native_height = elevation_figure_size(panels, height)
+        scale_artists(ax, fit_scale(ax, native_height / (height + 40)))
+        return True
+    except Exception as e:
+        log.error('Error drawing elevation: %s', e)
+        ax.cla()
+        return False
+
+def draw_vector_plan(ax, panels):
+    """Draw the plan view straight into the page Axes. Returns False if there is no plan view."""
+    try:
+        if draw_plan_view(panels, ax=ax) is None:
+            return False
+        # Plan views set their own limits, so the standalone scale follows from the native figure size
+        native_width, native_height = plan_figure_size(panels)
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        scale_artists(ax, fit_scale(ax, min(native_width / (x1 - x0), native_height / (y1 - y0))))
+        return True
+    except Exception as e:
+        log.error('Error drawing plan view: %s', e)
+        ax.cla()
+        return False
+
+def create_shop_drawing_page(opening_data, pdf_pages, isolate_drawings=False, vector=True):
+    """
+    Create a single page with door schedule (top left), plan view (top right), and elevation (center/bottom)
+    for a project_model.Opening (or a raw opening dict)
+
+    With vector set, the elevation and plan are drawn straight into the page's Axes so the PDF keeps
+    the linework as vectors. Otherwise (or when drawings are isolated in a subprocess) they are
+    rendered to 300-dpi PNGs and embedded as images.
+    """
+    opening = project_model.as_opening(opening_data)
+    draw_in_page = vector and not isolate_drawings
     
-    # Generate elevation and plan drawings using the external drawing generator
-    elevation_data = generate_drawing_from_external('elevation', opening_data)
-    plan_data = generate_drawing_from_external('plan', opening_data)
+    if draw_in_page:
+        panels = convert_quoting_tool_data(opening)
+        col_labels, cell_text = draw_door_schedule(panels)
+        door_schedule = {'headers': col_labels, 'rows': cell_text}
+    else:
+        # Generate elevation and plan drawings (subprocess per drawing only when isolation is requested)
+        elevation_data = generate_drawing('elevation', opening, isolate=isolate_drawings)
+        plan_data = generate_drawing('plan', opening, isolate=isolate_drawings)
+        door_schedule = elevation_data.get('door_schedule') if elevation_data else None
     
     # Create figure for landscape orientation
-    fig = plt.figure(figsize=(11, 8.5))  # Landscape 11x8.5 inches
-    
-    # Clear any existing plots
-    plt.clf()
+    fig = new_figure(figsize=(11, 8.5))  # Landscape 11x8.5 inches
     
     # Add opening title
-    fig.suptitle(f'Shop Drawing - Opening {opening_data["name"]}', fontsize=16, fontweight='bold')
+    fig.suptitle(f'Shop Drawing - Opening {opening.name}', fontsize=16, fontweight='bold')
     
     # Create layout: door schedule (top left), plan view (top right), elevation (bottom center)
     gs = fig.add_gridspec(2, 2, height_ratios=[0.4, 1], width_ratios=[1, 1], 
@@ -78,11 +199,11 @@ def create_shop_drawing_page(opening_data, pdf_pages):
     
     # Door schedule (top left) - smaller
     ax_schedule = fig.add_subplot(gs[0, 0])
-    if elevation_data and elevation_data.get('door_schedule'):
-        draw_door_schedule_table(ax_schedule, elevation_data['door_schedule'])
+    if door_schedule:
+        draw_door_schedule_table(ax_schedule, door_schedule)
     else:
         # Generate a basic door schedule from opening data
-        door_schedule = generate_door_schedule_from_opening(opening_data)
+        door_schedule = generate_door_schedule_from_opening(opening)
         if door_schedule:
             draw_door_schedule_table(ax_schedule, door_schedule)
         else:
@@ -92,38 +213,39 @@ def create_shop_drawing_page(opening_data, pdf_pages):
     
     # Plan view (top right)
     ax_plan = fig.add_subplot(gs[0, 1])
-    if plan_data and plan_data.get('plan_image'):
-        # Decode and display plan image
-        img_data = base64.b64decode(plan_data['plan_image'])
-        img = plt.imread(io.BytesIO(img_data), format='png')
-        ax_plan.imshow(img)
-        ax_plan.axis('off')
+    if draw_in_page:
+        plan_drawn = draw_vector_plan(ax_plan, panels)
     else:
+        plan_drawn = show_drawing_image(ax_plan, plan_data, 'plan_image')
+    if not plan_drawn:
         ax_plan.text(0.5, 0.5, 'Plan view not available', ha='center', va='center', transform=ax_plan.transAxes)
         ax_plan.axis('off')
     ax_plan.set_title('Plan View (Top-Down)', fontsize=10, fontweight='bold')
     
     # Elevation view (bottom center, spanning both columns)
     ax_elevation = fig.add_subplot(gs[1, :])
-    if elevation_data and elevation_data.get('elevation_image'):
-        # Decode and display elevation image
-        img_data = base64.b64decode(elevation_data['elevation_image'])
-        img = plt.imread(io.BytesIO(img_data), format='png')
-        ax_elevation.imshow(img)
-        ax_elevation.axis('off')
+    if draw_in_page:
+        elevation_drawn = draw_vector_elevation(ax_elevation, panels, opening_height(opening))
     else:
+        elevation_drawn = show_drawing_image(ax_elevation, elevation_data, 'elevation_image')
+    if not elevation_drawn:
         ax_elevation.text(0.5, 0.5, 'Elevation view not available', ha='center', va='center', transform=ax_elevation.transAxes)
         ax_elevation.axis('off')
     ax_elevation.set_title('Elevation View', fontsize=12, fontweight='bold')
     
     # Save to PDF
     pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close(fig)
+
+HARDWARE_TERMS = ['hardware', 'handle', 'lock', 'hinge']
+
+def hardware_options(panel):
+    """The project_model.Panel's resolved options whose category is hardware"""
+    return [option for option in panel.options if any(hw_term in option.category.lower() for hw_term in HARDWARE_TERMS)]
 
 def generate_door_schedule_from_opening(opening_data):
-    """Generate a basic door schedule from opening data"""
+    """Generate a basic door schedule from a project_model.Opening (or a raw opening dict)"""
     try:
-        panels = opening_data.get('panels', [])
+        panels = project_model.as_opening(opening_data).panels
         if not panels:
             return None
         
@@ -139,30 +261,8 @@ def generate_door_schedule_from_opening(opening_data):
             glass_type = panel.get('glassType', 'Clear')
             
             # Extract hardware info if available
-            hardware = 'Standard'
-            if panel.get('componentInstance') and panel['componentInstance'].get('subOptionSelections'):
-                try:
-                    selections = json.loads(panel['componentInstance']['subOptionSelections'])
-                    product = panel['componentInstance'].get('product', {})
-                    
-                    hardware_items = []
-                    for category_id, option_id in selections.items():
-                        if option_id:
-                            for pso in product.get('productSubOptions', []):
-                                if str(pso['category']['id']) == str(category_id):
-                                    category_name = pso['category']['name'].lower()
-                                    if any(hw_term in category_name for hw_term in ['hardware', 'handle', 'lock', 'hinge']):
-                                        for option in pso['category']['individualOptions']:
-                                            if option['id'] == option_id:
-                                                hardware_items.append(f"{pso['category']['name']}: {option['name']}")
-                                                break
-                                        break
-                                    break
-                    
-                    if hardware_items:
-                        hardware = ', '.join(hardware_items)
-                except:
-                    pass
+            hardware_items = [option.label for option in hardware_options(panel)]
+            hardware = ', '.join(hardware_items) if hardware_items else 'Standard'
             
             # Format the row
             row = [
@@ -179,7 +279,7 @@ def generate_door_schedule_from_opening(opening_data):
             'rows': rows
         }
     except Exception as e:
-        print(f"Error generating door schedule: {e}", file=sys.stderr)
+        log.error('Error generating door schedule: %s', e)
         return None
 
 def draw_door_schedule_table(ax, door_schedule_data):
@@ -231,78 +331,38 @@ def draw_door_schedule_table(ax, door_schedule_data):
                 table[(i, j)].set_facecolor('#FFFFFF')
 
 
+BOM_COLUMNS = ["Part Name", "Type", "Description", "Quantity", "Unit", "Unit Cost", "Total Cost"]
+
+def collect_bom_rows(project_data):
+    """
+    BOM table rows for all openings of a project_model.Project (or a raw project dict), ending
+    with the total row; empty when there are no BOM items
+    """
+    return bom_aggregation.project_totals(project_data).rows()
+
+def bom_export(project_data):
+    """Machine-readable BOM of a project: per-part quantities and costs (see bom_aggregation)"""
+    project = project_model.as_project(project_data)
+    return dict({'success': True, 'project': {'id': project.id, 'name': project.name}},
+                **bom_aggregation.project_totals(project).export())
+
 def create_bom_page(project_data, pdf_pages):
-    """Create BOM (Bill of Materials) page"""
+    """Create BOM (Bill of Materials) page for a project_model.Project (or a raw project dict)"""
+    project = project_model.as_project(project_data)
     
-    fig = plt.figure(figsize=(11, 8.5))  # Landscape
-    plt.clf()
+    fig = new_figure(figsize=(11, 8.5))  # Landscape
     
-    fig.suptitle(f'Bill of Materials - {project_data["name"]}', fontsize=16, fontweight='bold')
+    fig.suptitle(f'Bill of Materials - {project.name}', fontsize=16, fontweight='bold')
     
     ax = fig.add_subplot(111)
     ax.axis('off')
     
-    # Collect all BOM items from all openings
-    all_bom_items = {}
-    
-    for opening in project_data.get('openings', []):
-        for panel in opening.get('panels', []):
-            if panel.get('componentInstance') and panel['componentInstance'].get('product'):
-                product = panel['componentInstance']['product']
-                
-                # Add product BOMs
-                for bom_item in product.get('productBOMs', []):
-                    part_key = f"{bom_item.get('partName', 'Unknown')} ({bom_item.get('unit', 'ea')})"
-                    
-                    if part_key not in all_bom_items:
-                        all_bom_items[part_key] = {
-                            'partName': bom_item.get('partName', 'Unknown'),
-                            'partType': bom_item.get('partType', 'Material'),
-                            'description': bom_item.get('description', ''),
-                            'unit': bom_item.get('unit', 'ea'),
-                            'quantity': 0,
-                            'cost': bom_item.get('cost', 0)
-                        }
-                    
-                    # Calculate quantity based on formula or use default
-                    qty = bom_item.get('quantity', 1)
-                    if bom_item.get('formula'):
-                        # Simple formula evaluation for width-based calculations
-                        if 'width' in bom_item['formula'].lower():
-                            qty = (panel.get('width', 0) or 0) / 12  # Convert inches to feet
-                        elif 'height' in bom_item['formula'].lower():
-                            qty = (panel.get('height', 0) or 0) / 12
-                    
-                    all_bom_items[part_key]['quantity'] += qty
-    
-    if not all_bom_items:
+    cell_text = collect_bom_rows(project)
+    if not cell_text:
         ax.text(0.5, 0.5, 'No BOM items found', ha='center', va='center', transform=ax.transAxes, fontsize=14)
         pdf_pages.savefig(fig, bbox_inches='tight')
-        plt.close(fig)
         return
-    
-    # Prepare table data
-    col_labels = ["Part Name", "Type", "Description", "Quantity", "Unit", "Unit Cost", "Total Cost"]
-    cell_text = []
-    total_cost = 0
-    
-    for item_data in all_bom_items.values():
-        unit_cost = item_data['cost'] or 0  # Handle None values
-        total_item_cost = item_data['quantity'] * unit_cost
-        total_cost += total_item_cost
-        
-        cell_text.append([
-            item_data['partName'],
-            item_data['partType'],
-            item_data['description'][:30] + ('...' if len(item_data['description']) > 30 else ''),
-            f"{item_data['quantity']:.2f}",
-            item_data['unit'],
-            f"${unit_cost:.2f}",
-            f"${total_item_cost:.2f}"
-        ])
-    
-    # Add total row
-    cell_text.append(['', '', '', '', '', 'TOTAL:', f"${total_cost:.2f}"])
+    col_labels = BOM_COLUMNS
     
     # Create table
     table = ax.table(cellText=cell_text,
@@ -334,56 +394,39 @@ def create_bom_page(project_data, pdf_pages):
                 table[(i, j)].set_facecolor('#F2F2F2')
     
     pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close(fig)
 
 def get_actual_quote_data(project_data):
-    """Generate quote data using EXACT logic from /api/projects/[id]/quote/route.ts"""
+    """
+    Generate quote data using EXACT logic from /api/projects/[id]/quote/route.ts, for a
+    project_model.Project (or a raw project dict)
+    """
+    project = project_model.as_project(project_data)
     quote_items = []
     
-    for opening in project_data.get('openings', []):
-        # Calculate opening dimensions (sum of panel widths, max height) - EXACT API logic
-        total_width = sum(panel.get('width', 0) for panel in opening.get('panels', []))
-        max_height = max([panel.get('height', 0) for panel in opening.get('panels', [])], default=0)
+    for opening in project.openings:
+        # Opening dimensions (sum of panel widths, max height) - EXACT API logic
+        total_width = opening.total_width
+        max_height = opening.max_height
         
         # Get hardware and glass types - EXACT API logic
         hardware_items = []
         glass_types = set()
         total_hardware_price = 0
         
-        for panel in opening.get('panels', []):
-            if panel.get('glassType') and panel.get('glassType') != 'N/A':
-                glass_types.add(panel['glassType'])
+        for panel in opening.panels:
+            if panel.glass_type and panel.glass_type != 'N/A':
+                glass_types.add(panel.glass_type)
             
-            # Extract hardware from component options - EXACT API logic
-            if panel.get('componentInstance') and panel['componentInstance'].get('subOptionSelections'):
-                try:
-                    selections = json.loads(panel['componentInstance']['subOptionSelections'])
-                    product = panel['componentInstance'].get('product', {})
-                    
-                    # Resolve hardware options - EXACT API logic
-                    for category_id, option_id in selections.items():
-                        if option_id:
-                            for pso in product.get('productSubOptions', []):
-                                if str(pso['category']['id']) == str(category_id):
-                                    category_name = pso['category']['name'].lower()
-                                    if any(hw_term in category_name for hw_term in ['hardware', 'handle', 'lock', 'hinge']):
-                                        for option in pso['category']['individualOptions']:
-                                            if option['id'] == option_id:
-                                                hardware_items.append({
-                                                    'name': f"{pso['category']['name']}: {option['name']}",
-                                                    'price': option.get('price', 0)
-                                                })
-                                                total_hardware_price += option.get('price', 0)
-                                                break
-                                        break
-                                    break
-                except:
-                    pass
+            # Hardware from component options - EXACT API logic
+            for option in hardware_options(panel):
+                hardware_items.append({
+                    'name': option.label,
+                    'price': option.price
+                })
+                total_hardware_price += option.price
         
         # Generate description - EXACT API logic
-        panel_types = [panel['componentInstance']['product']['productType'] 
-                      for panel in opening.get('panels', []) 
-                      if panel.get('componentInstance')]
+        panel_types = [panel.product_type for panel in opening.panels if panel.product_type]
         
         type_count = {}
         for panel_type in panel_types:
@@ -404,45 +447,39 @@ def get_actual_quote_data(project_data):
                        ' • '.join([f"{item['name']} | +${item['price']:,.0f}" for item in hardware_items])
         
         quote_items.append({
-            'openingId': opening.get('id'),
-            'name': opening.get('name'),
+            'openingId': opening.id,
+            'name': opening.name,
             'description': description,
             'dimensions': f'{total_width}" W × {max_height}" H',
-            'color': opening.get('finishColor', 'Standard'),
+            'color': opening.finish_color,
             'hardware': hardware_text,
             'hardwarePrice': total_hardware_price,
             'glassType': ', '.join(glass_types) or 'Clear',
-            'price': opening.get('price', 0),
+            'price': opening.price,
             'elevationImage': None  # Would be generated by miniature elevation
         })
     
     return {
         'success': True,
         'project': {
-            'id': project_data.get('id'),
-            'name': project_data.get('name'),
-            'status': project_data.get('status'),
-            'createdAt': project_data.get('createdAt'),
-            'updatedAt': project_data.get('updatedAt')
+            'id': project.id,
+            'name': project.name,
+            'status': project.status,
+            'createdAt': project.created_at,
+            'updatedAt': project.updated_at
         },
         'quoteItems': quote_items,
         'totalPrice': sum(item['price'] for item in quote_items)
     }
 
-def create_quote_page(project_data, pdf_pages):
-    """Create quote page IDENTICAL to QuoteView.tsx format"""
+QUOTE_COLUMNS = ["ELEVATION", "OPENING", "SPECS", "HARDWARE", "PRICE"]
+
+def quote_page_content(project_data):
+    """Text of the quote page: header info blocks, table rows and the footer"""
     
     # Get quote data in the exact same format as the API
     quote_data = get_actual_quote_data(project_data)
     
-    fig = plt.figure(figsize=(11, 8.5))  # Landscape
-    plt.clf()
-    
-    fig.suptitle('Project Quote', fontsize=20, fontweight='normal', y=0.95)
-    
-    ax = fig.add_subplot(111)
-    ax.axis('off')
-    
     # Project info header (matching QuoteView exact format)
     created_date = quote_data['project']['createdAt']
     if created_date:
@@ -461,19 +498,12 @@ def create_quote_page(project_data, pdf_pages):
 STATUS: {quote_data['project']['status']}
 CREATED: {created_formatted}"""
     
-    ax.text(0.05, 0.85, project_info, transform=ax.transAxes, fontsize=10, 
-           verticalalignment='top', fontweight='normal')
-    
     # Quote info section (right side)
     quote_info = f"""OPENINGS: {len(quote_data['quoteItems'])}
 VALID UNTIL: {valid_until}"""
     
-    ax.text(0.75, 0.85, quote_info, transform=ax.transAxes, fontsize=10, 
-           verticalalignment='top', fontweight='normal')
-    
-    # Create table with EXACT QuoteView format
+    # Table rows with EXACT QuoteView format
     # Headers: Elevation | Opening | Specs | Hardware | Price
-    col_labels = ["ELEVATION", "OPENING", "SPECS", "HARDWARE", "PRICE"]
     cell_text = []
     
     for item in quote_data['quoteItems']:
@@ -500,6 +530,36 @@ VALID UNTIL: {valid_until}"""
             f"${item['price']:,}"
         ])
     
+    count = len(quote_data['quoteItems'])
+    return {
+        'project_info': project_info,
+        'quote_info': quote_info,
+        'rows': cell_text,
+        'total_text': f"This quote includes {count} opening{'s' if count != 1 else ''}",
+        'total_price_text': f"${quote_data['totalPrice']:,}"
+    }
+
+def create_quote_page(project_data, pdf_pages):
+    """Create quote page IDENTICAL to QuoteView.tsx format"""
+    
+    content = quote_page_content(project_data)
+    
+    fig = new_figure(figsize=(11, 8.5))  # Landscape
+    
+    fig.suptitle('Project Quote', fontsize=20, fontweight='normal', y=0.95)
+    
+    ax = fig.add_subplot(111)
+    ax.axis('off')
+    
+    ax.text(0.05, 0.85, content['project_info'], transform=ax.transAxes, fontsize=10, 
+           verticalalignment='top', fontweight='normal')
+    
+    ax.text(0.75, 0.85, content['quote_info'], transform=ax.transAxes, fontsize=10, 
+           verticalalignment='top', fontweight='normal')
+    
+    col_labels = QUOTE_COLUMNS
+    cell_text = content['rows']
+    
     # Create table
     table = ax.table(cellText=cell_text,
                     colLabels=col_labels,
@@ -527,13 +587,11 @@ VALID UNTIL: {valid_until}"""
             table[(i, j)].set_facecolor('#FFFFFF')
     
     # Total section at bottom (like QuoteView footer)
-    total_text = f"This quote includes {len(quote_data['quoteItems'])} opening{'s' if len(quote_data['quoteItems']) != 1 else ''}"
-    ax.text(0.05, 0.08, total_text, transform=ax.transAxes, fontsize=12, 
+    ax.text(0.05, 0.08, content['total_text'], transform=ax.transAxes, fontsize=12, 
            verticalalignment='center', color='#6B7280')
     
     # Total price (large, right-aligned like QuoteView)
-    total_price_text = f"${quote_data['totalPrice']:,}"
-    ax.text(0.95, 0.08, total_price_text, transform=ax.transAxes, fontsize=24, 
+    ax.text(0.95, 0.08, content['total_price_text'], transform=ax.transAxes, fontsize=24, 
            verticalalignment='center', horizontalalignment='right', fontweight='normal')
     
     # "Total Project Cost" label
@@ -541,43 +599,299 @@ VALID UNTIL: {valid_until}"""
            verticalalignment='center', horizontalalignment='right', color='#6B7280', fontweight='bold')
     
     pdf_pages.savefig(fig, bbox_inches='tight')
-    plt.close(fig)
 
-def generate_complete_package(project_data):
-    """Generate complete project package PDF"""
+PDF_BACKENDS = ('matplotlib', 'native')
+
+# Native pages: letter landscape in points
+PAGE_WIDTH, PAGE_HEIGHT = pdf_writer.LETTER_LANDSCAPE
+PAGE_MARGIN = 54
+BOM_ROW_HEIGHT = 16
+QUOTE_HEADER_HEIGHT = 20
+QUOTE_ROW_HEIGHT = 48
+QUOTE_INFO_HEIGHT = 48
+QUOTE_FOOTER_HEIGHT = 36
+GRAY_TEXT = '#6B7280'
+
+def _page_title(page, title, size=16, bold=True):
+    page.text(PAGE_WIDTH / 2, PAGE_HEIGHT - 24, title, size=size, bold=bold, ha='center', va='top')
+
+def _box_title(page, box, title, size=10):
+    x, y, width, height = box
+    page.text(x + width / 2, y + height + 6, title, size=size, bold=True, ha='center', va='bottom')
+
+def _box_message(page, box, message):
+    x, y, width, height = box
+    page.text(x + width / 2, y + height / 2, message, size=10, ha='center', va='center')
+
+def _paginate(rows, first_page_rows, page_rows):
+    """Split rows into pages of at most first_page_rows, then page_rows; always one page at least"""
+    pages = [rows[:first_page_rows]]
+    for start in range(first_page_rows, len(rows), page_rows):
+        pages.append(rows[start:start + page_rows])
+    return pages
+
+def shop_drawing_boxes():
+    """
+    (x, y, width, height) of the schedule, plan and elevation boxes of a native shop drawing
+    page: the gridspec of create_shop_drawing_page (height ratios 0.4:1, hspace = wspace = 0.3)
+    """
+    left, right = 0.1 * PAGE_WIDTH, 0.95 * PAGE_WIDTH
+    bottom, top = 0.1 * PAGE_HEIGHT, 0.9 * PAGE_HEIGHT
+    column = (right - left) / 2.3
+    rows = (top - bottom) / 1.15
+    top_row = rows * 0.4 / 1.4
+    return {
+        'schedule': (left, top - top_row, column, top_row),
+        'plan': (right - column, top - top_row, column, top_row),
+        'elevation': (left, bottom, right - left, rows - top_row),
+    }
+
+def draw_native_shop_drawing_page(page, opening_data):
+    """Native counterpart of create_shop_drawing_page: schedule table, plan and elevation as PDF vectors"""
+    opening = project_model.as_opening(opening_data)
+    panels = convert_quoting_tool_data(opening)
+    boxes = shop_drawing_boxes()
+    _page_title(page, f'Shop Drawing - Opening {opening.name}')
+    
+    col_labels, cell_text = draw_door_schedule(panels)
+    x, y, width, height = boxes['schedule']
+    if cell_text:
+        rows = [col_labels] + cell_text
+        row_height = min(height / len(rows), 14)
+        styles = [{'fill': '#F9FAFB', 'color': '#374151', 'bold': True, 'edge': '#D1D5DB'}]
+        styles += [{'color': '#111827', 'edge': '#E5E7EB'}] * len(cell_text)
+        pdf_writer.table(page, x, y + height, pdf_writer.column_widths(rows, width, 7), rows, 7, [row_height] * len(rows), styles)
+    else:
+        _box_message(page, boxes['schedule'], 'No door schedule data')
+    _box_title(page, boxes['schedule'], 'Opening Schedule')
+    
+    for name, title, message, layout in (
+        ('plan', 'Plan View (Top-Down)', 'Plan view not available', lambda: layout_plan_view(panels)),
+        ('elevation', 'Elevation View', 'Elevation view not available',
+         lambda: layout_architectural_elevation(panels, opening_height(opening))),
+    ):
+        try:
+            drawing = layout()
+        except Exception as e:
+            log.error('Error drawing %s: %s', name, e)
+            drawing = None
+        if drawing is None:
+            _box_message(page, boxes[name], message)
+        else:
+            backend_pdf.render(drawing, page, *boxes[name])
+        _box_title(page, boxes[name], title, size=12 if name == 'elevation' else 10)
+
+def draw_native_bom_page(page, project_name, rows, widths, continued=False):
+    """Native BOM page for a slice of collect_bom_rows(); the header row repeats on every page"""
+    title = f'Bill of Materials - {project_name}'
+    _page_title(page, title + (' (continued)' if continued else ''))
+    if not widths:
+        page.text(PAGE_WIDTH / 2, PAGE_HEIGHT / 2, 'No BOM items found', size=14, ha='center', va='center')
+        return
+    styles = [{'fill': '#4472C4', 'color': 'white', 'bold': True}]
+    for row in rows:
+        if row[5] == 'TOTAL:':
+            styles.append({'fill': '#FFE699', 'bold': True})
+        else:
+            styles.append({'fill': '#F2F2F2'} if len(styles) % 2 == 0 else {})
+    pdf_writer.table(page, PAGE_MARGIN, PAGE_HEIGHT - 64, widths, [BOM_COLUMNS] + rows, 8,
+          [BOM_ROW_HEIGHT] * (len(rows) + 1), styles)
+
+def draw_native_quote_page(page, content, rows, widths, first=True, last=True):
+    """Native quote page for a slice of the quote_page_content() rows; info on the first page, totals on the last"""
+    top = PAGE_HEIGHT - 64
+    if first:
+        _page_title(page, 'Project Quote', size=20, bold=False)
+        for x, text in ((PAGE_MARGIN, content['project_info']), (PAGE_WIDTH * 0.7, content['quote_info'])):
+            for index, line in enumerate(text.split('\n')):
+                page.text(x, top - index * 12, line, size=10, va='top')
+        top -= QUOTE_INFO_HEIGHT
+    else:
+        _page_title(page, 'Project Quote (continued)', size=20, bold=False)
+    styles = [{'fill': 'black', 'color': 'white', 'bold': True, 'edge': 'black'}]
+    styles += [{'color': '#111827', 'edge': '#E5E7EB'}] * len(rows)
+    pdf_writer.table(page, PAGE_MARGIN, top, widths, [QUOTE_COLUMNS] + rows, 8,
+          [QUOTE_HEADER_HEIGHT] + [QUOTE_ROW_HEIGHT] * len(rows), styles)
+    if last:
+        right = PAGE_WIDTH - PAGE_MARGIN
+        page.text(PAGE_MARGIN, PAGE_MARGIN + 12, content['total_text'], size=12, color=GRAY_TEXT, va='center')
+        page.text(right, PAGE_MARGIN + 12, content['total_price_text'], size=24, ha='right', va='center')
+        page.text(right, PAGE_MARGIN - 10, 'TOTAL PROJECT COST', size=8, bold=True, color=GRAY_TEXT, ha='right', va='center')
+
+def opening_page_label(opening):
+    """Page label of a project_model.Opening's shop drawing page"""
+    return f"Opening {'' if opening.name is None else opening.name}"
+
+def native_package_pages(project_data):
+    """
+    The pages of a native package (a project_model.Project or a raw project dict) as (label, draw)
+    pairs, where draw(page) fills one PdfPage. Long BOM and quote tables continue on further pages.
+    """
+    project = project_model.as_project(project_data)
+    pages = []
+    for opening in project.openings:
+        pages.append((opening_page_label(opening),
+                      lambda page, opening=opening: draw_native_shop_drawing_page(page, opening)))
+    
+    table_width = PAGE_WIDTH - 2 * PAGE_MARGIN
+    bom_rows = collect_bom_rows(project)
+    bom_widths = pdf_writer.column_widths([BOM_COLUMNS] + bom_rows, table_width, 8) if bom_rows else None
+    bom_page_rows = int((PAGE_HEIGHT - 64 - PAGE_MARGIN) // BOM_ROW_HEIGHT) - 1
+    for index, rows in enumerate(_paginate(bom_rows, bom_page_rows, bom_page_rows)):
+        pages.append(('Bill of Materials' if index == 0 else 'Bill of Materials (continued)',
+                      lambda page, rows=rows, index=index: draw_native_bom_page(
+                          page, project.name, rows, bom_widths, continued=index > 0)))
+    
+    content = quote_page_content(project)
+    quote_widths = pdf_writer.column_widths([QUOTE_COLUMNS] + content['rows'], table_width, 8)
+    # Rows between the table header and the room kept for the totals footer
+    page_rows = int((PAGE_HEIGHT - 64 - QUOTE_HEADER_HEIGHT - PAGE_MARGIN - QUOTE_FOOTER_HEIGHT) // QUOTE_ROW_HEIGHT)
+    # The info blocks on the first page take the height of one row
+    quote_pages = _paginate(content['rows'], page_rows - 1, page_rows)
+    for index, rows in enumerate(quote_pages):
+        pages.append(('Quote' if index == 0 else 'Quote (continued)',
+                      lambda page, rows=rows, index=index: draw_native_quote_page(
+                          page, content, rows, quote_widths, first=index == 0, last=index == len(quote_pages) - 1)))
+    return pages
+
+def render_shop_drawing_page_pdf(opening_data, isolate_drawings=False, vector=True, trace_id=None):
+    """
+    Render one opening's shop drawing page as a standalone PDF (runs in a process pool worker)
+    trace_id carries the request's trace ID into the worker.
+    """
+    buffer = io.BytesIO()
+    with service_log.trace(trace_id), open_pdf_pages(buffer) as pdf_pages:
+        create_shop_drawing_page(opening_data, pdf_pages, isolate_drawings=isolate_drawings, vector=vector)
+    return buffer.getvalue()
+
+def write_package_pdf(project_data, output, isolate_drawings=False, vector=True, on_page=None):
+    """
+    Render every page of the package in this process into the file-like `output`.
+    on_page(label) is called as each page is written.
+    """
+    project = project_model.as_project(project_data)
+    on_page = on_page or (lambda label: None)
     
-    if not MATPLOTLIB_AVAILABLE:
+    with open_pdf_pages(output) as pdf_pages:
+        # Create shop drawing pages for each opening
+        for opening in project.openings:
+            create_shop_drawing_page(opening, pdf_pages, isolate_drawings=isolate_drawings, vector=vector)
+            on_page(opening_page_label(opening))
+        
+        # Create BOM page
+        create_bom_page(project, pdf_pages)
+        on_page('Bill of Materials')
+        
+        # Create quote page
+        create_quote_page(project, pdf_pages)
+        on_page('Quote')
+
+def generate_package_pdf(project_data, isolate_drawings=False, vector=True):
+    """Render every page of the package in this process and return the PDF bytes"""
+    buffer = io.BytesIO()
+    write_package_pdf(project_data, buffer, isolate_drawings=isolate_drawings, vector=vector)
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+def write_package_pdf_parallel(project_data, output, isolate_drawings=False, workers=None, vector=True, on_page=None):
+    """
+    Render the opening pages in a process pool (drawing is CPU-bound Python, so threads would share one core) and merge them
+    with the BOM and quote pages in the original order into the file-like `output`.
+    Each opening page is written out as soon as it and every page before it are done.
+    Workers get the normalized opening records, so they do not parse the selections again.
+    """
+    project = project_model.as_project(project_data)
+    on_page = on_page or (lambda label: None)
+    openings = project.openings
+    workers = max(1, min(workers or os.cpu_count() or 1, len(openings) or 1))
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        page_futures = [executor.submit(render_shop_drawing_page_pdf, opening, isolate_drawings, vector,
+                                        service_log.trace_id()) for opening in openings]
+        
+        # BOM and quote pages are rendered here while the workers draw the openings
+        buffer = io.BytesIO()
+        with open_pdf_pages(buffer) as pdf_pages:
+            create_bom_page(project, pdf_pages)
+            create_quote_page(project, pdf_pages)
+        
+        def documents():
+            for opening, future in zip(openings, page_futures):
+                yield future.result()
+                on_page(opening_page_label(opening))
+            yield buffer.getvalue()
+            on_page('Bill of Materials')
+            on_page('Quote')
+        
+        write_merged_pdf(documents(), output)
+
+def generate_package_pdf_parallel(project_data, isolate_drawings=False, workers=None, vector=True):
+    """Parallel variant of generate_package_pdf (see write_package_pdf_parallel). Returns the PDF bytes."""
+    buffer = io.BytesIO()
+    write_package_pdf_parallel(project_data, buffer, isolate_drawings=isolate_drawings, workers=workers, vector=vector)
+    return buffer.getvalue()
+
+def write_package_pdf_native(project_data, output, on_page=None, pages=None):
+    """
+    Write every page of the package with pdf_writer into the file-like `output` (only write()
+    is used). Each page is written out as soon as it is drawn, so memory does not grow with
+    the page count. Drawings are always vectors; pages defaults to native_package_pages().
+    """
+    project = project_model.as_project(project_data)
+    on_page = on_page or (lambda label: None)
+    pages = pages if pages is not None else native_package_pages(project)
+    
+    with pdf_writer.PdfWriter(output, title=f"{'' if project.name is None else project.name} Package") as writer:
+        for label, draw in pages:
+            with writer.page() as page:
+                draw(page)
+            on_page(label)
+
+def unsupported_pdf_backend(pdf_backend):
+    """Error result for a pdf_backend that is not in PDF_BACKENDS"""
+    return {
+        'success': False,
+        'error': f"Unsupported PDF backend: {pdf_backend}. Use one of: {', '.join(PDF_BACKENDS)}"
+    }
+
+def generate_complete_package(project_data, isolate_drawings=False, parallel=False, workers=None, vector=True, pdf_backend='matplotlib', binary=False):
+    """
+    Generate complete project package PDF
+
+    Drawings are drawn as vectors straight into each page by default. Set vector=False to embed
+    300-dpi PNGs instead. Set isolate_drawings to run each drawing in its own python3 subprocess
+    (slower, raster only, but a crash cannot take down the package).
+    Set parallel to render the opening pages across `workers` processes (default: CPU count).
+    pdf_backend='native' writes the pages with pdf_writer instead of matplotlib's PdfPages
+    (vector drawings only; isolate_drawings, parallel and vector do not apply).
+    The project is normalized once (see project_model) and shared by every page.
+    With binary pdf_data is the PDF bytes instead of base64 (for frames.py replies).
+    """
+    
+    if pdf_backend not in PDF_BACKENDS:
+        return unsupported_pdf_backend(pdf_backend)
+    if pdf_backend == 'matplotlib' and not MATPLOTLIB_AVAILABLE:
         return {
             'success': False,
             'error': 'Matplotlib is not available. Please install matplotlib: pip install matplotlib'
         }
     
     try:
-        # Create PDF in memory
-        buffer = io.BytesIO()
-        
-        with PdfPages(buffer) as pdf_pages:
-            # Create shop drawing pages for each opening
-            for opening in project_data.get('openings', []):
-                create_shop_drawing_page(opening, pdf_pages)
-            
-            # Create BOM page
-            create_bom_page(project_data, pdf_pages)
-            
-            # Create quote page
-            create_quote_page(project_data, pdf_pages)
-        
-        # Get PDF data
-        buffer.seek(0)
-        pdf_data = buffer.getvalue()
-        buffer.close()
-        
-        # Encode as base64
-        pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
+        project = project_model.normalize_project(project_data)
+        if pdf_backend == 'native':
+            buffer = io.BytesIO()
+            write_package_pdf_native(project, buffer)
+            pdf_data = buffer.getvalue()
+        elif parallel:
+            pdf_data = generate_package_pdf_parallel(project, isolate_drawings=isolate_drawings, workers=workers, vector=vector)
+        else:
+            pdf_data = generate_package_pdf(project, isolate_drawings=isolate_drawings, vector=vector)
         
         return {
             'success': True,
-            'pdf_data': pdf_base64
+            'pdf_data': pdf_data if binary else base64.b64encode(pdf_data).decode('utf-8')
         }
     except Exception as e:
         return {
@@ -585,7 +899,120 @@ def generate_complete_package(project_data):
             'error': f'Error creating PDF: {str(e)}'
         }
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class PackageStream(io.RawIOBase):
+    """
+    Write-only, non-seekable file for PdfPages in streaming mode. PDF bytes are forwarded as
+    base64 "data" events of at most chunk_size raw bytes instead of being collected in memory.
+    With binary every event is a frame (see frames.py) on the byte stream output_stream and
+    "data" carries the raw bytes.
+    """
+
+    def __init__(self, output_stream, chunk_size=STREAM_CHUNK_SIZE, extra=None, binary=False):
+        super().__init__()
+        self.output_stream = output_stream
+        self.chunk_size = chunk_size
+        self.extra = extra or {}
+        self.binary = binary
+        self.pending = bytearray()
+        self.position = 0
+        self.sent = 0
+
+    def event(self, event, **fields):
+        """Write one NDJSON event line, or one frame"""
+        line = dict({'event': event}, **fields, **self.extra)
+        if self.binary:
+            frames.write(self.output_stream, line)
+            return
+        self.output_stream.write(json.dumps(line) + '\n')
+        self.output_stream.flush()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending += data
+        self.position += len(data)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        """Send everything written so far"""
+        view = memoryview(self.pending)
+        for start in range(0, len(view), self.chunk_size):
+            chunk = view[start:start + self.chunk_size]
+            self.event('data', offset=self.sent, data=chunk if self.binary else base64.b64encode(chunk).decode('ascii'))
+            self.sent += len(chunk)
+        view.release()
+        self.pending = bytearray()
+
+def stream_complete_package(project_data, output_stream, isolate_drawings=False, parallel=False, workers=None, vector=True, extra=None, pdf_backend='matplotlib', binary=False):
+    """
+    Streaming variant of generate_complete_package. Writes newline-delimited JSON events to
+    output_stream as the PDF is produced, so the caller never holds the whole document as one
+    base64 string:
+
+        {"event": "start", "pages": N}
+        {"event": "data", "offset": 0, "data": "<base64 PDF bytes>"}
+        {"event": "page", "page": 1, "pages": N, "label": "Opening 101"}
+        ...
+        {"event": "end", "success": true, "bytes": <PDF size>}
+
+    Concatenating the decoded "data" chunks in order gives the PDF. On failure the stream
+    ends with {"event": "error", "success": false, "error": "..."} instead of "end".
+    `extra` keys (e.g. a worker request id) are added to every event. With pdf_backend='native'
+    long BOM and quote tables continue on further pages, which N already counts.
+    With binary the same events are written as frames to the byte stream output_stream, their
+    "data" as raw PDF bytes.
+    """
+    stream = PackageStream(output_stream, extra=extra, binary=binary)
+    
+    if pdf_backend not in PDF_BACKENDS:
+        stream.event('error', **unsupported_pdf_backend(pdf_backend))
+        return
+    if pdf_backend == 'matplotlib' and not MATPLOTLIB_AVAILABLE:
+        stream.event('error', success=False, error='Matplotlib is not available. Please install matplotlib: pip install matplotlib')
+        return
+    
+    native_pages = None
+    try:
+        project = project_model.normalize_project(project_data)
+        if pdf_backend == 'native':
+            native_pages = native_package_pages(project)
+            total_pages = len(native_pages)
+        else:
+            total_pages = len(project.openings) + 2
+    except Exception as e:
+        stream.event('error', success=False, error=f'Error creating PDF: {str(e)}')
+        return
+    pages_done = 0
+    
+    def on_page(label):
+        nonlocal pages_done
+        pages_done += 1
+        stream.flush()
+        stream.event('page', page=pages_done, pages=total_pages, label=label)
+    
+    stream.event('start', pages=total_pages)
+    try:
+        if native_pages is not None:
+            write_package_pdf_native(project, stream, on_page=on_page, pages=native_pages)
+        elif parallel:
+            write_package_pdf_parallel(project, stream, isolate_drawings=isolate_drawings, workers=workers, vector=vector, on_page=on_page)
+        else:
+            write_package_pdf(project, stream, isolate_drawings=isolate_drawings, vector=vector, on_page=on_page)
+        stream.flush()
+        stream.event('end', success=True, bytes=stream.tell())
+    except Exception as e:
+        stream.event('error', success=False, error=f'Error creating PDF: {str(e)}')
+
 def main():
+    input_data = None
     try:
         # Read input from stdin
         input_text = sys.stdin.read()
@@ -597,23 +1024,62 @@ def main():
             return
             
         input_data = json.loads(input_text)
+        # "transport": "binary" replies are frames with raw PDF bytes (see frames.py)
+        binary = binary_transport(input_data)
         
-        if input_data.get('type') == 'complete_package':
-            project_data = input_data.get('project')
-            if not project_data:
-                print(json.dumps({
-                    'success': False,
-                    'error': 'No project data provided'
-                }))
-                return
+        with service_log.trace(input_data.get('traceId')):
+            if input_data.get('type') == 'complete_package':
+                project_data = input_data.get('project')
+                if not project_data:
+                    write_reply(sys.stdout, {
+                        'success': False,
+                        'error': 'No project data provided'
+                    }, binary)
+                    return
+            
+                if input_data.get('stream'):
+                    # Progress events and PDF chunks on stdout; keep stray prints on stderr
+                    output_stream = sys.stdout
+                    sys.stdout = sys.stderr
+                    try:
+                        stream_complete_package(
+                            project_data,
+                            output_stream.buffer if binary else output_stream,
+                            isolate_drawings=input_data.get('isolateDrawings', False),
+                            parallel=input_data.get('parallel', False),
+                            workers=input_data.get('workers'),
+                            vector=input_data.get('vector', True),
+                            pdf_backend=input_data.get('pdfBackend', 'matplotlib'),
+                            binary=binary
+                        )
+                    finally:
+                        sys.stdout = output_stream
+                    return
                 
-            result = generate_complete_package(project_data)
-            print(json.dumps(result))
-        else:
-            print(json.dumps({
-                'success': False,
-                'error': f'Unknown request type: {input_data.get("type", "none")}'
-            }))
+                result = generate_complete_package(
+                    project_data,
+                    isolate_drawings=input_data.get('isolateDrawings', False),
+                    parallel=input_data.get('parallel', False),
+                    workers=input_data.get('workers'),
+                    vector=input_data.get('vector', True),
+                    pdf_backend=input_data.get('pdfBackend', 'matplotlib'),
+                    binary=binary
+                )
+                write_reply(sys.stdout, result, binary)
+            elif input_data.get('type') == 'bom':
+                project_data = input_data.get('project')
+                if not project_data:
+                    write_reply(sys.stdout, {
+                        'success': False,
+                        'error': 'No project data provided'
+                    }, binary)
+                    return
+                write_reply(sys.stdout, bom_export(project_data), binary)
+            else:
+                write_reply(sys.stdout, {
+                    'success': False,
+                    'error': f'Unknown request type: {input_data.get("type", "none")}'
+                }, binary)
             
     except json.JSONDecodeError as e:
         print(json.dumps({
@@ -621,10 +1087,10 @@ def main():
             'error': f'Invalid JSON input: {str(e)}'
         }))
     except Exception as e:
-        print(json.dumps({
+        write_reply(sys.stdout, {
             'success': False,
             'error': f'Error generating package: {str(e)}'
-        }))
+        }, binary_transport(input_data))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Minimal PDF merger for the documents written by matplotlib's PdfPages.
+
+Used to stitch together pages that were rendered in separate worker processes.
+Only handles classic cross-reference tables (which is what matplotlib writes);
+it is not a general purpose PDF library.
+
+Objects are parsed into dictionaries, arrays and references, so object numbers are only
+rewritten where they are references (never inside strings or stream data), and stream data
+is read using its /Length. Only objects reachable from the pages are copied. The first
+document's Info dictionary (Creator, Producer, CreationDate) becomes the merged one.
+
+Every worker embeds its own subset of each Type 3 font (matplotlib's default). The subsets
+share a /BaseFont apart from the XXXXXX+ subset tag matplotlib >= 3.9 adds, and are merged
+when every character code they both use has the same glyph and width: each glyph procedure
+is copied once and the pages share one font dictionary, whose /Encoding, /Widths and
+/ToUnicode cover the codes of every document. So the merged file is about the size of the
+same pages rendered in one process. Subsets whose codes disagree stay separate fonts.
+"""
+
+import io
+import re
+import zlib
+
+_WHITESPACE = b' \t\r\n\f\x00'
+_REF_PATTERN = re.compile(rb'(\d+)\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])')
+_OBJ_HEADER_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_TOKEN_PATTERN = re.compile(rb'[^\s()<>\[\]{}/%\x00]*')
+_SUBSET_TAG_PATTERN = re.compile(rb'^/[A-Z]{6}\+')
+
+
+class _Ref:
+    """An indirect reference (`N G R`)"""
+    __slots__ = ('number',)
+
+    def __init__(self, number):
+        self.number = number
+
+
+class _Object:
+    """A parsed indirect object: value is a dict, list, _Ref or raw token bytes; stream is the data or None"""
+    __slots__ = ('value', 'stream')
+
+    def __init__(self, value, stream):
+        self.value = value
+        self.stream = stream
+
+
+def _skip_space(data, pos):
+    """Position of the next token, skipping whitespace and comments"""
+    while pos < len(data):
+        if data[pos] in _WHITESPACE:
+            pos += 1
+        elif data[pos] == ord('%'):
+            while pos < len(data) and data[pos] not in b'\r\n':
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _literal_string_end(data, pos):
+    """End of the literal string starting at data[pos] == '(' (balanced parentheses, backslash escapes)"""
+    depth = 0
+    while True:
+        char = data[pos]
+        if char == ord('\\'):
+            pos += 2
+            continue
+        if char == ord('('):
+            depth += 1
+        elif char == ord(')'):
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+
+
+def _parse_value(data, pos):
+    """
+    Parse the PDF object at data[pos]; return (value, end). Dictionaries become dicts keyed by
+    raw name bytes, arrays lists and references _Ref; names, numbers, strings, booleans and
+    null are kept as their raw bytes, so they are written back unchanged.
+    """
+    pos = _skip_space(data, pos)
+    if data.startswith(b'<<', pos):
+        value = {}
+        pos = _skip_space(data, pos + 2)
+        while not data.startswith(b'>>', pos):
+            key, pos = _parse_value(data, pos)
+            value[key], pos = _parse_value(data, pos)
+            pos = _skip_space(data, pos)
+        return value, pos + 2
+    if data[pos] == ord('['):
+        value = []
+        pos = _skip_space(data, pos + 1)
+        while data[pos] != ord(']'):
+            item, pos = _parse_value(data, pos)
+            value.append(item)
+            pos = _skip_space(data, pos)
+        return value, pos + 1
+    if data[pos] == ord('('):
+        end = _literal_string_end(data, pos)
+        return data[pos:end], end
+    if data[pos] == ord('<'):
+        end = data.index(b'>', pos) + 1
+        return data[pos:end], end
+    match = _REF_PATTERN.match(data, pos)
+    if match:
+        return _Ref(int(match.group(1))), match.end()
+    # A name keeps its slash; anything else is a number or keyword
+    start = pos
+    if data[pos] == ord('/'):
+        pos += 1
+    end = _TOKEN_PATTERN.match(data, pos).end()
+    if end == start:
+        raise ValueError(f"Unexpected PDF syntax at byte {start}")
+    return data[start:end], end
+
+
+def _serialize(value, renumber):
+    """PDF bytes for a parsed value, with references mapped through renumber"""
+    if isinstance(value, dict):
+        return b'<< ' + b' '.join(key + b' ' + _serialize(item, renumber) for key, item in value.items()) + b' >>'
+    if isinstance(value, list):
+        return b'[ ' + b' '.join(_serialize(item, renumber) for item in value) + b' ]'
+    if isinstance(value, _Ref):
+        return b'%d 0 R' % renumber[value.number]
+    return value
+
+
+class _Document:
+    """One input PDF: objects are located through the xref table and parsed on first use"""
+
+    def __init__(self, pdf_data):
+        self.data = pdf_data
+        self.parsed = {}
+        startxref = pdf_data.rindex(b'startxref')
+        xref_offset = int(pdf_data[startxref + len(b'startxref'):].split()[0])
+        trailer_start = pdf_data.index(b'trailer', xref_offset)
+
+        self.offsets = {}
+        tokens = pdf_data[xref_offset + len(b'xref'):trailer_start].split()
+        index = 0
+        while index < len(tokens):
+            first, count = int(tokens[index]), int(tokens[index + 1])
+            index += 2
+            for number in range(first, first + count):
+                if tokens[index + 2] == b'n':
+                    self.offsets[number] = int(tokens[index])
+                index += 3
+
+        self.trailer, _ = _parse_value(pdf_data, trailer_start + len(b'trailer'))
+
+    def get(self, number):
+        """The parsed object `number`"""
+        if number not in self.parsed:
+            data = self.data
+            header = _OBJ_HEADER_PATTERN.match(data, self.offsets[number])
+            value, pos = _parse_value(data, header.end())
+            stream = None
+            pos = _skip_space(data, pos)
+            if data.startswith(b'stream', pos):
+                pos += len(b'stream')
+                pos += 2 if data.startswith(b'\r\n', pos) else 1
+                stream = data[pos:pos + self.resolve(value[b'/Length'])]
+            self.parsed[number] = _Object(value, stream)
+        return self.parsed[number]
+
+    def resolve(self, value):
+        """Follow a reference to its (non-stream) value; other values are returned as they are"""
+        if isinstance(value, _Ref):
+            value = self.get(value.number).value
+        return int(value) if isinstance(value, bytes) and value.isdigit() else value
+
+    def page_numbers(self):
+        """Object numbers of the pages, in order"""
+        catalog = self.resolve(self.trailer[b'/Root'])
+        return [kid.number for kid in self.resolve(self.resolve(catalog[b'/Pages'])[b'/Kids'])]
+
+
+class _Type3Font:
+    """
+    A Type 3 font shared by merged documents. The first document's font dictionary is kept
+    (its references numbered by that document's renumber map); /CharProcs, the /Encoding
+    differences, /Widths and /ToUnicode collect the glyphs of every document, by glyph name and code.
+    """
+
+    def __init__(self, number, document, value, renumber):
+        self.number = number
+        self.value = value
+        self.encoding = document.resolve(value.get(b'/Encoding'))
+        self.renumber = renumber
+        self.char_procs = {}
+        self.differences = {}
+        self.widths = {}
+        self.unicode = {}
+        self.to_unicode_number = None
+
+    @staticmethod
+    def _codes(document, value):
+        """({code: glyph name}, {code: width}) of the codes a document's copy of the font uses"""
+        encoding = document.resolve(value.get(b'/Encoding'))
+        differences = {}
+        code = 0
+        for item in document.resolve(encoding.get(b'/Differences', [])) if isinstance(encoding, dict) else []:
+            if item.startswith(b'/'):
+                differences.setdefault(code, item)
+                code += 1
+            else:
+                code = int(item)
+        first_char = document.resolve(value.get(b'/FirstChar', b'0'))
+        widths = {}
+        for offset, width in enumerate(document.resolve(value.get(b'/Widths', []))):
+            code = first_char + offset
+            if code in differences or not differences:
+                widths[code] = width
+        return differences, widths
+
+    def accepts(self, document, value):
+        """Whether a document's copy of the font gives every code both use the same glyph and width"""
+        differences, widths = self._codes(document, value)
+        return (all(self.differences.get(code, name) == name for code, name in differences.items())
+                and all(float(self.widths.get(code, width)) == float(width) for code, width in widths.items()))
+
+    def add(self, document, value):
+        """Merge a document's copy of the font; return [(object number, glyph name)] of the glyphs not seen before"""
+        differences, widths = self._codes(document, value)
+        for code, name in differences.items():
+            self.differences.setdefault(code, name)
+        for code, width in widths.items():
+            self.widths.setdefault(code, width)
+        if b'/ToUnicode' in value:
+            for code, text in _cmap_entries(document.get(value[b'/ToUnicode'].number)).items():
+                self.unicode.setdefault(code, text)
+        return [(ref.number, name) for name, ref in document.resolve(value[b'/CharProcs']).items()
+                if name not in self.char_procs]
+
+    def serialize(self):
+        """The merged font dictionary, with inline /CharProcs, /Encoding and /Widths"""
+        value = dict(self.value)
+        # Glyph procedures are already numbered in the merged file
+        value[b'/CharProcs'] = {name: b'%d 0 R' % number for name, number in self.char_procs.items()}
+        if isinstance(self.encoding, dict):
+            differences = []
+            for code in sorted(self.differences):
+                if code - 1 not in self.differences:
+                    differences.append(b'%d' % code)
+                differences.append(self.differences[code])
+            value[b'/Encoding'] = {key: item for key, item in self.encoding.items() if key != b'/Differences'}
+            value[b'/Encoding'][b'/Differences'] = differences
+        if self.widths:
+            first_char, last_char = min(self.widths), max(self.widths)
+            value[b'/FirstChar'] = b'%d' % first_char
+            value[b'/LastChar'] = b'%d' % last_char
+            value[b'/Widths'] = [_serialize(self.widths.get(code, b'0'), self.renumber)
+                                 for code in range(first_char, last_char + 1)]
+        if self.to_unicode_number is not None:
+            value[b'/ToUnicode'] = b'%d 0 R' % self.to_unicode_number
+        return _serialize(value, self.renumber)
+
+    def serialize_to_unicode(self):
+        """The merged /ToUnicode CMap stream object"""
+        entries = sorted(self.unicode.items())
+        lines = [b'/CIDInit /ProcSet findresource begin', b'12 dict begin', b'begincmap',
+                 b'/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+                 b'/CMapName /Adobe-Identity-UCS def', b'/CMapType 2 def',
+                 b'1 begincodespacerange', b'<00> <ff>', b'endcodespacerange']
+        # At most 100 entries per bfchar block
+        for start in range(0, len(entries), 100):
+            block = entries[start:start + 100]
+            lines.append(b'%d beginbfchar' % len(block))
+            lines.extend(b'<%02x> <%s>' % (code, text) for code, text in block)
+            lines.append(b'endbfchar')
+        lines += [b'endcmap', b'CMapName currentdict /CMap defineresource pop', b'end', b'end']
+        stream = zlib.compress(b'\n'.join(lines))
+        return b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream'
+
+
+def _cmap_entries(obj):
+    """{code: UTF-16BE hex} of a ToUnicode CMap stream (bfchar entries and bfrange arrays or starts)"""
+    data = obj.stream
+    if obj.value.get(b'/Filter') == b'/FlateDecode':
+        data = zlib.decompress(data)
+    entries = {}
+    for block in re.findall(rb'beginbfchar(.*?)endbfchar', data, re.S):
+        for source, target in re.findall(rb'<([0-9a-fA-F]+)>\s*<([0-9a-fA-F]+)>', block):
+            entries[int(source, 16)] = target
+    for block in re.findall(rb'beginbfrange(.*?)endbfrange', data, re.S):
+        for low, high, targets in re.findall(rb'<([0-9a-fA-F]+)>\s*<([0-9a-fA-F]+)>\s*(\[[^\]]*\]|<[0-9a-fA-F]+>)', block):
+            low, high = int(low, 16), int(high, 16)
+            if targets.startswith(b'['):
+                for code, target in zip(range(low, high + 1), re.findall(rb'<([0-9a-fA-F]+)>', targets)):
+                    entries[code] = target
+            else:
+                first = int(targets[1:-1], 16)
+                width = len(targets) - 2
+                for code in range(low, high + 1):
+                    entries[code] = b'%0*x' % (width, first + code - low)
+    return entries
+
+
+def _is_type3_font(value):
+    return isinstance(value, dict) and value.get(b'/Type') == b'/Font' and value.get(b'/Subtype') == b'/Type3'
+
+
+def _font_name(value):
+    """/BaseFont without the XXXXXX+ subset tag matplotlib >= 3.9 gives every document's subset"""
+    return _SUBSET_TAG_PATTERN.sub(b'/', value.get(b'/BaseFont') or b'')
+
+
+def write_merged_pdf(documents, output):
+    """
+    Merge an iterable of PDF byte strings into one PDF written to `output` (anything with
+    write()), keeping page order. Each document's objects are written as soon as it is
+    consumed, so documents may be produced lazily (e.g. as worker processes finish); only the
+    merged fonts are written at the end.
+    """
+    page_numbers = []
+    next_number = 3  # 1 = catalog, 2 = page tree
+    offsets = {}
+    position = 0
+    fonts = {}
+    info_number = None
+
+    def write_object(number, body):
+        nonlocal position
+        offsets[number] = position
+        data = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        output.write(data)
+        position += len(data)
+
+    header = b'%PDF-1.4\n%\xac\xdc \xab\xba\n'
+    output.write(header)
+    position += len(header)
+
+    for pdf_data in documents:
+        document = _Document(pdf_data)
+        catalog = document.resolve(document.trailer[b'/Root'])
+        pages_tree = catalog[b'/Pages'].number
+        kids = document.page_numbers()
+        roots = list(kids)
+        if info_number is None and b'/Info' in document.trailer:
+            roots.append(document.trailer[b'/Info'].number)
+
+        # Walk the objects reachable from the pages, giving each a number in the merged file.
+        # Type 3 fonts seen in an earlier document map to that font; only their new glyphs are copied.
+        renumber = {pages_tree: 2}
+        pending = list(roots)
+        copied = []
+        while pending:
+            number = pending.pop()
+            if number in renumber:
+                continue
+            value = document.get(number).value
+            refs = []
+            if _is_type3_font(value):
+                # A font with a code that maps to another glyph or width stays a separate font
+                candidates = fonts.setdefault(_font_name(value), [])
+                font = next((font for font in candidates if font.accepts(document, value)), None)
+                if font is None:
+                    font = _Type3Font(next_number, document, value, renumber)
+                    candidates.append(font)
+                    next_number += 1
+                    if b'/ToUnicode' in value:
+                        font.to_unicode_number = next_number
+                        next_number += 1
+                    refs = [item for key, item in value.items() if key not in (b'/CharProcs', b'/Encoding', b'/Widths', b'/ToUnicode')]
+                renumber[number] = font.number
+                for glyph, name in font.add(document, value):
+                    if glyph not in renumber:
+                        renumber[glyph] = next_number
+                        next_number += 1
+                        copied.append(glyph)
+                    font.char_procs[name] = renumber[glyph]
+            else:
+                renumber[number] = next_number
+                next_number += 1
+                copied.append(number)
+                refs = [value]
+            stack = refs
+            while stack:
+                item = stack.pop()
+                if isinstance(item, _Ref):
+                    pending.append(item.number)
+                elif isinstance(item, dict):
+                    stack.extend(item for key, item in item.items() if key != b'/Length')
+                elif isinstance(item, list):
+                    stack.extend(item)
+
+        for number in sorted(copied, key=renumber.get):
+            obj = document.get(number)
+            if obj.stream is None:
+                write_object(renumber[number], _serialize(obj.value, renumber))
+            else:
+                value = dict(obj.value)
+                value[b'/Length'] = b'%d' % len(obj.stream)
+                write_object(renumber[number], _serialize(value, renumber) + b'\nstream\n' + obj.stream + b'\nendstream')
+
+        if info_number is None and b'/Info' in document.trailer:
+            info_number = renumber[document.trailer[b'/Info'].number]
+        page_numbers.extend(renumber[kid] for kid in kids)
+
+    for candidates in fonts.values():
+        for font in candidates:
+            write_object(font.number, font.serialize())
+            if font.to_unicode_number is not None:
+                write_object(font.to_unicode_number, font.serialize_to_unicode())
+
+    kids = b' '.join(b'%d 0 R' % number for number in page_numbers)
+    write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    write_object(2, b'<< /Type /Pages /Kids [ ' + kids + b' ] /Count %d >>' % len(page_numbers))
+
+    xref_offset = position
+    size = next_number
+    out = bytearray(b'xref\n0 %d\n' % size)
+    out += b'0000000000 65535 f \n'
+    for number in range(1, size):
+        if number in offsets:
+            out += b'%010d 00000 n \n' % offsets[number]
+        else:
+            out += b'0000000000 65535 f \n'
+    info = b' /Info %d 0 R' % info_number if info_number is not None else b''
+    out += b'trailer\n<< /Size %d /Root 1 0 R%s >>\nstartxref\n%d\n%%%%EOF\n' % (size, info, xref_offset)
+    output.write(bytes(out))
+
+
+def merge_pdfs(documents):
+    """
+    Merge a list of PDF byte strings into one PDF, keeping page order.
+    """
+    output = io.BytesIO()
+    write_merged_pdf(documents, output)
+    return output.getvalue()
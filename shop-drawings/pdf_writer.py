@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Streaming PDF writer for package pages that do not need matplotlib.
+
+Pages are drawn with PDF path and text operators into a PdfPage, and PdfWriter writes each
+page to the output as soon as it is finished: its compressed content stream, then the page
+object. Only the object offsets are kept until close() writes the page tree, the
+cross-reference table and the trailer, so a document of any length holds one page in memory
+and can be written to a write-only stream (package_generator.PackageStream).
+
+Text uses the standard Helvetica and Helvetica-Bold fonts in WinAnsi encoding. Every PDF
+viewer provides these, so no font program is embedded at all, which is smaller than any
+subset; the Adobe metrics below drive alignment, column widths and truncation. Coordinates
+are points with the origin at the bottom left of the page. This module must stay free of
+matplotlib and numpy imports.
+"""
+
+import math
+import zlib
+from contextlib import contextmanager
+
+LETTER_LANDSCAPE = (792, 612)
+
+# Advance widths (1/1000 em) of WinAnsi codes 32..255, from the Adobe Helvetica AFM files
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584, 0,
+    556, 0, 222, 556, 333, 1000, 556, 556, 333, 1000, 667, 333, 1000, 0, 611, 0,
+    0, 222, 222, 333, 333, 350, 556, 1000, 333, 1000, 500, 333, 944, 0, 500, 667,
+    278, 333, 556, 556, 556, 556, 260, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 556, 537, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    667, 667, 667, 667, 667, 667, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 500, 556, 556, 556, 556, 278, 278, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 584, 611, 556, 556, 556, 556, 500, 556, 500,
+)
+HELVETICA_BOLD_WIDTHS = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584, 0,
+    556, 0, 278, 556, 500, 1000, 556, 556, 333, 1000, 667, 333, 1000, 0, 611, 0,
+    0, 278, 278, 500, 500, 350, 556, 1000, 333, 1000, 556, 333, 944, 0, 500, 667,
+    278, 333, 556, 556, 556, 556, 280, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 611, 556, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 556, 556, 556, 556, 556, 278, 278, 278, 278,
+    611, 611, 611, 611, 611, 611, 611, 584, 611, 611, 611, 611, 611, 556, 611, 556,
+)
+
+FONT_ASCENT = 0.718
+FONT_DESCENT = 0.207
+FONTS = {
+    False: ('F1', 'Helvetica', HELVETICA_WIDTHS),
+    True: ('F2', 'Helvetica-Bold', HELVETICA_BOLD_WIDTHS),
+}
+
+# The named colors the drawings and pages use, as RGB fractions
+COLORS = {
+    'black': (0, 0, 0),
+    'white': (1, 1, 1),
+    'gray': (128 / 255, 128 / 255, 128 / 255),
+    'lightgray': (211 / 255, 211 / 255, 211 / 255),
+    'royalblue': (65 / 255, 105 / 255, 225 / 255),
+    'red': (1, 0, 0),
+}
+
+LINE_CAPS = {'butt': 0, 'round': 1, 'projecting': 2}
+LINE_JOINS = {'miter': 0, 'round': 1, 'bevel': 2}
+
+
+def rgb(color):
+    """(r, g, b) fractions for a color name, '#rrggbb' or tuple; None for no color"""
+    if color is None or color == 'none':
+        return None
+    if isinstance(color, tuple):
+        return color[:3]
+    if color.startswith('#') and len(color) == 7:
+        return tuple(int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+    if color in COLORS:
+        return COLORS[color]
+    raise ValueError(f"Unknown color: {color}")
+
+def num(value):
+    """Compact number formatting for content streams: 2 decimals, no trailing zeros"""
+    text = f'{value:.2f}'.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+def encode_text(text):
+    """WinAnsi bytes of text; characters outside it become '?'"""
+    return str(text).encode('cp1252', 'replace')
+
+def text_width(text, size, bold=False):
+    """Width in points of one line of text"""
+    widths = FONTS[bool(bold)][2]
+    return sum(widths[code - 32] for code in encode_text(text) if code >= 32) * size / 1000
+
+def fit_text(text, width, size, bold=False):
+    """text, shortened with '...' where it would be wider than width"""
+    text = str(text)
+    if text_width(text, size, bold) <= width:
+        return text
+    while text and text_width(text + '...', size, bold) > width:
+        text = text[:-1]
+    return text.rstrip() + '...' if text else ''
+
+def _literal(text):
+    """PDF string literal of text, with everything outside printable ASCII escaped"""
+    out = bytearray(b'(')
+    for code in encode_text(text):
+        if code in b'()\\':
+            out += b'\\' + bytes([code])
+        elif 32 <= code < 127:
+            out.append(code)
+        else:
+            out += b'\\%03o' % code
+    out += b')'
+    return out.decode('ascii')
+
+
+class PdfPage:
+    """
+    Content of one page. Graphics state is tracked so repeated colors and line styles are
+    only written once; save()/restore() bracket changes such as clipping.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.ops = []
+        self.state = {}
+        self.saved = []
+
+    def save(self):
+        self.ops.append('q')
+        self.saved.append(dict(self.state))
+
+    def restore(self):
+        self.ops.append('Q')
+        self.state = self.saved.pop()
+
+    def _set(self, key, value, op):
+        if self.state.get(key) != value:
+            self.state[key] = value
+            self.ops.append(op)
+
+    def set_fill(self, color):
+        r, g, b = rgb(color)
+        self._set('fill', (r, g, b), f'{num(r)} {num(g)} {num(b)} rg')
+
+    def set_stroke(self, color, linewidth=1.0, dash=None, cap='butt', join='miter'):
+        r, g, b = rgb(color)
+        self._set('stroke', (r, g, b), f'{num(r)} {num(g)} {num(b)} RG')
+        self._set('linewidth', linewidth, f'{num(linewidth)} w')
+        dash = tuple(dash or ())
+        self._set('dash', dash, '[' + ' '.join(num(d) for d in dash) + '] 0 d')
+        self._set('cap', cap, f'{LINE_CAPS[cap]} J')
+        self._set('join', join, f'{LINE_JOINS[join]} j')
+
+    def clip(self, x, y, width, height):
+        """Clip everything up to the next restore() to a rectangle"""
+        self.ops.append(f'{num(x)} {num(y)} {num(width)} {num(height)} re W n')
+
+    def path(self, commands, fill=None, stroke=None, linewidth=1.0, dash=None, cap='butt', join='miter'):
+        """Paint path operators (m, l, c, h, re ...), filled and/or stroked"""
+        fill = rgb(fill)
+        if not linewidth:
+            stroke = None
+        stroke = rgb(stroke)
+        if fill is None and stroke is None:
+            return
+        if fill is not None:
+            self.set_fill(fill)
+        if stroke is not None:
+            self.set_stroke(stroke, linewidth, dash, cap, join)
+        paint = 'B' if fill is not None and stroke is not None else ('f' if fill is not None else 'S')
+        self.ops.append(f'{commands} {paint}')
+
+    def rect(self, x, y, width, height, fill=None, stroke=None, linewidth=1.0):
+        self.path(f'{num(x)} {num(y)} {num(width)} {num(height)} re', fill=fill, stroke=stroke, linewidth=linewidth)
+
+    def line(self, x0, y0, x1, y1, color='black', linewidth=1.0, dash=None):
+        self.path(f'{num(x0)} {num(y0)} m {num(x1)} {num(y1)} l', stroke=color, linewidth=linewidth, dash=dash)
+
+    def text(self, x, y, text, size=10, bold=False, color='black', ha='left', va='baseline', rotation=0):
+        """
+        One line of text anchored at (x, y) with matplotlib's alignment names. For rotation 90,
+        ha and va align the rotated box, as in matplotlib.
+        """
+        text = str(text)
+        if not text:
+            return
+        width = text_width(text, size, bold)
+        if rotation == 90:
+            # Text runs upwards with its top to the left: va moves along it, ha across it
+            dx = {'left': FONT_ASCENT * size, 'right': -FONT_DESCENT * size}.get(ha, (FONT_ASCENT - FONT_DESCENT) / 2 * size)
+            dy = {'bottom': 0, 'baseline': 0, 'top': -width}.get(va, -width / 2)
+            matrix = f'0 1 -1 0 {num(x + dx)} {num(y + dy)}'
+        else:
+            dx = {'left': 0, 'right': -width}.get(ha, -width / 2)
+            dy = {'baseline': 0, 'center_baseline': 0, 'bottom': FONT_DESCENT * size,
+                  'top': -FONT_ASCENT * size}.get(va, -(FONT_ASCENT - FONT_DESCENT) / 2 * size)
+            if rotation:
+                cos_a = math.cos(math.radians(rotation))
+                sin_a = math.sin(math.radians(rotation))
+                dx, dy = dx * cos_a - dy * sin_a, dx * sin_a + dy * cos_a
+                matrix = f'{num(cos_a)} {num(sin_a)} {num(-sin_a)} {num(cos_a)} {num(x + dx)} {num(y + dy)}'
+            else:
+                matrix = f'1 0 0 1 {num(x + dx)} {num(y + dy)}'
+        self.set_fill(color)
+        font = FONTS[bool(bold)][0]
+        self.ops.append(f'BT /{font} {num(size)} Tf {matrix} Tm {_literal(text)} Tj ET')
+
+    def content(self):
+        return '\n'.join(self.ops).encode('latin-1')
+
+
+def column_widths(rows, total_width, size, padding=3, bold_rows=(0,)):
+    """
+    Column widths that fill total_width: columns get their widest line (plus padding) when
+    everything fits, scaled up to the full width; otherwise narrow columns keep their width
+    and the wide ones share what is left.
+    """
+    columns = max(len(row) for row in rows)
+    natural = [2 * padding] * columns
+    for index, row in enumerate(rows):
+        for column, cell in enumerate(row):
+            for line in str(cell).split('\n'):
+                natural[column] = max(natural[column], text_width(line, size, index in bold_rows) + 2 * padding)
+    if sum(natural) <= total_width:
+        return [width * total_width / sum(natural) for width in natural]
+    fixed = {}
+    while True:
+        share = (total_width - sum(fixed.values())) / (columns - len(fixed))
+        narrow = {column: width for column, width in enumerate(natural) if column not in fixed and width <= share}
+        if not narrow:
+            break
+        fixed.update(narrow)
+    return [fixed.get(column, share) for column in range(columns)]
+
+def table(page, x, top, widths, rows, size, row_heights, styles=None, padding=3):
+    """
+    Draw rows of cells (multi-line cells split on newlines, left aligned and vertically
+    centered, cut to their column) from top downwards and return the bottom y.
+    styles[i] styles row i: fill, color, bold and edge (border color) keys.
+    """
+    y = top
+    line_height = size * 1.2
+    for index, row in enumerate(rows):
+        style = (styles[index] if styles else None) or {}
+        bold = style.get('bold', False)
+        row_height = row_heights[index]
+        y -= row_height
+        cell_x = x
+        for column, cell in enumerate(row):
+            width = widths[column]
+            page.rect(cell_x, y, width, row_height, fill=style.get('fill'), stroke=style.get('edge', 'black'), linewidth=0.5)
+            lines = str(cell).split('\n') if cell != '' else []
+            baseline = y + row_height / 2 + (len(lines) - 1) * line_height / 2
+            for line in lines:
+                page.text(cell_x + padding, baseline, fit_text(line, width - 2 * padding, size, bold),
+                          size=size, bold=bold, color=style.get('color', 'black'), va='center')
+                baseline -= line_height
+            cell_x += width
+    return y
+
+
+class PdfWriter:
+    """
+    Writes a PDF page by page into the file-like output (only write() is used):
+
+        with PdfWriter(output) as writer:
+            with writer.page() as page:
+                page.text(72, 540, 'Hello')
+    """
+
+    def __init__(self, output, title=None):
+        self.output = output
+        self.position = 0
+        self.offsets = {}
+        self.page_numbers = []
+        self.object_count = 0
+        self.title = title
+        self.catalog_number = self._reserve()
+        self.pages_number = self._reserve()
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        fonts = []
+        for name, base_font, _ in FONTS.values():
+            number = self._reserve()
+            self._object(number, f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>')
+            fonts.append(f'/{name} {number} 0 R')
+        self.resources = '<< /Font << ' + ' '.join(fonts) + ' >> >>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        return False
+
+    def _reserve(self):
+        self.object_count += 1
+        return self.object_count
+
+    def _write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _object(self, number, body, stream=None):
+        self.offsets[number] = self.position
+        data = f'{number} 0 obj\n{body}\n'.encode('latin-1')
+        if stream is not None:
+            data += b'stream\n' + stream + b'\nendstream\n'
+        self._write(data + b'endobj\n')
+
+    @property
+    def page_count(self):
+        return len(self.page_numbers)
+
+    @contextmanager
+    def page(self, width=LETTER_LANDSCAPE[0], height=LETTER_LANDSCAPE[1]):
+        """New PdfPage, written to the output when the with block ends"""
+        page = PdfPage(width, height)
+        yield page
+        self.add_page(page)
+
+    def add_page(self, page):
+        content = zlib.compress(page.content())
+        content_number = self._reserve()
+        self._object(content_number, f'<< /Length {len(content)} /Filter /FlateDecode >>', content)
+        page_number = self._reserve()
+        self._object(page_number, f'<< /Type /Page /Parent {self.pages_number} 0 R '
+                                  f'/MediaBox [0 0 {num(page.width)} {num(page.height)}] '
+                                  f'/Resources {self.resources} /Contents {content_number} 0 R >>')
+        self.page_numbers.append(page_number)
+
+    def close(self):
+        """Write the page tree, document info, cross-reference table and trailer"""
+        kids = ' '.join(f'{number} 0 R' for number in self.page_numbers)
+        self._object(self.pages_number, f'<< /Type /Pages /Kids [{kids}] /Count {self.page_count} >>')
+        self._object(self.catalog_number, f'<< /Type /Catalog /Pages {self.pages_number} 0 R >>')
+        info_number = self._reserve()
+        info = '/Producer (shop-drawings pdf_writer)'
+        if self.title:
+            info += f' /Title {_literal(self.title)}'
+        self._object(info_number, f'<< {info} >>')
+        xref = self.position
+        lines = [f'xref\n0 {self.object_count + 1}\n', '0000000000 65535 f \n']
+        lines += [f'{self.offsets[number]:010d} 00000 n \n' for number in range(1, self.object_count + 1)]
+        lines.append(f'trailer\n<< /Size {self.object_count + 1} /Root {self.catalog_number} 0 R '
+                     f'/Info {info_number} 0 R >>\nstartxref\n{xref}\n%%EOF\n')
+        self._write(''.join(lines).encode('latin-1'))
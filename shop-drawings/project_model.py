@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Normalized project model shared by the drawing and package page builders.
+
+normalize_project() walks the raw project dict (the Prisma payload sent by the Next.js routes)
+once: every panel's subOptionSelections JSON is parsed and resolved against its product (see
+option_resolver), and every opening's width and height totals are computed, into compact
+records with __slots__. The shop drawing, BOM and quote pages read these records instead of
+walking the dict again, so JSON parsing and option resolution happen once per panel per build.
+Records keep the dict they were built from as `data` for code that needs the raw payload
+(drawing subprocesses).
+
+Fields hold the payload values as sent; fields missing from the payload are None, except
+where noted. Consumers that default a field read it with Panel.get(key, default), which has
+dict.get semantics: the default replaces a missing key, never a null, 0 or '' that was sent.
+"""
+
+import json
+import logging
+import option_resolver
+import service_log
+
+log = service_log.get_logger('project_model')
+
+
+class Option:
+    """A resolved subOptionSelections entry: category and option names, and the option price"""
+    __slots__ = ('category', 'name', 'price')
+
+    def __init__(self, category, name, price=0):
+        self.category = category
+        self.name = name
+        self.price = price
+
+    @property
+    def label(self):
+        return f'{self.category}: {self.name}'
+
+
+class Panel:
+    """
+    One panel. product_id and product_type are None for panels without a componentInstance,
+    options are its resolved selections in selection order and bom_items its product's raw productBOMs.
+    """
+    __slots__ = ('id', 'type', 'product_id', 'product_type', 'width', 'height', 'glass_type', 'swing_direction',
+                 'sliding_direction', 'corner_direction', 'is_corner', 'options', 'bom_items', 'data')
+
+    def __init__(self, data, product_id, product_type, options, bom_items):
+        self.id = data.get('id')
+        self.type = data.get('type')
+        self.product_id = product_id
+        self.product_type = product_type
+        self.width = data.get('width')
+        self.height = data.get('height')
+        self.glass_type = data.get('glassType')
+        self.swing_direction = data.get('swingDirection')
+        self.sliding_direction = data.get('slidingDirection')
+        self.corner_direction = data.get('cornerDirection')
+        self.is_corner = data.get('isCorner')
+        self.options = options
+        self.bom_items = bom_items
+        self.data = data
+
+    def get(self, key, default=None):
+        """Raw payload field, like dict.get: default only when the key is missing"""
+        return self.data.get(key, default)
+
+
+class Opening:
+    """
+    One opening: its panels, total width and tallest panel. Missing and null sizes both count
+    as 0 (a null used to make the quote page's totals raise TypeError).
+    """
+    __slots__ = ('id', 'name', 'finish_color', 'price', 'panels', 'total_width', 'max_height', 'data')
+
+    def __init__(self, data, panels):
+        self.id = data.get('id')
+        self.name = data.get('name')
+        self.finish_color = data.get('finishColor', 'Standard')
+        self.price = data.get('price', 0)
+        self.panels = panels
+        self.total_width = sum(panel.width or 0 for panel in panels)
+        self.max_height = max((panel.height or 0 for panel in panels), default=0)
+        self.data = data
+
+
+class Project:
+    """A project and its openings"""
+    __slots__ = ('id', 'name', 'status', 'created_at', 'updated_at', 'openings', 'data')
+
+    def __init__(self, data, openings):
+        self.id = data.get('id')
+        self.name = data.get('name')
+        self.status = data.get('status')
+        self.created_at = data.get('createdAt')
+        self.updated_at = data.get('updatedAt')
+        self.openings = openings
+        self.data = data
+
+
+def parse_selections(raw_selections):
+    """subOptionSelections JSON string -> {category_id: option_id}"""
+    return json.loads(raw_selections)
+
+def normalize_panel(data, resolver, failures=None):
+    """Panel record for a raw panel dict; selections that cannot be parsed are appended to failures"""
+    component_instance = data.get('componentInstance')
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('Panel componentInstance keys: %s', list(component_instance) if component_instance else None)
+    if not component_instance:
+        return Panel(data, None, None, [], [])
+
+    # A null product is treated like a missing one rather than failing the whole build
+    product = component_instance.get('product') or {}
+    options = []
+    if component_instance.get('subOptionSelections'):
+        try:
+            raw_selections = component_instance['subOptionSelections']
+            log.debug('Raw subOptionSelections: %s', raw_selections)
+            selections = parse_selections(raw_selections)
+            log.debug('Parsed subOptionSelections: %s', selections)
+            for category, option in resolver.resolve(product, selections):
+                options.append(Option(category['name'], option['name'], option.get('price', 0)))
+                log.debug('Found option: %s', options[-1].label)
+        except Exception as e:
+            log.debug('Could not parse subOptionSelections, options dropped: %s', e)
+            if failures is not None:
+                failures.append(e)
+            options = []
+    return Panel(data, product.get('id'), product.get('productType', 'FIXED_PANEL'), options, product.get('productBOMs', []))
+
+def _log_dropped_options(failures):
+    """One summary of the panels whose options were dropped, instead of a record per panel"""
+    if failures:
+        log.info('Could not parse subOptionSelections of %d panel(s), options dropped: %s', len(failures), failures[0])
+
+def normalize_opening(data, resolver=None, failures=None):
+    """Opening record for a raw opening dict"""
+    resolver = resolver or option_resolver.resolver()
+    summarize = failures is None
+    failures = [] if summarize else failures
+    opening = Opening(data, [normalize_panel(panel, resolver, failures) for panel in data.get('panels', [])])
+    if summarize:
+        _log_dropped_options(failures)
+    return opening
+
+def normalize_project(data):
+    """Project record for a raw project dict; product option indexes are shared by all its openings"""
+    failures = []
+    with option_resolver.scope() as resolver:
+        project = Project(data, [normalize_opening(opening, resolver, failures) for opening in data.get('openings', [])])
+    _log_dropped_options(failures)
+    return project
+
+def as_opening(opening):
+    """Opening record for either a raw opening dict or an Opening"""
+    return normalize_opening(opening) if isinstance(opening, dict) else opening
+
+def as_project(project):
+    """Project record for either a raw project dict or a Project"""
+    return normalize_project(project) if isinstance(project, dict) else project
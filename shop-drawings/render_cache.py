@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for rendered drawings.
+
+Entries are keyed by a hash of the normalized drawing input (see drawing_generator.drawing_cache_key)
+and stored as one file per entry. Writes go through a temp file + os.replace so readers in other
+processes never see partial files; eviction (least recently used first, by file mtime) runs under
+an exclusive lock file so concurrent workers can share one directory.
+
+Puts do not scan the directory. Most drawing processes live for one request, so the cache size
+cannot be tracked in memory; instead each put starts an eviction scan with probability
+len(data) / (max_bytes / EVICT_SLICES), about one scan per 1/EVICT_SLICES of the cap written,
+whichever processes wrote it. A scan evicts down to one slice below the cap, so the cache stays
+near or below max_bytes between scans. A scan that finds another process evicting skips its turn.
+Creating a RenderCache touches no files; the directory is made on the first put.
+
+Configuration (environment):
+    SHOP_DRAWINGS_CACHE            set to 0 to disable the cache
+    SHOP_DRAWINGS_CACHE_DIR        cache directory (default: <tmp>/shop-drawings-cache)
+    SHOP_DRAWINGS_CACHE_MAX_BYTES  size cap before eviction (default: 256 MB)
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import service_log
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction still works, just without cross-process locking
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction scans per max_bytes written, and the headroom each scan leaves (max_bytes / EVICT_SLICES)
+EVICT_SLICES = 16
+
+log = service_log.get_logger('render_cache')
+
+
+def hash_key(*parts):
+    """Stable sha256 hex digest of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """On-disk LRU cache of rendered image bytes, safe to share between processes"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evict_slice = max(1, max_bytes // EVICT_SLICES)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            # Mark as recently used for eviction
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        """Store bytes under key; now and then (see the module docstring) evict old entries past the size cap"""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if random.random() < len(data) / self.evict_slice:
+                self.evict()
+        except OSError as e:
+            log.warning('Render cache write failed: %s', e)
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        If the cache is over max_bytes, delete least recently used entries until it is one eviction
+        slice below. Returns at once when another process is already evicting.
+        """
+        lock_path = os.path.join(self.directory, '.lock')
+        with open(lock_path, 'w') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes - self.evict_slice
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+
+
+def from_environment():
+    """Build the cache described by the SHOP_DRAWINGS_CACHE* environment variables (None if disabled)"""
+    if os.environ.get('SHOP_DRAWINGS_CACHE', '1') == '0':
+        return None
+    directory = os.environ.get('SHOP_DRAWINGS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'shop-drawings-cache')
+    max_bytes = int(os.environ.get('SHOP_DRAWINGS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    try:
+        return RenderCache(directory, max_bytes)
+    except OSError as e:
+        log.warning('Render cache disabled: %s', e)
+        return None
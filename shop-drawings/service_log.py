@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Structured, leveled logging for the drawing service.
+
+Records are written to stderr as one JSON object per line:
+    {"time": "...", "level": "debug", "logger": "drawing_generator", "traceId": "3f9c...", "message": "..."}
+plus any keys passed as extra={'fields': {...}}. Only warnings and errors are written by default.
+Log with %-style arguments (log.debug('Raw selections: %s', raw)) so messages below the level
+are never formatted.
+
+Every record carries the trace ID of the request being handled, taken from the request's
+"traceId" (so a caller can correlate its own logs) or generated when the request has none,
+see trace().
+
+Configuration (environment):
+    SHOP_DRAWINGS_LOG_LEVEL  DEBUG, INFO, WARNING (default), ERROR or OFF
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT_LOGGER = 'shop_drawings'
+LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'OFF': logging.CRITICAL + 1,
+}
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the active trace ID"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname.lower(),
+            'logger': record.name[len(ROOT_LOGGER) + 1:] or record.name,
+            'traceId': _trace_id.get(),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to the current sys.stderr, so records follow redirected or captured stderr"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+def _configure():
+    root = logging.getLogger(ROOT_LOGGER)
+    if root.handlers:
+        return
+    handler = _StderrHandler()
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(LEVELS.get(os.environ.get('SHOP_DRAWINGS_LOG_LEVEL', 'WARNING').upper(), logging.WARNING))
+    # Keep records out of any handlers the embedding process configured on the root logger
+    root.propagate = False
+
+def get_logger(name):
+    """Logger for a service module, e.g. get_logger('drawing_generator')"""
+    _configure()
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+def set_level(level):
+    """Change the service log level at runtime ('DEBUG', 'INFO', 'WARNING', 'ERROR' or 'OFF')"""
+    _configure()
+    logging.getLogger(ROOT_LOGGER).setLevel(LEVELS[level.upper()])
+
+
+def trace_id():
+    """Trace ID of the request being handled, or None outside of trace()"""
+    return _trace_id.get()
+
+@contextlib.contextmanager
+def trace(request_trace_id=None):
+    """
+    Tag records logged inside the block with request_trace_id. Without one, an active trace is
+    kept (nested requests such as batch jobs share their parent's) or a new ID is generated.
+    """
+    token = _trace_id.set(str(request_trace_id) if request_trace_id else _trace_id.get() or os.urandom(8).hex())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
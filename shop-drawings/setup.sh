@@ -23,6 +23,10 @@ source venv/bin/activate
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Build the font list and label metrics now rather than on the first drawing
+echo "Building font cache..."
+python drawing_generator.py --warm-cache
+
 echo "Setup complete!"
 echo ""
 echo "To activate the virtual environment manually, run:"
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Test script for the api/drawings.py server: process-pool rendering and 503 backpressure
+"""
+
+import base64
+import email
+import email.policy
+import gzip
+import http.client
+import importlib.util
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from fixtures import API_SERVER, make_sample_opening, post_requests, server_metrics, start_api_server
+
+opening = make_sample_opening(0)
+
+
+def request(port, method, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    connection.request(method, "/", body, dict({"Content-Type": "application/json"}, **(headers or {})))
+    response = connection.getresponse()
+    reply = (response.status, dict(response.getheaders()), response.read())
+    connection.close()
+    return reply
+
+
+def test_serves_drawings():
+    print("Testing the server answers like the handler...")
+    process, port = start_api_server(workers=1, queue_size=2)
+    try:
+        status, headers, body = request(port, "POST", json.dumps({"type": "elevation", "data": opening}))
+        result = json.loads(body)
+        assert status == 200 and result["success"] and result["elevation_image"]
+        assert headers["Access-Control-Allow-Origin"] == "*"
+
+        status, _, body = request(port, "POST", json.dumps({"type": "section", "data": opening}))
+        assert status == 200 and json.loads(body) == {"success": False, "error": "Invalid drawing type"}
+        status, _, _ = request(port, "POST", "{bad")
+        assert status == 400
+        status, headers, _ = request(port, "OPTIONS")
+        assert status == 200 and headers["Access-Control-Allow-Methods"] == "POST, OPTIONS"
+
+        jobs = [{"openingId": 1, "type": "plan", "data": opening}, {"openingId": 1, "type": "section"}]
+        status, headers, body = request(port, "POST", json.dumps({"type": "batch", "jobs": jobs}))
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        assert status == 200 and headers["Content-Type"] == "application/x-ndjson"
+        assert [line.get("index") for line in lines] == [0, 1, None]
+        assert lines[0]["plan_image"] and not lines[1]["success"]
+        assert lines[2] == {"type": "batch_complete", "success": False, "completed": 2, "failed": 1}
+    finally:
+        process.terminate()
+        process.wait()
+    print("✓ Elevation, plan batch, bad input and CORS preflight")
+
+
+def test_overload_gets_503():
+    print("\nTesting requests past the worker and queue get 503 + Retry-After...")
+    process, port = start_api_server(workers=1, queue_size=0, retry_after=3)
+    try:
+        wide = dict(opening, panels=opening["panels"] * 8)
+        # Different openings, so none of them can share a render
+        bodies = [json.dumps({"type": "elevation", "data": dict(wide, id=index)}) for index in range(6)]
+        _, replies = post_requests(port, bodies, clients=6)
+        statuses = [status for status, _, _ in replies]
+        assert statuses.count(200) >= 1 and statuses.count(503) >= 1, statuses
+        assert all(headers["Retry-After"] == "3" for status, _, headers in replies if status == 503)
+        # Turned away without waiting for the render in progress
+        assert max(seconds for status, seconds, _ in replies if status == 503) < min(
+            seconds for status, seconds, _ in replies if status == 200)
+
+        # Once the worker is free again requests are served
+        status, _, _ = request(port, "POST", json.dumps({"type": "plan", "data": opening}))
+        assert status == 200
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"✓ {statuses.count(200)} rendered, {statuses.count(503)} refused at once")
+
+
+def test_identical_requests_coalesce():
+    print("\nTesting identical requests in flight share one render...")
+    process, port = start_api_server(workers=1, queue_size=0)
+    try:
+        wide = dict(opening, panels=opening["panels"] * 8)
+        request_body = {"type": "elevation", "data": wide}
+        # Same request with a different key order and spacing
+        reordered = json.dumps(dict(reversed(list(request_body.items()))), indent=1)
+        _, replies = post_requests(port, [json.dumps(request_body)] * 3 + [reordered], clients=4)
+        metrics = server_metrics(port)
+    finally:
+        process.terminate()
+        process.wait()
+    # Waiting for a render in progress takes no place in the queue, so nobody gets 503
+    assert [status for status, _, _ in replies] == [200] * 4
+    assert metrics["renders"] + metrics["coalesced"] == 4 and metrics["coalesced"] >= 1, metrics
+    assert metrics["rejected"] == 0 and metrics["inFlight"] == 0
+    print(f"✓ {metrics['renders']} render(s), {metrics['coalesced']} coalesced")
+
+
+def load_api_module():
+    """api/drawings.py as a module, the way a serverless runtime imports it"""
+    spec = importlib.util.spec_from_file_location("drawings", API_SERVER)
+    drawings = importlib.util.module_from_spec(spec)
+    # Registered so pool workers can find the job function by name
+    sys.modules["drawings"] = drawings
+    spec.loader.exec_module(drawings)
+    return drawings
+
+
+def test_batch_jobs_use_idle_workers():
+    print("\nTesting batch jobs render on every idle worker without taking the queue...")
+    process, port = start_api_server(workers=2, queue_size=2)
+    try:
+        wide = dict(opening, panels=opening["panels"] * 8)
+        jobs = [{"openingId": index, "type": "elevation", "data": dict(wide, id=index)} for index in range(4)]
+        replies = []
+        client = threading.Thread(target=lambda: replies.append(
+            request(port, "POST", json.dumps({"type": "batch", "jobs": jobs}))))
+        client.start()
+        in_flight = 0
+        while client.is_alive() and in_flight < 2:
+            in_flight = max(in_flight, server_metrics(port)["inFlight"])
+        # The queue is still free for single requests
+        status, _, _ = request(port, "POST", json.dumps({"type": "plan", "data": opening}))
+        client.join()
+    finally:
+        process.terminate()
+        process.wait()
+    assert in_flight == 2 and status == 200
+    lines = [json.loads(line) for line in replies[0][2].decode().splitlines()]
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2, 3]
+    assert all(line["openingId"] == line["index"] and line["success"] for line in lines[:-1])
+    assert lines[-1] == {"type": "batch_complete", "success": True, "completed": 4, "failed": 0}
+    print(f"✓ {in_flight} jobs rendered at once, single request served meanwhile")
+
+
+def test_handler_batch_uses_pool():
+    print("\nTesting the serverless handler spreads batch jobs over a process pool...")
+    drawings = load_api_module()
+    jobs = [{"openingId": 1, "type": "elevation", "data": opening}, {"openingId": 1, "type": "section"},
+            {"openingId": 2, "type": "plan", "data": opening}]
+    for workers in (1, 3):
+        results = dict(drawings.run_batch(jobs, workers))
+        assert sorted(results) == [0, 1, 2]
+        assert results[0]["success"] and results[0]["elevation_image"] and results[2]["plan_image"]
+        assert results[1] == {"success": False, "error": "Unsupported batch job type: section",
+                              "openingId": 1, "type": "section"}
+    print("✓ Same results serially and on 3 processes")
+
+
+def worker_pids(server_pid):
+    """Processes the server started (its pool workers)"""
+    with open(f"/proc/{server_pid}/task/{server_pid}/children") as children:
+        return [int(pid) for pid in children.read().split()]
+
+
+def test_killed_worker_is_replaced():
+    print("\nTesting a killed worker fails its render and the pool is replaced off the loop...")
+    process, port = start_api_server(workers=1, queue_size=2)
+    try:
+        wide = dict(opening, panels=opening["panels"] * 8)
+        replies = []
+        client = threading.Thread(target=lambda: replies.append(
+            request(port, "POST", json.dumps({"type": "elevation", "data": wide}))))
+        client.start()
+        while server_metrics(port)["inFlight"] == 0:
+            time.sleep(0.01)
+        for pid in worker_pids(process.pid):
+            os.kill(pid, signal.SIGKILL)
+        client.join()
+        status, _, body = replies[0]
+        assert status == 200 and json.loads(body)["error"] == "Drawing worker exited unexpectedly"
+
+        # The loop answers while the new pool starts, and the next render uses it
+        started = time.perf_counter()
+        server_metrics(port)
+        metrics_seconds = time.perf_counter() - started
+        status, _, body = request(port, "POST", json.dumps({"type": "plan", "data": opening}))
+        assert status == 200 and json.loads(body)["success"]
+    finally:
+        process.terminate()
+        process.wait()
+    assert metrics_seconds < 1, metrics_seconds
+    print(f"✓ Render failed cleanly, /metrics answered in {metrics_seconds * 1000:.0f}ms, next render succeeded")
+
+
+def test_failed_restart_answers():
+    print("\nTesting renders waiting on a pool restart that fails get an error, and the next one retries...")
+    import asyncio
+    import contextlib
+    import io
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    drawings = load_api_module()
+    server = drawings.DrawingServer(workers=1)
+    broken = server.pool = ProcessPoolExecutor(1)
+    try:
+        broken.submit(os._exit, 1).result()
+    except BrokenProcessPool:
+        pass
+    attempts = []
+
+    def replace_pool(pool):
+        attempts.append(pool)
+        time.sleep(0.2)
+        raise OSError("forkserver did not start")
+    server.replace_pool = replace_pool
+
+    async def renders():
+        first = await server.render(drawings.generate_plan, opening)
+        waiting = await asyncio.gather(*[server.render(drawings.generate_plan, opening) for _ in range(3)])
+        retry = await server.render(drawings.generate_plan, opening)
+        with contextlib.suppress(OSError):
+            await server.restarting
+        return first, waiting, retry
+
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        first, waiting, retry = asyncio.run(renders())
+    assert first == retry == {"success": False, "error": "Drawing worker exited unexpectedly"}
+    assert waiting == [{"success": False, "error": "Could not restart the drawing workers: forkserver did not start"}] * 3
+    # The broken pool is kept, so the render after the failure started a second restart
+    assert attempts == [broken, broken] and server.pool is broken
+    records = [json.loads(line) for line in stderr.getvalue().splitlines()]
+    assert [(record["level"], record["logger"]) for record in records] == [("error", "drawings")] * 2
+    print(f"✓ {len(waiting)} waiting renders answered, {len(attempts)} restart attempts logged")
+
+
+def check_conditional_and_gzip(port):
+    """ETag, 304 on If-None-Match and gzip against a server on port; returns the full response size"""
+    body = json.dumps({"type": "elevation", "data": opening})
+    status, headers, plain = request(port, "POST", body)
+    etag = headers["ETag"]
+    assert status == 200 and json.loads(plain)["success"] and headers["Vary"] == "Accept, Accept-Encoding"
+
+    # Same opening in another key order: same ETag, answered without a body
+    reordered = json.dumps({"data": dict(reversed(list(opening.items()))), "type": "elevation"})
+    for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', "*"):
+        status, headers, not_modified = request(port, "POST", reordered, {"If-None-Match": if_none_match})
+        assert status == 304 and headers["ETag"] == etag and not_modified == b"", if_none_match
+
+    # A changed opening or another drawing type is a different drawing
+    changed = json.dumps({"type": "elevation", "data": dict(opening, panels=opening["panels"][:1])})
+    status, headers, _ = request(port, "POST", changed, {"If-None-Match": etag})
+    assert status == 200 and headers["ETag"] != etag
+    status, headers, _ = request(port, "POST", json.dumps({"type": "plan", "data": opening}), {"If-None-Match": etag})
+    assert status == 200 and headers["ETag"] != etag
+
+    status, headers, compressed = request(port, "POST", body, {"Accept-Encoding": "br, gzip;q=0.8"})
+    assert headers["Content-Encoding"] == "gzip" and int(headers["Content-Length"]) == len(compressed)
+    assert gzip.decompress(compressed) == plain and len(compressed) < len(plain)
+    _, headers, _ = request(port, "POST", body, {"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in headers
+
+    jobs = [{"openingId": 1, "type": "plan", "data": opening}] * 2
+    status, headers, batch = request(port, "POST", json.dumps({"type": "batch", "jobs": jobs}), {"Accept-Encoding": "gzip"})
+    lines = gzip.decompress(batch).decode().splitlines()
+    assert headers["Content-Encoding"] == "gzip" and json.loads(lines[-1])["completed"] == 2
+    return len(plain), len(compressed)
+
+
+def check_multipart(port):
+    """Accept: multipart/form-data gets the JSON fields and the raw PNG; returns (JSON, multipart) sizes"""
+    body = json.dumps({"type": "elevation", "data": opening})
+    _, json_headers, plain = request(port, "POST", body)
+    status, headers, multipart = request(port, "POST", body, {"Accept": "multipart/form-data", "Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Type"].startswith("multipart/form-data; boundary=")
+    assert "Content-Encoding" not in headers and headers["Vary"] == "Accept, Accept-Encoding"
+    message = email.message_from_bytes(f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + multipart,
+                                       policy=email.policy.HTTP)
+    parts = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+    assert list(parts) == ["result", "elevation_image"]
+    expected = json.loads(plain)
+    image = parts["elevation_image"].get_content()
+    assert parts["elevation_image"].get_content_type() == "image/png" and image.startswith(b"\x89PNG")
+    assert base64.b64encode(image).decode() == expected.pop("elevation_image")
+    assert json.loads(parts["result"].get_content()) == expected
+
+    # A representation of its own: the JSON ETag does not match it, its own one does
+    etag = headers["ETag"]
+    assert etag != json_headers["ETag"]
+    status, _, _ = request(port, "POST", body, {"Accept": "multipart/form-data", "If-None-Match": json_headers["ETag"]})
+    assert status == 200
+    status, _, _ = request(port, "POST", body, {"Accept": "multipart/form-data", "If-None-Match": etag})
+    assert status == 304
+    # */* is not a request for multipart
+    _, headers, _ = request(port, "POST", body, {"Accept": "*/*"})
+    assert headers["Content-Type"] == "application/json"
+    return len(plain), len(multipart)
+
+
+def test_server_conditional_responses():
+    print("\nTesting the server sends ETags, answers If-None-Match with 304 and gzips...")
+    process, port = start_api_server(workers=1, queue_size=2)
+    try:
+        plain, compressed = check_conditional_and_gzip(port)
+        check_multipart(port)
+        metrics = server_metrics(port)
+    finally:
+        process.terminate()
+        process.wait()
+    # Nine single requests and two batch jobs rendered, the five conditional requests did not
+    assert metrics["notModified"] == 5 and metrics["renders"] == 11, metrics
+    print(f"✓ 304 without rendering, {plain} -> {compressed} bytes gzipped")
+
+
+def test_handler_conditional_responses():
+    print("\nTesting the serverless handler does the same...")
+    drawings = load_api_module()
+    renders = []
+    for drawing_type, renderer in list(drawings.RENDERERS.items()):
+        drawings.RENDERERS[drawing_type] = lambda data, renderer=renderer, **kwargs: renders.append(1) or renderer(data, **kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), drawings.handler)
+    server.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        check_conditional_and_gzip(server.server_address[1])
+        plain, multipart = check_multipart(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+    # The conditional requests never reached a renderer (batch jobs do not go through RENDERERS)
+    assert len(renders) == 9, renders
+    print(f"✓ Same ETags, 304s and gzip from handler.do_POST; multipart {plain} -> {multipart} bytes")
+
+
+if __name__ == "__main__":
+    print("API SERVER TEST")
+    print("=" * 40)
+
+    test_serves_drawings()
+    test_overload_gets_503()
+    test_identical_requests_coalesce()
+    test_batch_jobs_use_idle_workers()
+    test_handler_batch_uses_pool()
+    test_killed_worker_is_replaced()
+    test_failed_restart_answers()
+    test_server_conditional_responses()
+    test_handler_conditional_responses()
+
+    print("\n🎉 All API server tests passed!")
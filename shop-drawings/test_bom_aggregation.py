@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar BOM aggregation and the BOM export
+"""
+
+import json
+import subprocess
+import sys
+import bom_aggregation
+import bom_formula
+import project_model
+from fixtures import HERE, make_bom_heavy_project, make_sample_project
+from test_complete_package import sample_project_data
+
+
+def reference_totals(project):
+    """Per-part quantities of every BOM line, merged one line at a time"""
+    totals = {}
+    for opening in project_model.as_project(project).openings:
+        for panel in opening.panels:
+            for bom_item in panel.bom_items:
+                key = f"{bom_item['partName']} ({bom_item.get('unit', 'ea')})"
+                quantity = 1 if bom_item.get("quantity") is None else bom_item["quantity"]
+                formula = (bom_item.get("formula") or "").lower()
+                if "width" in formula or "height" in formula:
+                    quantity = bom_formula.evaluate(bom_item["formula"], {
+                        "width": panel.width or 0, "height": panel.height or 0, "quantity": quantity}) / 12
+                totals[key] = totals.get(key, 0) + quantity
+    return totals
+
+
+def word_match_totals(project):
+    """Per-part quantities as create_bom_page counted them before formulas were evaluated"""
+    totals = {}
+    for opening in project["openings"]:
+        for panel in opening["panels"]:
+            for bom_item in panel["componentInstance"]["product"].get("productBOMs", []):
+                key = f"{bom_item.get('partName', 'Unknown')} ({bom_item.get('unit', 'ea')})"
+                qty = bom_item.get("quantity", 1)
+                if bom_item.get("formula"):
+                    if "width" in bom_item["formula"].lower():
+                        qty = (panel.get("width", 0) or 0) / 12
+                    elif "height" in bom_item["formula"].lower():
+                        qty = (panel.get("height", 0) or 0) / 12
+                totals[key] = totals.get(key, 0) + qty
+    return totals
+
+
+def panel_quantities(bom_items, width=38, height=96):
+    """Per-part quantities of one panel with these BOM lines"""
+    project = {"openings": [{"panels": [{"width": width, "height": height, "componentInstance": {
+        "product": {"productBOMs": bom_items}}}]}]}
+    totals = bom_aggregation.project_totals(project)
+    return {part["partName"]: quantity for part, quantity in zip(totals.parts, totals.quantities.tolist())}
+
+
+def test_totals_match_line_by_line():
+    print("Testing the NumPy group-by matches merging line by line...")
+    project = make_bom_heavy_project(lines=2000, products=6, parts=15)
+    # A product without an id and lines with null fields
+    project["openings"][0]["panels"][0]["componentInstance"]["product"] = {"productBOMs": [
+        {"partName": "Part 1", "unit": "ea", "quantity": None, "description": None, "cost": None},
+        {"partName": "Loose", "unit": None, "quantity": 2, "formula": "width * quantity"},
+        {"partName": "Trim", "partType": "Extrusion", "unit": "in", "quantity": 0, "formula": "width - 2"},
+    ]}
+    totals = bom_aggregation.project_totals(project)
+    reference = reference_totals(project)
+    keys = [f"{part['partName']} ({part['unit']})" for part in totals.parts]
+    assert keys == list(reference)
+    # Defaults only replace missing fields, as in the line-by-line code
+    part = keys.index("Part 1 (ea)")
+    assert "Loose (None)" in keys and totals.parts[part]["cost"] is None and totals.unit_costs[part] == 0
+    for key, quantity in zip(keys, totals.quantities.tolist()):
+        assert abs(quantity - reference[key]) < 1e-6, key
+    assert abs(totals.total_cost - sum(totals.total_costs.tolist())) < 1e-6
+    print(f"✓ {len(totals.parts)} parts from {len(bom_aggregation.collect_lines(project).codes)} lines")
+
+
+def test_fixture_totals_unchanged():
+    print("\nTesting plain width/height formulas total as they did before formulas were evaluated...")
+    for project in (make_sample_project(3), sample_project_data):
+        totals = bom_aggregation.project_totals(project)
+        expected = word_match_totals(project)
+        assert [f"{part['partName']} ({part['unit']})" for part in totals.parts] == list(expected)
+        assert totals.quantities.tolist() == list(expected.values())
+    print("✓ Sample and complete-package projects")
+
+
+def test_formula_quantities():
+    print("\nTesting formula values are counted as feet of the panel's inches...")
+    quantities = panel_quantities([
+        {"partName": "Sill", "partType": "Extrusion", "unit": "ft", "quantity": 2, "formula": "width - 2"},
+        {"partName": "Jamb", "partType": "Extrusion", "unit": "in", "formula": "HEIGHT"},
+        {"partName": "Hinge", "partType": "Hardware", "unit": "ea", "quantity": 2, "formula": "Math.ceil(height / 24) * quantity"},
+        {"partName": "Spare", "partType": "Extrusion", "unit": "ft", "quantity": 0, "formula": "width"},
+        {"partName": "Clip", "partType": "Hardware", "unit": "ea", "quantity": 3, "formula": "quantity * 2"},
+        {"partName": "Screw", "partType": "Hardware", "unit": "ea", "quantity": 0},
+    ])
+    # Values in inches / 12 whatever the unit or piece count, as the BOM page always counted them
+    assert quantities["Sill"] == 3 and quantities["Jamb"] == 8 and quantities["Spare"] == 38 / 12
+    assert abs(quantities["Hinge"] - 8 / 12) < 1e-9
+    # Formulas without width or height and lines without a formula keep their quantity
+    assert quantities["Clip"] == 3 and quantities["Screw"] == 0
+    print(f"✓ {quantities}")
+
+
+def test_bom_export_request():
+    print("\nTesting the machine-readable BOM export request...")
+    project = make_sample_project(2)
+    request = json.dumps({"type": "bom", "project": project})
+    result = subprocess.run([sys.executable, "package_generator.py"], input=request, capture_output=True,
+                            text=True, cwd=HERE)
+    export = json.loads(result.stdout)
+    assert export["success"] and export["project"] == {"id": 1, "name": "Benchmark Project"}
+    parts = {part["partName"]: part for part in export["parts"]}
+    # The 96" door's height in feet, one door per opening
+    assert parts["Door Stile"]["quantity"] == 16 and parts["Door Stile"]["totalCost"] == 16 * 18
+    assert export["totalCost"] == sum(part["totalCost"] for part in export["parts"])
+    rows = bom_aggregation.project_totals(project).rows()
+    assert [row[0] for row in rows[:-1]] == list(parts) and rows[-1][-1] == f"${export['totalCost']:.2f}"
+    print(f"✓ {len(parts)} parts, total ${export['totalCost']:.2f}, same totals as the BOM page")
+
+
+if __name__ == "__main__":
+    print("BOM AGGREGATION TEST")
+    print("=" * 40)
+
+    test_totals_match_line_by_line()
+    test_fixture_totals_unchanged()
+    test_formula_quantities()
+    test_bom_export_request()
+
+    print("\n🎉 All BOM aggregation tests passed!")
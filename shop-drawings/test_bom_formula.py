@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the BOM formula compiler
+"""
+
+import contextlib
+import io
+import json
+import bom_formula
+from fixtures import BOM_FORMULAS, make_sample_project
+from package_generator import collect_bom_rows
+
+variables = {"width": 42, "height": 108, "quantity": 2}
+
+
+def test_matches_ts_evaluator():
+    print("Testing formulas evaluate like evaluateFormula in the TS BOM code...")
+    cases = {
+        "width": 42,
+        "Width + HEIGHT": 150,
+        "((width + height) * 2) / 4": 75,
+        "width - 100": 0,
+        "Math.sqrt(3 * 3 + 4 * 4)": 5,
+        "Math.round(2.5) + Math.ceil(width / 24) * quantity": 7,
+        "-7 % 3 + 7 % -3": 0,
+        "  width\t+ height  ": 150,
+        "": 0,
+        "invalid syntax +++": 0,
+        "1 / 0": 0,
+        "(-8) ** (1 / 3)": 0,
+        "depth * 2": 0,
+    }
+    for text, expected in cases.items():
+        assert bom_formula.evaluate(text, variables) == expected, text
+    print(f"✓ {len(cases)} formulas")
+
+
+def test_min_max_arguments():
+    print("\nTesting Math.min and Math.max take any number of arguments, like JS...")
+    cases = {
+        "Math.min(width)": 42,
+        "Math.max(width)": 42,
+        "Math.max(width, height, 50)": 108,
+        "Math.min(width, height, 50)": 42,
+        "Math.max()": 0,     # -Infinity
+        "Math.min()": 0,     # Infinity
+        "Math.max() + width": 0,
+    }
+    columns = {name: [value] * 40 for name, value in variables.items()}
+    for text, expected in cases.items():
+        assert bom_formula.evaluate(text, variables) == expected, text
+        assert bom_formula.evaluate_grouped([text] * 40, columns) == [expected] * 40, text
+    print(f"✓ {len(cases)} formulas, row by row and grouped")
+
+
+def test_failing_formula_warned_once():
+    print("\nTesting a formula that fails to evaluate is reported once, not once per row...")
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        for rows in (5, 40, 5):
+            columns = {name: [value] * rows for name, value in variables.items()}
+            assert bom_formula.evaluate_grouped(["depth * 3"] * rows, columns) == [0] * rows
+            assert bom_formula.evaluate_grouped(["Math.abs() + 1"] * rows, columns) == [0] * rows
+    messages = [json.loads(line)["message"] for line in stderr.getvalue().splitlines()]
+    assert len(messages) == 2 and "'depth * 3'" in messages[0] and "'Math.abs() + 1'" in messages[1], messages
+    print(f"✓ {len(messages)} warnings for 100 failing rows of 2 formulas")
+
+
+def test_rejects_unsafe_formulas():
+    print("\nTesting anything but arithmetic is rejected without being run...")
+    for text in ('__import__("os").system("true")', "width.__class__", "[width]", "width if width else 0",
+                 "open('x')", "_pi", "Math.constructor", "width // 2", "width ^ 2", "9 ** 9 ** 9 ** 9"):
+        try:
+            bom_formula.compile_formula(text)
+            assert bom_formula.evaluate(text, variables) == 0, text
+        except bom_formula.FormulaError:
+            pass
+    assert bom_formula.compile_formula("Width * 2") is bom_formula.compile_formula("Width * 2")
+    print("✓ Calls, attributes, names and operators outside the whitelist fail to compile")
+
+
+def test_grouped_matches_row_by_row():
+    print("\nTesting grouped NumPy evaluation gives the same values as row by row...")
+    rows = 200
+    texts = [BOM_FORMULAS[row % len(BOM_FORMULAS)] for row in range(rows)] + ["width / 0", "bad ("]
+    columns = {"width": [row % 60 - 5 for row in range(rows + 2)], "height": [96.5] * (rows + 2),
+               "quantity": [row % 3 + 1 for row in range(rows + 2)]}
+    expected = [bom_formula.evaluate(text, {name: column[row] for name, column in columns.items()})
+                for row, text in enumerate(texts)]
+    assert bom_formula.evaluate_grouped(texts, columns) == expected
+    print(f"✓ {len(texts)} rows, {rows // len(BOM_FORMULAS)} per formula")
+
+
+def test_bom_page_uses_formulas():
+    print("\nTesting BOM quantities come from the formulas...")
+    project = make_sample_project(2)
+    boms = project["openings"][0]["panels"][1]["componentInstance"]["product"]["productBOMs"]
+    boms[0]["formula"] = "height - 6"
+    rows = {row[0]: row for row in collect_bom_rows(project)}
+    # Door Stile (ft): 90" on the first opening, 96" on the second
+    assert rows["Door Stile"][3] == "15.50"
+    # Frame Extrusion (ft): the 36" fixed panel's width in both openings
+    assert rows["Frame Extrusion"][3] == "6.00"
+    print("✓ Quantities follow the productBOMs formulas")
+
+
+if __name__ == "__main__":
+    print("BOM FORMULA TEST")
+    print("=" * 40)
+
+    test_matches_ts_evaluator()
+    test_min_max_arguments()
+    test_failing_formula_warned_once()
+    test_rejects_unsafe_formulas()
+    test_grouped_matches_row_by_row()
+    test_bom_page_uses_formulas()
+
+    print("\n🎉 All BOM formula tests passed!")
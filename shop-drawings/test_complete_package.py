@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Test script for the complete package generator
+"""
+
+import base64
+import contextlib
+import copy
+import io
+import json
+import re
+import zlib
+import frames
+from drawing_generator import convert_quoting_tool_data, draw_plan_view
+from package_generator import create_shop_drawing_page, generate_complete_package, stream_complete_package
+
+# Sample project data for testing (same shape as the complete-package API payload)
+sample_project_data = {
+    "id": 1,
+    "name": "Test Project",
+    "status": "QUOTE_SENT",
+    "createdAt": "2026-01-05T12:00:00.000Z",
+    "updatedAt": "2026-01-05T12:00:00.000Z",
+    "openings": [
+        {
+            "id": 1,
+            "name": "101",
+            "finishColor": "Black",
+            "price": 4200,
+            "panels": [
+                {
+                    "id": 1,
+                    "width": 36,
+                    "height": 96,
+                    "glassType": "Clear",
+                    "swingDirection": "Right In",
+                    "slidingDirection": "Left",
+                    "componentInstance": {
+                        "subOptionSelections": "{}",
+                        "product": {
+                            "id": 1,
+                            "productType": "FIXED_PANEL",
+                            "name": "Fixed Panel 36x96",
+                            "productSubOptions": [],
+                            "productBOMs": [
+                                {"partName": "Frame Extrusion", "partType": "Extrusion", "description": "Perimeter frame",
+                                 "unit": "ft", "quantity": 1, "cost": 12.5, "formula": "width"}
+                            ]
+                        }
+                    }
+                },
+                {
+                    "id": 2,
+                    "width": 42,
+                    "height": 96,
+                    "glassType": "Clear",
+                    "swingDirection": "Left In",
+                    "slidingDirection": "Left",
+                    "componentInstance": {
+                        "subOptionSelections": json.dumps({"1": 10}),
+                        "product": {
+                            "id": 2,
+                            "productType": "SWING_DOOR",
+                            "name": "Swing Door 42x96",
+                            "productSubOptions": [
+                                {
+                                    "category": {
+                                        "id": 1,
+                                        "name": "Hardware",
+                                        "individualOptions": [
+                                            {"id": 10, "name": "Lever Handle", "price": 120}
+                                        ]
+                                    }
+                                }
+                            ],
+                            "productBOMs": [
+                                {"partName": "Hinge", "partType": "Hardware", "description": "Butt hinge",
+                                 "unit": "ea", "quantity": 3, "cost": 14}
+                            ]
+                        }
+                    }
+                }
+            ]
+        }
+    ]
+}
+
+
+def test_complete_package_in_process():
+    print("Testing complete package with in-process drawings...")
+    result = generate_complete_package(sample_project_data)
+
+    if result["success"]:
+        pdf_data = base64.b64decode(result["pdf_data"])
+        print("✓ Complete package generated successfully!")
+        print(f"  PDF size: {len(pdf_data)} bytes")
+        assert pdf_data.startswith(b"%PDF")
+    else:
+        print(f"✗ Complete package failed: {result['error']}")
+
+    assert result["success"], result.get("error")
+
+
+def test_complete_package_vector_pages():
+    print("\nTesting complete package vector vs raster drawings...")
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        vector_result = generate_complete_package(sample_project_data)
+    raster_result = generate_complete_package(sample_project_data, vector=False)
+    # Drawings that fail are logged and left out of the page
+    assert "Error drawing" not in stderr.getvalue(), stderr.getvalue()
+
+    assert vector_result["success"], vector_result.get("error")
+    assert raster_result["success"], raster_result.get("error")
+    vector_pdf = base64.b64decode(vector_result["pdf_data"])
+    raster_pdf = base64.b64decode(raster_result["pdf_data"])
+    print(f"  Vector PDF: {len(vector_pdf)} bytes, raster PDF: {len(raster_pdf)} bytes")
+
+    # Vector pages draw the linework directly, so no images are embedded
+    assert b"/Subtype /Image" not in vector_pdf
+    assert b"/Subtype /Image" in raster_pdf
+
+
+class PageCollector:
+    """Stands in for PdfPages and keeps the page figures instead of writing them"""
+
+    def __init__(self):
+        self.figures = []
+
+    def savefig(self, fig, **kwargs):
+        self.figures.append(fig)
+
+
+def test_vector_page_axes_hold_drawings():
+    print("\nTesting vector page axes hold the plan and elevation artists...")
+    opening = sample_project_data["openings"][0]
+    pages = PageCollector()
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        create_shop_drawing_page(opening, pages)
+    assert "Error drawing" not in stderr.getvalue(), stderr.getvalue()
+
+    _, ax_plan, ax_elevation = pages.figures[0].axes
+    for ax in (ax_plan, ax_elevation):
+        texts = [text.get_text() for text in ax.texts]
+        assert ax.collections and not any("not available" in text for text in texts), (ax.get_title(), texts)
+
+    # The plan's linework is scaled down with the geometry, every width by the same factor
+    standalone = draw_plan_view(convert_quoting_tool_data(opening)).axes[0]
+    ratios = {round(page_width / width, 6)
+              for page, native in zip(ax_plan.collections, standalone.collections)
+              for page_width, width in zip(page.get_linewidth(), native.get_linewidth())}
+    assert len(ratios) == 1 and 0 < ratios.pop() < 1
+    print(f"✓ Plan: {len(ax_plan.collections)} collections, elevation: {len(ax_elevation.collections)} collections")
+
+
+def test_complete_package_isolated():
+    print("\nTesting complete package with subprocess drawings...")
+    result = generate_complete_package(sample_project_data, isolate_drawings=True)
+
+    if result["success"]:
+        print("✓ Complete package (isolated drawings) generated successfully!")
+    else:
+        print(f"✗ Complete package (isolated drawings) failed: {result['error']}")
+
+    assert result["success"], result.get("error")
+
+
+def test_complete_package_parallel():
+    print("\nTesting complete package with parallel opening pages...")
+    project_data = dict(sample_project_data, openings=sample_project_data["openings"] * 3)
+    result = generate_complete_package(project_data, parallel=True, workers=2)
+
+    assert result["success"], result.get("error")
+    pdf_data = base64.b64decode(result["pdf_data"])
+    page_count = pdf_data.count(b"/Type /Page ")
+    print(f"✓ Parallel package generated with {page_count} pages")
+
+    # 3 opening pages + BOM + quote
+    assert page_count == 5
+
+
+def test_complete_package_stream():
+    print("\nTesting streamed complete package...")
+    for parallel in (False, True):
+        output_stream = io.StringIO()
+        stream_complete_package(sample_project_data, output_stream, parallel=parallel, workers=2)
+        events = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+
+        assert events[0] == {"event": "start", "pages": 3}
+        assert events[-1]["event"] == "end" and events[-1]["success"], events[-1]
+        pages = [e for e in events if e["event"] == "page"]
+        assert [e["label"] for e in pages] == ["Opening 101", "Bill of Materials", "Quote"]
+
+        chunks = [e for e in events if e["event"] == "data"]
+        offset = 0
+        for chunk in chunks:
+            assert chunk["offset"] == offset
+            offset += len(base64.b64decode(chunk["data"]))
+        pdf_data = b"".join(base64.b64decode(chunk["data"]) for chunk in chunks)
+        assert len(pdf_data) == events[-1]["bytes"]
+        assert pdf_data.startswith(b"%PDF") and pdf_data.rstrip().endswith(b"%%EOF")
+        assert pdf_data.count(b"/Type /Page ") == 3
+        print(f"✓ {'Parallel' if parallel else 'Serial'} stream: {len(chunks)} chunks, {len(pdf_data)} bytes")
+
+
+def test_complete_package_native():
+    print("\nTesting complete package with the native PDF backend...")
+    result = generate_complete_package(sample_project_data, pdf_backend="native")
+
+    assert result["success"], result.get("error")
+    pdf_data = base64.b64decode(result["pdf_data"])
+    assert pdf_data.startswith(b"%PDF") and pdf_data.rstrip().endswith(b"%%EOF")
+    assert pdf_data.count(b"/Type /Page ") == 3
+    # Standard fonts are referenced, never embedded, and the drawings are vectors
+    assert b"/BaseFont /Helvetica-Bold" in pdf_data and b"/FontFile" not in pdf_data
+    assert b"/Subtype /Image" not in pdf_data
+    # The xref table points at every object
+    xref = int(pdf_data[pdf_data.rindex(b"startxref") + 9:].split()[0])
+    offsets = [int(line.split()[0]) for line in pdf_data[xref:].split(b"\n")[3:] if line.endswith(b" n ")]
+    assert offsets and all(re.match(rb"\d+ 0 obj", pdf_data[offset:offset + 12]) for offset in offsets)
+    text = b"".join(zlib.decompress(stream) for stream in re.findall(rb"stream\n(.*?)\nendstream", pdf_data, re.S))
+    assert b"(Shop Drawing - Opening 101)" in text and b"(Hinge)" in text and b"(TOTAL:)" in text
+    print(f"✓ Native package: {len(pdf_data)} bytes")
+
+    result = generate_complete_package(sample_project_data, pdf_backend="svg")
+    assert not result["success"] and "Unsupported PDF backend" in result["error"]
+
+
+def test_complete_package_native_stream():
+    print("\nTesting streamed native package with a BOM longer than a page...")
+    project_data = copy.deepcopy(sample_project_data)
+    product = project_data["openings"][0]["panels"][0]["componentInstance"]["product"]
+    product["productBOMs"] = [dict(product["productBOMs"][0], partName=f"Part {i}") for i in range(80)]
+    output_stream = io.StringIO()
+    stream_complete_package(project_data, output_stream, pdf_backend="native")
+    events = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+
+    labels = [e["label"] for e in events if e["event"] == "page"]
+    assert labels == ["Opening 101", "Bill of Materials", "Bill of Materials (continued)",
+                      "Bill of Materials (continued)", "Quote"], labels
+    assert events[0] == {"event": "start", "pages": len(labels)}
+    assert events[-1]["event"] == "end" and events[-1]["success"], events[-1]
+    pdf_data = b"".join(base64.b64decode(e["data"]) for e in events if e["event"] == "data")
+    assert len(pdf_data) == events[-1]["bytes"]
+    assert pdf_data.count(b"/Type /Page ") == len(labels)
+    print(f"✓ Native stream: {len(labels)} pages, {len(pdf_data)} bytes")
+
+
+def test_complete_package_binary():
+    print("\nTesting binary transport: raw PDF bytes instead of base64...")
+    expected = base64.b64decode(generate_complete_package(sample_project_data, pdf_backend="native")["pdf_data"])
+    result = generate_complete_package(sample_project_data, pdf_backend="native", binary=True)
+    assert result["success"] and result["pdf_data"] == expected
+
+    output_stream = io.BytesIO()
+    stream_complete_package(sample_project_data, output_stream, pdf_backend="native", extra={"id": 3}, binary=True)
+    output_stream.seek(0)
+    events = []
+    while (event := frames.read(output_stream)) is not None:
+        events.append(event)
+    assert events[0] == {"event": "start", "pages": 3, "id": 3}
+    assert events[-1] == {"event": "end", "success": True, "bytes": len(expected), "id": 3}
+    chunks = [e for e in events if e["event"] == "data"]
+    assert all(isinstance(e["data"], bytes) for e in chunks)
+    assert b"".join(e["data"] for e in chunks) == expected
+    print(f"✓ {len(events)} frames, {len(expected)} PDF bytes with no base64")
+
+
+if __name__ == "__main__":
+    print("COMPLETE PACKAGE TEST")
+    print("=" * 40)
+
+    test_complete_package_in_process()
+    test_complete_package_vector_pages()
+    test_vector_page_axes_hold_drawings()
+    test_complete_package_isolated()
+    test_complete_package_parallel()
+    test_complete_package_stream()
+    test_complete_package_native()
+    test_complete_package_native_stream()
+    test_complete_package_binary()
+
+    print("\n🎉 All complete package tests passed!")
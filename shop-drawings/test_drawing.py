@@ -3,8 +3,21 @@
 Test script for the drawing generator
 """
 
+import base64
+import gc
+import io
 import json
-from drawing_generator import generate_elevation_drawing, generate_plan_drawing
+import weakref
+import matplotlib.pyplot as plt
+from xml.etree import ElementTree
+import frames
+from drawing_generator import (
+    generate_elevation_drawing, generate_plan_drawing, serve, convert_quoting_tool_data, handle_request,
+    draw_architectural_elevation, draw_miniature_elevation, draw_plan_view, scale_artists
+)
+from drawing_ir import Drawing
+from drawing_layout import hatch_wall_extension, layout_plan_view
+from matplotlib.collections import LineCollection, PolyCollection
 
 # Sample opening data for testing
 sample_opening_data = {
@@ -116,6 +129,195 @@ def test_fixed_panel_only():
     
     return elevation_success and plan_should_fail
 
+def test_draw_into_shared_figure():
+    print("\nTesting elevation, miniature and plan drawn into one figure...")
+    panels = convert_quoting_tool_data(sample_opening_data)
+    fig, (ax_elevation, ax_miniature, ax_plan) = plt.subplots(1, 3, figsize=(18, 5))
+    figures_before = plt.get_fignums()
+
+    elevation_artists, total_width = draw_architectural_elevation(panels, 96, ax=ax_elevation)
+    miniature_artists, _ = draw_miniature_elevation(panels, 96, ax=ax_miniature)
+    plan_artists = draw_plan_view(panels, ax=ax_plan)
+    figures_after = plt.get_fignums()
+    plt.close(fig)
+
+    print(f"  Artists: elevation={len(elevation_artists)}, miniature={len(miniature_artists)}, plan={len(plan_artists)}")
+    assert figures_after == figures_before
+    assert total_width == 102
+    assert elevation_artists and miniature_artists and plan_artists
+    assert all(artist.axes is ax_elevation for artist in elevation_artists)
+    return True
+
+def test_plan_hatching_collections():
+    print("\nTesting plan linework (wall hatching, jambs) is batched into LineCollections...")
+    panels = convert_quoting_tool_data(sample_opening_data)
+    line_count = sum(1 for primitive in layout_plan_view(panels) if primitive.kind == 'line')
+    fig = draw_plan_view(panels)
+    ax = fig.axes[0]
+    collections = [c for c in ax.collections if isinstance(c, LineCollection)]
+    batched = sum(len(c.get_segments()) for c in collections)
+    plt.close(fig)
+    print(f"  {line_count} lines drawn as {len(collections)} collections + {len(ax.lines)} single lines")
+    assert batched + len(ax.lines) == line_count
+    assert len(collections) + len(ax.lines) < line_count / 2
+
+    lines = hatch_wall_extension(Drawing(), -20, 0, -4, 8)
+    # Every hatch line stays inside the extension and rises as far as it runs
+    for line in lines:
+        assert -20 <= line.x0 < line.x1 <= 0
+        assert line.y0 == -4 and abs((line.y1 - line.y0) - (line.x1 - line.x0)) < 1e-9
+    assert len(lines) == 11
+    return True
+
+def test_scale_artists_collections():
+    print("\nTesting scale_artists scales collection line widths member by member...")
+    panels = convert_quoting_tool_data(sample_opening_data)
+    fig = draw_plan_view(panels)
+    ax = fig.axes[0]
+    before = [list(collection.get_linewidth()) for collection in ax.collections]
+    line_widths = [line.get_linewidth() for line in ax.lines]
+    scale_artists(ax, 0.5)
+    after = [list(collection.get_linewidth()) for collection in ax.collections]
+    plt.close(fig)
+    # get_linewidth() returns a list for collections, which must not be multiplied as a sequence
+    assert any(len(widths) > 1 for widths in before)
+    assert after == [[width * 0.5 for width in widths] for widths in before]
+    assert [line.get_linewidth() for line in ax.lines] == [width * 0.5 for width in line_widths]
+    return True
+
+def test_svg_format():
+    print("\nTesting format: svg returns SVG markup written without matplotlib...")
+    elevation = handle_request({"type": "elevation", "format": "svg", "data": sample_opening_data})
+    plan = handle_request({"type": "plan", "format": "svg", "data": sample_opening_data})
+    for result, key in ((elevation, "elevation_svg"), (plan, "plan_svg")):
+        assert result["success"], result.get("error")
+        assert result["format"] == "svg" and key.replace("svg", "image") not in result
+        ElementTree.fromstring(result[key])
+        print(f"  {key}: {len(result[key])} bytes")
+        assert len(result[key]) < 16 * 1024
+    assert elevation["door_schedule"]["rows"] and elevation["total_width"] == 102
+
+    unsupported = handle_request({"type": "plan", "format": "gif", "data": sample_opening_data})
+    assert not unsupported["success"] and "gif" in unsupported["error"]
+    return True
+
+def test_elevation_collections():
+    print("\nTesting elevation linework is batched into collections without changing paint order...")
+    panels = convert_quoting_tool_data(sample_opening_data)
+    for repeat in (1, 4):
+        fig, _ = draw_architectural_elevation(panels * repeat, 96)
+        ax = fig.axes[0]
+        polygons = [c for c in ax.collections if isinstance(c, PolyCollection)]
+        # Each panel's stiles and rails become one collection; its glass stop, drawn in between, stays a patch
+        assert len(polygons) == len(ax.patches) == len(panels) * repeat
+        assert all(len(c.get_paths()) == 4 for c in polygons)
+        print(f"  {len(panels) * repeat} panels: {len(polygons)} collections, {len(ax.patches)} patches")
+        plt.close(fig)
+    return True
+
+def test_render_on_threads():
+    print("\nTesting drawings render on a thread pool without pyplot figures...")
+    from concurrent.futures import ThreadPoolExecutor
+    from matplotlib._pylab_helpers import Gcf
+    import drawing_generator
+
+    cache, drawing_generator.RENDER_CACHE = drawing_generator.RENDER_CACHE, None
+    try:
+        jobs = [(generate_elevation_drawing, "elevation_image"), (generate_plan_drawing, "plan_image")] * 4
+        serial = [generate(sample_opening_data)[key] for generate, key in jobs]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(pool.map(lambda job: job[0](sample_opening_data)[job[1]], jobs))
+    finally:
+        drawing_generator.RENDER_CACHE = cache
+    assert threaded == serial
+    assert not Gcf.get_all_fig_managers()
+
+    # Nothing holds on to a figure once the caller drops it
+    fig = draw_plan_view(convert_quoting_tool_data(sample_opening_data))
+    figure = weakref.ref(fig)
+    del fig
+    gc.collect()
+    assert figure() is None
+    print(f"✓ {len(jobs)} drawings on 4 threads match the serial PNGs, no figures left behind")
+    return True
+
+def test_serve_pipelined():
+    print("\nTesting --serve worker with pipelined requests...")
+    requests = [
+        {"id": "a", "type": "elevation", "data": sample_opening_data},
+        {"id": "b", "type": "plan", "data": sample_opening_data},
+        {"id": "c", "type": "bogus"},
+        {"type": "shutdown"},
+        {"id": "never", "type": "ping"},
+    ]
+    input_stream = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+    output_stream = io.StringIO()
+    serve(input_stream, output_stream)
+
+    replies = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+    print(f"  Replies: {[(r['id'], r['success']) for r in replies]}")
+
+    assert [r["id"] for r in replies] == ["a", "b", "c"]
+    assert replies[0]["success"] and replies[0]["elevation_image"]
+    assert replies[1]["success"] and replies[1]["plan_image"]
+    assert not replies[2]["success"]
+    return True
+
+def test_batch_stream():
+    print("\nTesting batch request streamed through the --serve worker...")
+    jobs = [
+        {"openingId": 101, "type": "elevation", "data": sample_opening_data},
+        {"openingId": 101, "type": "plan", "data": sample_opening_data},
+        {"openingId": 102, "type": "elevation", "miniature": True, "data": sample_opening_data},
+        {"openingId": 103, "type": "complete_package", "data": sample_opening_data},
+    ]
+    request = {"id": 7, "type": "batch", "jobs": jobs, "workers": 2}
+    input_stream = io.StringIO(json.dumps(request) + "\n")
+    output_stream = io.StringIO()
+    serve(input_stream, output_stream)
+
+    replies = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+    results, summary = replies[:-1], replies[-1]
+    print(f"  Results: {[(r['openingId'], r['type'], r['success']) for r in results]}")
+
+    assert all(r["id"] == 7 for r in replies)
+    assert sorted(r["index"] for r in results) == [0, 1, 2, 3]
+    by_index = {r["index"]: r for r in results}
+    assert by_index[0]["success"] and by_index[0]["elevation_image"]
+    assert by_index[1]["success"] and by_index[1]["plan_image"]
+    assert by_index[2]["success"] and by_index[2]["openingId"] == 102
+    assert not by_index[3]["success"]
+    assert summary["type"] == "batch_complete"
+    assert summary["completed"] == 4 and summary["failed"] == 1
+    return True
+
+def test_serve_binary_frames():
+    print("\nTesting --serve worker with binary transport...")
+    requests = [
+        {"id": "a", "type": "elevation", "transport": "binary", "data": sample_opening_data},
+        {"id": "b", "type": "batch", "transport": "binary", "jobs": [{"type": "plan", "data": sample_opening_data}]},
+        {"id": "c", "type": "plan", "transport": "carrier-pigeon", "data": sample_opening_data},
+    ]
+    input_stream = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+    output_buffer = io.BytesIO()
+    output_stream = io.TextIOWrapper(output_buffer, write_through=True)
+    serve(input_stream, output_stream)
+
+    output_buffer.seek(0)
+    elevation, plan, summary = (frames.read(output_buffer) for _ in range(3))
+    # The last request did not ask for frames, so its reply is a JSON line
+    unsupported = json.loads(output_buffer.read())
+    expected = generate_elevation_drawing(sample_opening_data)
+    assert elevation["id"] == "a" and isinstance(elevation["elevation_image"], bytes)
+    assert base64.b64encode(elevation["elevation_image"]).decode() == expected["elevation_image"]
+    assert elevation["door_schedule"] == expected["door_schedule"]
+    assert plan["id"] == "b" and plan["index"] == 0 and plan["plan_image"].startswith(b"\x89PNG")
+    assert summary["type"] == "batch_complete" and summary["completed"] == 1
+    assert unsupported["id"] == "c" and "carrier-pigeon" in unsupported["error"]
+    print(f"✓ {len(elevation['elevation_image'])} PNG bytes in a frame, "
+          f"{len(expected['elevation_image'])} as base64")
+    return True
+
 if __name__ == "__main__":
     print("SHOPGEN Drawing Service Test")
     print("=" * 40)
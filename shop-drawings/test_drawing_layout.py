@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for the drawing IR, the layout pass and the matplotlib backend
+"""
+
+import io
+import os
+import re
+import subprocess
+import sys
+import zlib
+import matplotlib.pyplot as plt
+from xml.etree import ElementTree
+import backend_matplotlib
+import backend_pdf
+import backend_svg
+from drawing_ir import Drawing, Line, Rect
+from drawing_layout import layout_architectural_elevation, layout_plan_view
+from pdf_writer import PdfWriter, fit_text, text_width
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+sample_panels = [
+    {"type": "Fixed", "width": 36},
+    {"type": "Swing Door", "width": 42, "swing_direction": "Left In"},
+    {"type": "Sliding Door", "width": 40, "sliding_direction": "Right"},
+]
+
+
+def test_layout_without_matplotlib():
+    print("Testing the layout pass, SVG and PDF backends run without importing matplotlib or numpy...")
+    code = (
+        "import io, sys, drawing_layout, backend_svg, backend_pdf, pdf_writer\n"
+        f"backend_svg.render(drawing_layout.layout_plan_view({sample_panels!r}))\n"
+        f"backend_svg.render(drawing_layout.layout_architectural_elevation({sample_panels!r}, 96))\n"
+        "with pdf_writer.PdfWriter(io.BytesIO()) as writer:\n"
+        "    with writer.page() as page:\n"
+        f"        backend_pdf.render(drawing_layout.layout_plan_view({sample_panels!r}), page, 0, 0, 792, 612)\n"
+        "assert 'matplotlib' not in sys.modules and 'numpy' not in sys.modules, sorted(sys.modules)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True)
+    print("✓ No plotting modules imported")
+
+
+def test_layout_primitives():
+    print("\nTesting layout primitives...")
+    drawing = layout_architectural_elevation(sample_panels, 96)
+    kinds = [primitive.kind for primitive in drawing]
+    assert drawing.xlim == (0, 118) and drawing.ylim == (0, 96)
+    assert drawing.bounds == (-14, -20, 120, 118)
+    # Panel numbers, the glass label and the width/height dimension labels
+    assert kinds.count("text") == len(sample_panels) + 3
+    assert not hasattr(drawing.primitives[0], "__dict__")
+
+    plan = layout_plan_view(sample_panels)
+    assert plan.aspect_equal and plan.figsize == (10, 4)
+    assert any(primitive.kind == "arc" for primitive in plan)
+    assert layout_plan_view([{"type": "Fixed", "width": 36}]) is None
+    print(f"✓ Elevation: {len(drawing)} primitives, plan: {len(plan)} primitives")
+
+
+def test_backend_batches_keep_paint_order():
+    print("\nTesting the backend only batches strokes that paint next to each other...")
+    drawing = Drawing()
+    drawing.line(0, 0, 1, 0)
+    drawing.line(0, 1, 1, 1)
+    drawing.rect(0, 0, 1, 1, zorder=2)     # same z-order as the lines: closes their batch
+    drawing.line(0, 2, 1, 2)
+    drawing.line(0, 3, 1, 3, zorder=5)     # other z-order: does not close anything
+    drawing.line(0, 4, 1, 4)
+    drawing.add(Rect(0, 0, 2, 2))
+    drawing.add(Line(0, 5, 1, 5, linestyle=":"))
+    fig, ax = plt.subplots()
+    artists = backend_matplotlib.render(drawing, ax)
+    unbatched = backend_matplotlib.render(drawing, ax, batch=False)
+    plt.close(fig)
+    groups = [len(artist.get_segments()) if hasattr(artist, "get_segments") else 1 for artist in artists]
+    assert groups == [2, 1, 2, 1, 1, 1], groups
+    assert len(unbatched) == len(drawing)
+    print(f"✓ {len(drawing)} primitives drawn as {len(artists)} artists")
+
+
+def raster(drawing, batch):
+    fig, ax = plt.subplots(figsize=drawing.figsize, dpi=150)
+    ax.set_xlim(*drawing.xlim)
+    ax.set_ylim(*drawing.ylim)
+    ax.axis("off")
+    artists = backend_matplotlib.render(drawing, ax, batch=batch)
+    fig.canvas.draw()
+    pixels = bytes(fig.canvas.buffer_rgba())
+    plt.close(fig)
+    return pixels, len(artists)
+
+
+def test_batched_elevation_matches_unbatched():
+    print("\nTesting batched elevations paint exactly like one artist per primitive...")
+    openings = {
+        "sliding": [{"type": "Sliding Door", "width": 40, "sliding_direction": "Left"}, {"type": "Fixed", "width": 36},
+                    {"type": "Sliding Door", "width": 40, "sliding_direction": "Right"}],
+        "swing": [{"type": "Fixed", "width": 36}, {"type": "Swing Door", "width": 30, "swing_direction": "Left Out"},
+                  {"type": "Fixed", "width": 36}],
+    }
+    for name, panels in openings.items():
+        drawing = layout_architectural_elevation(panels, 96, show_mullions=True)
+        edges = [primitive.edgecolor for primitive in drawing if primitive.kind == "rect"]
+        if "gray" in edges:
+            # A track paints under the rails of the panels after it, as in the original renderer
+            assert "black" in edges[edges.index("gray"):]
+        batched, batched_artists = raster(drawing, batch=True)
+        unbatched, unbatched_artists = raster(drawing, batch=False)
+        assert batched == unbatched, name
+        assert batched_artists < unbatched_artists
+        print(f"✓ {name}: {unbatched_artists} primitives drawn as {batched_artists} artists, same pixels")
+
+
+def test_svg_backend():
+    print("\nTesting the SVG backend...")
+    drawing = layout_architectural_elevation(sample_panels, 96)
+    svg = backend_svg.render(drawing)
+    root = ElementTree.fromstring(svg)
+    # Canvas covers the label bounds at the scale that fits the view into the native figure size
+    x0, y0, x1, y1 = drawing.bounds
+    scale = min(drawing.figsize[0] * 72 / 118, drawing.figsize[1] * 72 / 96)
+    assert root.get("viewBox") == f"0 0 {(x1 - x0) * scale:g} {(y1 - y0) * scale:g}"
+    texts = [element.text for element in root.iter("{http://www.w3.org/2000/svg}text")]
+    assert texts == [primitive.text for primitive in drawing if primitive.kind == "text"]
+    assert "CLEAR GLASS" in texts and '118"' in texts
+    print(f"✓ Elevation SVG: {len(svg)} bytes")
+
+
+def test_pdf_backend():
+    print("\nTesting the PDF backend...")
+    drawing = layout_architectural_elevation(sample_panels, 96)
+    output = io.BytesIO()
+    with PdfWriter(output) as writer:
+        with writer.page() as page:
+            backend_pdf.render(drawing, page, 72, 72, 648, 468)
+            content = page.content().decode("latin-1")
+    pdf_data = output.getvalue()
+    assert zlib.decompress(re.search(rb"stream\n(.*?)\nendstream", pdf_data, re.S).group(1)).decode("latin-1") == content
+    # Clipped to the box, every label drawn, strokes of one style joined into one path
+    assert content.startswith("q\n72 72 648 468 re W n") and content.endswith("Q")
+    texts = re.findall(r"\((.*?)\) Tj", content)
+    assert texts == [primitive.text for primitive in drawing if primitive.kind == "text"]
+    assert content.count(" S") + content.count(" f") + content.count(" B") < len(drawing)
+    # Helvetica metrics: '1' is 556/1000 em, bold 'W' 944/1000
+    assert text_width("11", 10) == 11.12 and text_width("W", 10, bold=True) == 9.44
+    assert fit_text("CLEAR GLASS", 30, 10) == "CLE..."
+    print(f"✓ Elevation page: {len(pdf_data)} bytes")
+
+
+if __name__ == "__main__":
+    print("DRAWING LAYOUT TEST")
+    print("=" * 40)
+
+    test_layout_without_matplotlib()
+    test_layout_primitives()
+    test_backend_batches_keep_paint_order()
+    test_batched_elevation_matches_unbatched()
+    test_svg_backend()
+    test_pdf_backend()
+
+    print("\n🎉 All drawing layout tests passed!")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-built font list and text-metrics cache
+"""
+
+import glob
+import json
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+from font_cache import METRICS_FILE, TextMetrics
+from test_complete_package import sample_project_data
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Renders one elevation and plan, then reports where the font list lives, how many labels had to be
+# measured and a hash of the PNGs
+RENDER = (
+    "import contextlib, hashlib, io, json, os, sys\n"
+    "import drawing_generator, font_cache\n"
+    "drawing_generator.load_matplotlib()\n"
+    "import matplotlib\n"
+    "metrics = font_cache._text_metrics.metrics if font_cache._text_metrics else {}\n"
+    "known = len(metrics)\n"
+    "opening = json.loads(sys.stdin.read())\n"
+    "with contextlib.redirect_stderr(io.StringIO()):\n"
+    "    images = drawing_generator.generate_elevation_drawing(opening)['elevation_image']\n"
+    "    images += drawing_generator.generate_plan_drawing(opening)['plan_image']\n"
+    "saved = os.path.exists(os.path.join(font_cache.cache_dir(), font_cache.METRICS_FILE))\n"
+    "print(json.dumps({'cachedir': matplotlib.get_cachedir(), 'measured': len(metrics) - known, 'saved': saved,\n"
+    "                  'images': hashlib.sha256(images.encode()).hexdigest()}))\n"
+)
+
+
+def environment(env):
+    """A child process environment; MPLCONFIGDIR is dropped, font_cache sets it in this process"""
+    return dict({key: value for key, value in os.environ.items() if key != "MPLCONFIGDIR"},
+                SHOP_DRAWINGS_CACHE="0", **env)
+
+
+def render(env):
+    result = subprocess.run([sys.executable, "-c", RENDER], input=json.dumps(sample_project_data["openings"][0]),
+                            capture_output=True, text=True, cwd=HERE, env=environment(env), check=True)
+    return json.loads(result.stdout)
+
+
+def test_text_metrics_round_trip():
+    print("Testing text metrics are measured once and saved...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, METRICS_FILE)
+        calls = []
+        metrics = TextMetrics(path, ["v1"])
+        for _ in range(3):
+            assert metrics.measure("100.0|font|9.0|36\"", lambda: calls.append(1) or (21.0, 9.0, 0.0)) == (21.0, 9.0, 0.0)
+        assert len(calls) == 1
+        metrics.save()
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+        assert TextMetrics(path, ["v1"]).metrics == {"100.0|font|9.0|36\"": [21.0, 9.0, 0.0]}
+        # Another matplotlib version measures differently: start over
+        assert TextMetrics(path, ["v2"]).metrics == {}
+        print("✓ One measurement, reloaded from disk, dropped on version change")
+
+
+def test_metrics_saved_at_exit():
+    print("\nTesting text metrics are saved when the process exits, not per drawing...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = render({"SHOP_DRAWINGS_FONT_CACHE_DIR": cache_dir})
+        assert cold["measured"] > 0 and not cold["saved"], cold
+        assert os.path.exists(os.path.join(cache_dir, METRICS_FILE))
+        assert render({"SHOP_DRAWINGS_FONT_CACHE_DIR": cache_dir})["measured"] == 0
+    print(f"✓ {cold['measured']} labels written once at exit")
+
+
+def test_cache_is_scoped_to_drawings():
+    print("\nTesting only the service's drawing figures use the text-metrics cache...")
+    import drawing_generator
+    import font_cache
+    drawing_generator.load_matplotlib()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+    from matplotlib.figure import Figure
+    assert "font_cache" not in RendererAgg.get_text_width_height_descent.__qualname__
+    if font_cache._text_metrics is None:
+        print("✓ Cache disabled")
+        return
+
+    def measured(fig, text):
+        fig.text(0, 0, text).get_window_extent(fig.canvas.get_renderer())
+        return any(key.endswith("|" + text) for key in font_cache._text_metrics.metrics)
+
+    plain = Figure()
+    FigureCanvasAgg(plain)
+    assert not measured(plain, "plain matplotlib figure")
+    assert measured(drawing_generator.new_figure(), "drawing figure")
+    print("✓ RendererAgg untouched, drawing figures cached")
+
+
+def test_renderer_reused_until_size_changes():
+    print("\nTesting a drawing canvas keeps its renderer until the figure size or dpi changes...")
+    import drawing_generator
+    import font_cache
+    drawing_generator.load_matplotlib()
+    fig = drawing_generator.new_figure(figsize=(4, 3), dpi=100)
+    renderer = fig.canvas.get_renderer()
+    fig.canvas.draw()
+    assert fig.canvas.get_renderer() is renderer and fig.canvas.renderer is renderer
+    fig.set_dpi(200)
+    resized = fig.canvas.get_renderer()
+    assert resized is not renderer and (resized.width, resized.height) == (800, 600)
+    if font_cache._text_metrics is not None:
+        assert "CachedRendererAgg" in type(resized).__qualname__
+    print("✓ One renderer per size and dpi")
+
+
+def test_default_cache_dir():
+    print("\nTesting the default cache directory is outside the source tree...")
+    import font_cache
+    environment = os.environ.pop("SHOP_DRAWINGS_FONT_CACHE_DIR", None)
+    try:
+        directory = font_cache.cache_dir()
+    finally:
+        if environment is not None:
+            os.environ["SHOP_DRAWINGS_FONT_CACHE_DIR"] = environment
+    assert directory == os.path.join(tempfile.gettempdir(), "shop-drawings-font-cache")
+    assert not directory.startswith(HERE)
+    print(f"✓ {directory}")
+
+
+def test_fresh_process_reuses_font_cache():
+    print("\nTesting a fresh process starts from the pre-built font cache...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {"SHOP_DRAWINGS_FONT_CACHE_DIR": cache_dir}
+        subprocess.run([sys.executable, "drawing_generator.py", "--warm-cache"], cwd=HERE, check=True,
+                       capture_output=True, env=environment(env))
+        assert glob.glob(os.path.join(cache_dir, "fontlist-*.json"))
+        assert os.path.exists(os.path.join(cache_dir, METRICS_FILE))
+
+        warm = render(env)
+        assert warm["cachedir"] == cache_dir
+        assert warm["measured"] == 0, warm
+
+        uncached = render({"SHOP_DRAWINGS_FONT_CACHE": "0"})
+        assert uncached["images"] == warm["images"]
+        print("✓ Font list reused, no label measured again, identical PNGs")
+
+
+if __name__ == "__main__":
+    print("FONT CACHE TEST")
+    print("=" * 40)
+
+    test_text_metrics_round_trip()
+    test_metrics_saved_at_exit()
+    test_cache_is_scoped_to_drawings()
+    test_renderer_reused_until_size_changes()
+    test_default_cache_dir()
+    test_fresh_process_reuses_font_cache()
+
+    print("\n🎉 All font cache tests passed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared subOptionSelections resolver
+"""
+
+import json
+import drawing_generator
+import option_resolver
+from fixtures import make_option_heavy_project
+from package_generator import get_actual_quote_data
+
+product = {
+    "id": 7,
+    "productSubOptions": [
+        {"category": {"id": 1, "name": "Hardware", "individualOptions": [
+            {"id": 10, "name": "Lever Handle", "price": 120},
+            {"id": 10, "name": "Duplicate Lever", "price": 1},
+            {"id": 11, "name": "Pull Handle", "price": 95},
+        ]}},
+        {"category": {"id": 2, "name": "Finish", "individualOptions": [{"id": 20, "name": "Bronze"}]}},
+        {"category": {"id": 1, "name": "Shadowed Hardware", "individualOptions": [{"id": 12, "name": "Knob"}]}},
+    ]
+}
+
+
+def test_resolve_matches_quote_api():
+    print("Testing option resolution follows the quote API's matching rules...")
+    resolver = option_resolver.OptionResolver()
+    resolved = resolver.resolve(product, {"2": 20, "1": 10, "3": 30, "4": 0})
+    assert [(category["name"], option["name"]) for category, option in resolved] == [
+        ("Finish", "Bronze"), ("Hardware", "Lever Handle")]
+    # First category with the id wins, option ids must match exactly
+    assert resolver.resolve(product, {"1": 12}) == []
+    assert resolver.resolve(product, {"1": "10"}) == []
+    assert resolver.resolve(product, {"1": [10]}) == []
+    print("✓ str category ids, exact option ids, first match wins, unknown ids skipped")
+
+
+def test_index_memoized_per_request():
+    print("\nTesting product indexes are shared within a request only...")
+    with option_resolver.scope() as outer:
+        with option_resolver.scope() as inner:
+            assert inner is outer and option_resolver.resolver() is outer
+        outer.resolve(product, {"1": 11})
+        outer.resolve(dict(product), {"1": 10})
+        assert list(outer.indexes) == [7]
+    with option_resolver.scope() as other:
+        assert other is not outer and not other.indexes
+    assert option_resolver.resolver() is not option_resolver.resolver()
+    print("✓ One index per product id per request")
+
+
+def test_malformed_category_fails_every_time():
+    print("\nTesting a category without options fails for every panel, not just the first...")
+    broken = {"id": 8, "productSubOptions": [{"category": {"id": 1, "name": "Hardware"}}]}
+    resolver = option_resolver.OptionResolver()
+    for _ in range(2):
+        try:
+            resolver.resolve(broken, {"1": 10})
+            assert False, "resolved options of a category without individualOptions"
+        except KeyError:
+            pass
+    print("✓ Option map only cached once it is complete")
+
+
+def test_hardware_unchanged_for_large_project():
+    print("\nTesting drawings and quotes resolve the same hardware through the index...")
+    project = make_option_heavy_project(panels=50)
+    with option_resolver.scope():
+        quote = get_actual_quote_data(project)
+        panels = drawing_generator.convert_quoting_tool_data(project["openings"][0])
+    first_panel = project["openings"][0]["panels"][0]
+    selections = json.loads(first_panel["componentInstance"]["subOptionSelections"])
+    expected = [f"Hardware {category_id}: Option 0" if int(category_id) % 2 else f"Finish {category_id}: Option 0"
+                for category_id in selections]
+    assert panels[0]["hardware_options"] == expected
+    hardware = [name for name in expected if name.startswith("Hardware")]
+    assert quote["quoteItems"][0]["hardware"].startswith(" • ".join(f"{name} | +$0" for name in hardware))
+    print(f"✓ {len(expected)} options per panel resolved for {len(quote['quoteItems'])} openings")
+
+
+if __name__ == "__main__":
+    print("OPTION RESOLVER TEST")
+    print("=" * 40)
+
+    test_resolve_matches_quote_api()
+    test_index_memoized_per_request()
+    test_malformed_category_fails_every_time()
+    test_hardware_unchanged_for_large_project()
+
+    print("\n🎉 All option resolver tests passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the PDF merger used by parallel complete packages
+"""
+
+import io
+import re
+import pdf_merge
+from package_generator import generate_package_pdf, generate_package_pdf_parallel, open_pdf_pages
+from test_complete_package import sample_project_data
+
+
+def make_pdf(objects, info=None):
+    """PDF bytes with the given object bodies numbered from 1 (object 1 must be the catalog)"""
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    info = b' /Info %d 0 R' % info if info else b''
+    out += b'trailer\n<< /Size %d /Root 1 0 R%s >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, info, xref)
+    return bytes(out)
+
+
+def text_pdf(text):
+    """A one-page matplotlib PDF showing text"""
+    from matplotlib.figure import Figure
+    buffer = io.BytesIO()
+    with open_pdf_pages(buffer) as pdf_pages:
+        fig = Figure()
+        fig.text(0.1, 0.5, text)
+        pdf_pages.savefig(fig)
+    return buffer.getvalue()
+
+
+def test_strings_and_streams_are_copied_verbatim():
+    print("Testing references are only rewritten outside strings and stream data...")
+    # The content stream contains 'stream', 'endstream' and 'N 0 R'; /Length is an indirect object
+    content = b'BT (2 0 R) Tj ET\n% endstream 4 0 R\nstream\x00\xff'
+    document = make_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [ 3 0 R ] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents 4 0 R /Annots [ << /Contents (see 3 0 R \\) (and) 2 0 R) >> ] >>',
+        b'<< /Length 5 0 R >>\nstream\n' + content + b'\nendstream',
+        b'%d' % len(content),
+        b'<< /Title (Package 1 0 R) /Producer <3120302052> >>',
+    ], info=6)
+    merged = pdf_merge.merge_pdfs([document, document])
+
+    assert merged.count(b'stream\n' + content + b'\nendstream') == 2
+    assert merged.count(b'(see 3 0 R \\) (and) 2 0 R)') == 2
+    assert merged.count(b'/Length %d ' % len(content)) == 2
+    # Pages point at the merged page tree, Info is kept once
+    assert merged.count(b'/Parent 2 0 R') == 2 and merged.count(b'/Title (Package 1 0 R)') == 1
+    info = int(re.search(rb'/Info (\d+) 0 R', merged).group(1))
+    assert b'%d 0 obj\n<< /Title' % info in merged
+    print(f"✓ {len(merged)} bytes, strings and streams unchanged")
+
+
+def test_type3_fonts_are_merged():
+    print("\nTesting each font is written once with the glyphs of every document...")
+    first, second = text_pdf("ABC 123"), text_pdf("XYZ 789")
+    merged = pdf_merge.merge_pdfs([first, second])
+
+    assert merged.count(b'/Subtype /Type3') == first.count(b'/Subtype /Type3') == 1
+    char_procs = re.search(rb'/CharProcs << (.*?) >>', merged).group(1)
+    glyphs = set(re.findall(rb'/(\w+) \d+ 0 R', char_procs))
+    assert {b'A', b'C', b'X', b'Z', b'one', b'nine', b'space'} <= glyphs
+    assert merged.count(b'/Type /Page ') == 2 and b'/Creator (Matplotlib' in merged
+    print(f"✓ {len(glyphs)} glyphs in one font, {len(first) + len(second)} -> {len(merged)} bytes")
+
+
+def type3_pdf(tag, code, glyph, width):
+    """A one-page PDF with a one-glyph Type 3 font named tag+Sans"""
+    return make_pdf([
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [ 3 0 R ] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 4 0 R >> >> >>',
+        b'<< /Type /Font /Subtype /Type3 /BaseFont /%s+Sans /FirstChar %d /LastChar %d /Widths [ %d ] '
+        b'/Encoding << /Type /Encoding /Differences [ %d /%s ] >> /CharProcs << /%s 5 0 R >> >>'
+        % (tag, code, code, width, code, glyph, glyph),
+        b'<< /Length 2 >>\nstream\n%s\nendstream' % glyph[:2],
+    ])
+
+
+def test_subset_tagged_fonts_are_merged():
+    print("\nTesting fonts are merged across subset tags, but only when their codes agree...")
+    merged = pdf_merge.merge_pdfs([type3_pdf(b"AAAAAA", 65, b"A", 684), type3_pdf(b"BBBBBB", 90, b"Z", 685)])
+    assert merged.count(b'/Subtype /Type3') == 1
+    assert b'/FirstChar 65 /LastChar 90' in merged and b'/Differences [ 65 /A 90 /Z ]' in merged
+    widths = re.search(rb'/Widths \[ (.*?) \]', merged).group(1).split()
+    assert len(widths) == 26 and widths[0] == b'684' and widths[-1] == b'685'
+
+    # Same code, other glyph or width: two fonts
+    for other in (type3_pdf(b"BBBBBB", 65, b"B", 686), type3_pdf(b"BBBBBB", 65, b"A", 700)):
+        merged = pdf_merge.merge_pdfs([type3_pdf(b"AAAAAA", 65, b"A", 684), other])
+        assert merged.count(b'/Subtype /Type3') == 2
+        assert b'/BaseFont /AAAAAA+Sans' in merged and b'/BaseFont /BBBBBB+Sans' in merged
+    print("✓ Tags ignored, conflicting codes kept apart")
+
+
+def test_parallel_package_size_matches_serial():
+    print("\nTesting a parallel package is about the size of a serial one...")
+    project_data = dict(sample_project_data, openings=sample_project_data["openings"] * 4)
+    serial = generate_package_pdf(project_data)
+    parallel = generate_package_pdf_parallel(project_data, workers=2)
+
+    assert parallel.count(b'/Type /Page ') == serial.count(b'/Type /Page ') == 6
+    assert len(parallel) < len(serial) * 1.1, (len(parallel), len(serial))
+    print(f"✓ Serial {len(serial)} bytes, parallel {len(parallel)} bytes")
+
+
+if __name__ == "__main__":
+    print("PDF MERGE TEST")
+    print("=" * 40)
+
+    test_strings_and_streams_are_copied_verbatim()
+    test_type3_fonts_are_merged()
+    test_subset_tagged_fonts_are_merged()
+    test_parallel_package_size_matches_serial()
+
+    print("\n🎉 All PDF merge tests passed!")
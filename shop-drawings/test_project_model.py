@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for the normalized project model shared by the package pages
+"""
+
+import contextlib
+import io
+import json
+import pickle
+import drawing_generator
+import package_generator
+import project_model
+import service_log
+from fixtures import make_sample_project
+from test_complete_package import sample_project_data
+
+
+def test_records():
+    print("Testing the project is normalized into slotted records...")
+    project = project_model.normalize_project(sample_project_data)
+    opening = project.openings[0]
+    door = opening.panels[1]
+    assert project.name == sample_project_data["name"] and project.data is sample_project_data
+    assert opening.total_width == sum(panel["width"] for panel in opening.data["panels"])
+    assert door.product_type == "SWING_DOOR"
+    assert [option.label for option in door.options] == ["Hardware: Lever Handle"]
+    assert not hasattr(door, "__dict__") and not hasattr(door.options[0], "__dict__")
+    # Process pool workers get the records as they are
+    assert pickle.loads(pickle.dumps(opening)).panels[1].options[0].price == door.options[0].price
+    print(f"✓ {len(project.openings)} openings, {len(opening.panels)} panels in the first")
+
+
+def test_incomplete_panels():
+    print("\nTesting panels without a component or with bad selections...")
+    opening = project_model.normalize_opening({"name": "X", "panels": [
+        {"width": 30, "height": 80, "componentInstance": None},
+        {"width": 30, "componentInstance": {"subOptionSelections": "{bad", "product": {"productType": "SWING_DOOR"}}},
+    ]})
+    plain, bad = opening.panels
+    assert plain.product_type is None and plain.options == [] and plain.bom_items == []
+    assert bad.product_type == "SWING_DOOR" and bad.options == [] and bad.height is None
+    assert (opening.total_width, opening.max_height) == (60, 80)
+    print("✓ Missing components and unparsable selections leave no options")
+
+
+def test_defaults_only_replace_missing_fields():
+    print("\nTesting defaults apply to missing fields, not to null, 0 or empty values...")
+    sent = {"width": None, "height": 0, "swingDirection": "", "slidingDirection": None, "isCorner": 0,
+            "glassType": None, "componentInstance": {"product": None}}
+    missing = {"componentInstance": {"product": {"productType": "SWING_DOOR"}}}
+    opening = project_model.normalize_opening({"panels": [sent, missing]})
+
+    shopgen = drawing_generator.convert_quoting_tool_data(opening)
+    assert shopgen[0] == {"type": "Fixed", "width": None, "swing_direction": "", "sliding_direction": None,
+                          "corner_direction": "Up", "is_corner": 0, "glass_type": None, "hardware_options": []}
+    assert shopgen[1] == {"type": "Swing Door", "width": 36, "swing_direction": "Right In", "sliding_direction": "Left",
+                          "corner_direction": "Up", "is_corner": False, "glass_type": "Clear", "hardware_options": []}
+    # The raw opening dict converts the same way
+    assert drawing_generator.convert_quoting_tool_data(opening.data) == shopgen
+    assert opening.panels[0].get("height", 96) == 0 and opening.panels[1].get("height", 96) == 96
+    rows = package_generator.generate_door_schedule_from_opening(opening)["rows"]
+    assert [row[2:4] for row in rows] == [['None" x 0"', None], ['0" x 0"', "Clear"]]
+    # Totals count null sizes as 0
+    assert (opening.total_width, opening.max_height) == (0, 0)
+    print("✓ Null, 0 and empty values are kept, missing fields get the defaults")
+
+
+def test_selections_parsed_once_per_build():
+    print("\nTesting a package build parses each panel's selections once...")
+    project = make_sample_project(4)
+    panels = sum(len(opening["panels"]) for opening in project["openings"])
+    parses = []
+    parse_selections = project_model.parse_selections
+    project_model.parse_selections = lambda raw: parses.append(raw) or parse_selections(raw)
+    try:
+        package_generator.write_package_pdf_native(project, io.BytesIO())
+    finally:
+        project_model.parse_selections = parse_selections
+    assert len(parses) == panels
+    print(f"✓ {len(parses)} parses for {panels} panels across drawing, BOM and quote pages")
+
+
+def test_bad_selections_logged_once():
+    print("\nTesting unparseable selections are summed up in one record per project...")
+    project = make_sample_project(4)
+    for opening in project["openings"]:
+        for panel in opening["panels"]:
+            panel["componentInstance"]["subOptionSelections"] = "{not json"
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        project_model.normalize_project(project)
+    assert stderr.getvalue() == ""
+
+    service_log.set_level("INFO")
+    try:
+        with contextlib.redirect_stderr(stderr):
+            record = project_model.normalize_project(project)
+    finally:
+        service_log.set_level("WARNING")
+    logged = [json.loads(line) for line in stderr.getvalue().splitlines()]
+    panels = sum(len(opening.panels) for opening in record.openings)
+    assert len(logged) == 1 and logged[0]["level"] == "info"
+    assert logged[0]["message"].startswith(f"Could not parse subOptionSelections of {panels} panel(s)")
+    assert all(not panel.options for opening in record.openings for panel in opening.panels)
+    print(f"✓ Silent at the default level, one info record for {panels} panels")
+
+
+if __name__ == "__main__":
+    print("PROJECT MODEL TEST")
+    print("=" * 40)
+
+    test_records()
+    test_incomplete_panels()
+    test_defaults_only_replace_missing_fields()
+    test_selections_parsed_once_per_build()
+    test_bad_selections_logged_once()
+
+    print("\n🎉 All project model tests passed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test script for the on-disk render cache
+"""
+
+import os
+import random
+import tempfile
+import drawing_generator
+from render_cache import EVICT_SLICES, RenderCache
+from test_complete_package import sample_project_data
+
+sample_opening = sample_project_data["openings"][0]
+
+
+def test_cache_put_get_evict():
+    print("Testing render cache put/get and eviction...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = RenderCache(cache_dir, max_bytes=250)
+        assert cache.get("a" * 64) is None
+
+        cache.put("a" * 64, b"x" * 100)
+        cache.put("b" * 64, b"y" * 100)
+        assert cache.get("a" * 64) == b"x" * 100
+
+        # Make "b" the least recently used entry, then go over the size cap
+        os.utime(cache._path("b" * 64), (0, 0))
+        cache.put("c" * 64, b"z" * 100)
+
+        assert cache.get("b" * 64) is None
+        assert cache.get("a" * 64) == b"x" * 100
+        assert cache.get("c" * 64) == b"z" * 100
+        print("✓ Least recently used entry evicted")
+
+
+def test_puts_do_not_scan_the_cache():
+    print("\nTesting puts scan the directory about once per slice of the cap written...")
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = RenderCache(os.path.join(cache_dir, "cache"), max_bytes=EVICT_SLICES * 10_000)
+        # Nothing is created until the first put
+        assert not os.path.exists(cache.directory)
+        scans = []
+        entries = cache._entries
+        cache._entries = lambda: scans.append(1) or entries()
+
+        puts = 400
+        for index in range(puts):
+            cache.put(f"{index:064x}", b"x" * 1000)
+        total = sum(size for _, size, _ in entries())
+    # 400 KB written over a 160 KB cap: about one scan per 10 KB, not one per put
+    assert 20 <= len(scans) <= 60, len(scans)
+    assert total <= cache.max_bytes + 2 * cache.evict_slice, total
+    print(f"✓ {len(scans)} scans for {puts} puts, {total} bytes kept for a {cache.max_bytes} byte cap")
+
+
+def test_cache_hit_skips_rendering():
+    print("\nTesting cached drawings skip matplotlib...")
+    original_cache = drawing_generator.RENDER_CACHE
+    original_draw = drawing_generator.draw_architectural_elevation
+    with tempfile.TemporaryDirectory() as cache_dir:
+        drawing_generator.RENDER_CACHE = RenderCache(cache_dir)
+        try:
+            first = drawing_generator.generate_elevation_drawing(sample_opening)
+            assert first["success"], first.get("error")
+
+            def fail(*args, **kwargs):
+                raise AssertionError("cache hit should not render")
+            drawing_generator.draw_architectural_elevation = fail
+
+            second = drawing_generator.generate_elevation_drawing(sample_opening)
+            assert second["success"], second.get("error")
+            assert second["elevation_image"] == first["elevation_image"]
+            assert second["total_width"] == first["total_width"]
+
+            # Any change to the panels is a different key and renders again
+            changed = dict(sample_opening, panels=[dict(sample_opening["panels"][0], width=40)])
+            assert not drawing_generator.generate_elevation_drawing(changed)["success"]
+            print("✓ Second render served from cache")
+        finally:
+            drawing_generator.RENDER_CACHE = original_cache
+            drawing_generator.draw_architectural_elevation = original_draw
+
+
+if __name__ == "__main__":
+    print("RENDER CACHE TEST")
+    print("=" * 40)
+
+    test_cache_put_get_evict()
+    test_puts_do_not_scan_the_cache()
+    test_cache_hit_skips_rendering()
+
+    print("\n🎉 All render cache tests passed!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for the structured service logger
+"""
+
+import contextlib
+import io
+import json
+import drawing_generator
+import service_log
+from test_complete_package import sample_project_data
+
+sample_opening = sample_project_data["openings"][0]
+
+
+class CountingRepr:
+    """Counts how often a log message argument gets formatted"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "formatted"
+
+
+def records(stderr):
+    return [json.loads(line) for line in stderr.getvalue().splitlines()]
+
+
+def test_debug_off_by_default():
+    print("Testing debug logging is off and free by default...")
+    argument = CountingRepr()
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        service_log.get_logger("test").debug("Selections: %s", argument)
+        drawing_generator.convert_quoting_tool_data(sample_opening)
+    assert argument.calls == 0
+    assert stderr.getvalue() == ""
+    print("✓ No output and no message formatting below the log level")
+
+
+def test_records_carry_trace_id():
+    print("\nTesting records are JSON lines tagged with the request's trace ID...")
+    request = {"type": "elevation", "format": "svg", "traceId": "quote-42", "data": sample_opening}
+    stderr = io.StringIO()
+    service_log.set_level("DEBUG")
+    try:
+        with contextlib.redirect_stderr(stderr):
+            assert drawing_generator.handle_request(request)["success"]
+            drawing_generator.handle_request(dict(request, traceId=None))
+    finally:
+        service_log.set_level("WARNING")
+    logged = records(stderr)
+    traced = [record for record in logged if record["traceId"] == "quote-42"]
+    assert traced and {record["level"] for record in traced} == {"debug"}
+    assert any(record["message"] == 'Raw subOptionSelections: {"1": 10}' for record in traced)
+    assert {record["logger"] for record in logged} == {"drawing_generator", "project_model"}
+    # A request without a trace ID gets a generated one
+    generated = {record["traceId"] for record in logged} - {"quote-42"}
+    assert len(generated) == 1 and len(generated.pop()) == 16
+    print(f"✓ {len(logged)} records, {len(traced)} with the caller's trace ID")
+
+
+def test_nested_traces_share_the_parent_id():
+    print("\nTesting nested requests keep the active trace ID...")
+    assert service_log.trace_id() is None
+    with service_log.trace("batch-7"):
+        with service_log.trace():
+            assert service_log.trace_id() == "batch-7"
+        with service_log.trace("job-1"):
+            assert service_log.trace_id() == "job-1"
+    assert service_log.trace_id() is None
+    print("✓ Batch jobs inherit the batch trace ID")
+
+
+if __name__ == "__main__":
+    print("SERVICE LOG TEST")
+    print("=" * 40)
+
+    test_debug_off_by_default()
+    test_records_carry_trace_id()
+    test_nested_traces_share_the_parent_id()
+
+    print("\n🎉 All service log tests passed!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for CLI startup: requests that do not draw must not import the rendering stack
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from fixtures import HERE, STARTUP_BUDGET_SECONDS, make_sample_opening, startup_time
+
+# Runs a script's main() on the request in stdin, then reports which heavy modules got imported
+CHECK_IMPORTS = (
+    "import runpy, sys\n"
+    "sys.argv = [{script!r}]\n"
+    "runpy.run_path({script!r}, run_name='__main__')\n"
+    "print(sorted(name for name in ('matplotlib', 'matplotlib.pyplot', 'numpy') if name in sys.modules), file=sys.stderr)\n"
+)
+
+opening = make_sample_opening(0)
+
+
+def loaded_modules(script, request, env=None):
+    """(stdout of the request, heavy modules imported while answering it)"""
+    result = subprocess.run([sys.executable, "-c", CHECK_IMPORTS.format(script=script)], input=request,
+                            capture_output=True, text=True, cwd=HERE, env=dict(os.environ, **(env or {})))
+    return result.stdout, result.stderr.strip().splitlines()[-1]
+
+
+def test_requests_without_drawing_skip_matplotlib():
+    print("Testing requests that do not draw never import matplotlib or numpy...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = {"SHOP_DRAWINGS_CACHE": "1", "SHOP_DRAWINGS_CACHE_DIR": cache_dir}
+        elevation = json.dumps({"type": "elevation", "data": opening})
+        stdout, modules = loaded_modules("drawing_generator.py", elevation, cache)
+        # Figures are drawn with the object-oriented API, pyplot is never needed
+        assert json.loads(stdout)["success"] and modules == "['matplotlib', 'numpy']"
+
+        cases = [
+            ("drawing_generator.py", "{bad", None),
+            ("drawing_generator.py", '{"type": "section"}', None),
+            ("drawing_generator.py", json.dumps({"type": "elevation", "format": "svg", "data": opening}), None),
+            ("drawing_generator.py", elevation, cache),  # render cache hit
+            ("package_generator.py", "{bad", None),
+            ("package_generator.py", '{"type": "complete_package"}', None),
+        ]
+        for script, request, env in cases:
+            stdout, modules = loaded_modules(script, request, env)
+            assert stdout.startswith("{"), stdout
+            assert modules == "[]", (request[:40], modules)
+    print(f"✓ {len(cases)} requests answered without the rendering stack")
+
+
+def test_startup_budget():
+    print("\nTesting one-shot startup stays within the budget...")
+    elapsed, stdout = startup_time("drawing_generator.py", "{bad")
+    assert not json.loads(stdout)["success"]
+    print(f"✓ Bad request answered in {elapsed * 1000:.0f}ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f}ms)")
+    assert elapsed < STARTUP_BUDGET_SECONDS
+
+
+if __name__ == "__main__":
+    print("STARTUP TEST")
+    print("=" * 40)
+
+    test_requests_without_drawing_skip_matplotlib()
+    test_startup_budget()
+
+    print("\n🎉 All startup tests passed!")